@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-18 10:40
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def fill_unread_counts(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    Notification = apps.get_model('products', 'Notification')
+    unread = (
+        Notification.objects.filter(user=models.OuterRef('pk'), is_read=False)
+        .values('user')
+        .annotate(count=models.Count('id'))
+        .values('count')
+    )
+    User.objects.update(
+        unread_notification_count=Coalesce(models.Subquery(unread), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_user_kvkk_accepted_user_kvkk_accepted_at'),
+        ('products', '0022_export_job_params_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='unread_notification_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Okunmamış Bildirim Sayısı'),
+        ),
+        migrations.RunPython(fill_unread_counts, migrations.RunPython.noop),
+    ]
@@ -297,6 +297,13 @@ class User(AbstractUser):
     verbose_name="KVKK Onay Tarihi"
     )
 
+    # Okunmamış bildirim sayısı (products/notifications.py günceller, elle düzenlenmez)
+    unread_notification_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Okunmamış Bildirim Sayısı"
+    )
+
     # Yönetici atama (hangi yöneticiye bağlı)
     manager = models.ForeignKey(
         'self',
@@ -706,7 +706,7 @@ def admin_dashboard(request):
     
     # Yüksek tutarlı teklifler
     from decimal import Decimal
-    high_value_offers = Offer.objects.filter(gross_total_price__gte=Decimal('50000')).count()
+    high_value_offers = Offer.objects.filter(gross_total__gte=Decimal('50000')).count()
     
     # Bekleyen onaylar (firma tarafı)
     pending_manager_approvals = Offer.objects.filter(manager_approval_pending=True).count()
@@ -0,0 +1,257 @@
+"""
+Aktivite Logu Arşivi (Aylık Bölümler, Soğuk Depo)
+
+ActivityLog sadece ekleme yapılan, en hızlı büyüyen tablodur. Kapanmış ve
+ACTIVITY_LOG_HOT_MONTHS'tan eski aylar archive_activity_logs komutuyla
+tablodan çıkarılır:
+
+1. Ayın kayıtları id sırasıyla, partiler halinde gzip'li JSONL dosyasına
+   yazılır (ACTIVITY_LOG_ARCHIVE_DIR/activity-YYYY-MM.jsonl.gz). Dosya geçici
+   adla yazılıp diske senkronlanır, sonra atomik olarak taşınır.
+2. Ayın ActivityLogArchive satırı (kayıt sayısı, kullanıcı / teklif id'leri)
+   yazılır.
+3. Dosyaya yazılan kayıtlar tablodan kısa transaction'larla, partiler halinde
+   silinir.
+
+Yarıda kalan çalışma tekrar edilebilir: ayın dosyası varsa içeriği korunur,
+tabloda kalan kayıtlar id'ye göre tekilleştirilerek eklenir.
+
+Aylar yerel saate (TIME_ZONE) göre bölünür. search_activity_logs sıcak tablo
+ile arşivi birlikte sorgular; arşivde sadece filtreye uyan kullanıcı, teklif
+ve tarih aralığını içeren aylar açılır.
+"""
+import gzip
+import json
+import os
+import tempfile
+from datetime import date, datetime, time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+BATCH_SIZE = 1000
+DEFAULT_HOT_MONTHS = 12
+
+FIELDS = (
+    "id", "user_id", "action", "offer_id", "target_user_id",
+    "description", "metadata", "ip_address", "created_at",
+)
+
+
+def archive_dir():
+    return Path(getattr(
+        settings, "ACTIVITY_LOG_ARCHIVE_DIR", Path(settings.BASE_DIR) / "archive" / "activity_logs"
+    ))
+
+
+def archive_path(month):
+    return archive_dir() / f"activity-{month:%Y-%m}.jsonl.gz"
+
+
+# ---------------------------------------------------------
+# AYLAR
+# ---------------------------------------------------------
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, delta):
+    index = month.year * 12 + month.month - 1 + delta
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month):
+    """Ayın [başlangıç, bitiş) aralığı (yerel saat, aware datetime)"""
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(month, time.min), tz),
+        timezone.make_aware(datetime.combine(add_months(month, 1), time.min), tz),
+    )
+
+
+def archivable_months(hot_months=DEFAULT_HOT_MONTHS):
+    """Tablodan çıkarılabilecek aylar (kapanmış ve hot_months'tan eski), eskiden yeniye"""
+    from .models import ActivityLog
+
+    current = month_start(timezone.localdate())
+    cutoff = add_months(current, -max(hot_months, 1))
+    oldest = (
+        ActivityLog.objects.filter(created_at__lt=month_bounds(cutoff)[0])
+        .order_by("created_at")
+        .values_list("created_at", flat=True)
+        .first()
+    )
+    if oldest is None:
+        return []
+    months = [month_start(timezone.localtime(oldest).date())]
+    while add_months(months[-1], 1) < cutoff:
+        months.append(add_months(months[-1], 1))
+    return months
+
+
+# ---------------------------------------------------------
+# DOSYA
+# ---------------------------------------------------------
+def read_month_file(path):
+    """Arşiv dosyasındaki kayıtlar (sözlük; created_at ISO metin)"""
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        for line in archive:
+            yield json.loads(line)
+
+
+def archive_month(month, batch_size=BATCH_SIZE):
+    """
+    Bir ayın kayıtlarını soğuk depoya taşır.
+
+    Returns:
+        Tablodan silinen kayıt sayısı
+    """
+    from .models import ActivityLog, ActivityLogArchive
+
+    start, end = month_bounds(month)
+    month_logs = ActivityLog.objects.filter(created_at__gte=start, created_at__lt=end).order_by("id")
+    if not month_logs.exists():
+        return 0
+
+    directory = archive_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    path = archive_path(month)
+    seen, user_ids, offer_ids = set(), set(), set()
+    last_id = 0
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as output:
+                def add(row):
+                    seen.add(row["id"])
+                    user_ids.add(row["user_id"])
+                    if row["offer_id"] is not None:
+                        offer_ids.add(row["offer_id"])
+                    output.write(json.dumps(row, ensure_ascii=False).encode("utf-8") + b"\n")
+
+                # Önceki (yarıda kalmış) çalışmanın yazdıkları
+                if path.exists():
+                    for row in read_month_file(path):
+                        add(row)
+
+                while True:
+                    rows = list(month_logs.filter(id__gt=last_id).values(*FIELDS)[:batch_size])
+                    if not rows:
+                        break
+                    for row in rows:
+                        if row["id"] not in seen:
+                            add({**row, "created_at": row["created_at"].isoformat()})
+                    last_id = rows[-1]["id"]
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    ActivityLogArchive.objects.update_or_create(month=month, defaults={
+        "file_name": path.name,
+        "row_count": len(seen),
+        "user_ids": sorted(user_ids),
+        "offer_ids": sorted(offer_ids),
+    })
+
+    # Sadece dosyaya yazılmış kayıtlar silinir
+    removed = 0
+    while True:
+        with transaction.atomic():
+            ids = list(month_logs.filter(id__lte=last_id).values_list("id", flat=True)[:batch_size])
+            if not ids:
+                return removed
+            ActivityLog.objects.filter(pk__in=ids).delete()
+        removed += len(ids)
+
+
+def archive_activity_logs(hot_months=DEFAULT_HOT_MONTHS, batch_size=BATCH_SIZE):
+    """Eski ayları soğuk depoya taşır; [(ay, silinen kayıt sayısı)] döndürür"""
+    return [(month, archive_month(month, batch_size)) for month in archivable_months(hot_months)]
+
+
+# ---------------------------------------------------------
+# SORGU (SICAK + ARŞİV)
+# ---------------------------------------------------------
+def archived_log(row):
+    """Arşiv kaydını kaydedilmemiş ActivityLog nesnesine çevirir"""
+    from .models import ActivityLog
+
+    log = ActivityLog(**{**row, "created_at": parse_datetime(row["created_at"])})
+    log.archived = True
+    return log
+
+
+def archive_partitions(user_id=None, offer_id=None, date_from=None, date_to=None):
+    """Filtreye uyan kayıt içerebilecek arşiv ayları, yeniden eskiye"""
+    from .models import ActivityLogArchive
+
+    partitions = ActivityLogArchive.objects.order_by("-month")
+    if date_from:
+        partitions = partitions.filter(month__gte=month_start(date_from))
+    if date_to:
+        partitions = partitions.filter(month__lte=date_to)
+    return [
+        partition for partition in partitions
+        if (user_id is None or user_id in partition.user_ids)
+        and (offer_id is None or offer_id in partition.offer_ids)
+    ]
+
+
+def search_activity_logs(user=None, offer=None, date_from=None, date_to=None, limit=None):
+    """
+    Denetim araması: sıcak tablo ve arşivdeki kayıtlar, yeniden eskiye.
+
+    Args:
+        user: İşlemi yapan kullanıcı (nesne ya da id, opsiyonel)
+        offer: İlgili teklif (nesne ya da id, opsiyonel)
+        date_from, date_to: Tarih aralığı (date, dahil, yerel saat)
+        limit: En fazla kayıt sayısı (opsiyonel)
+
+    Returns:
+        ActivityLog listesi; arşivden gelenler kaydedilmemiş nesnedir (archived=True)
+    """
+    from .models import ActivityLog
+
+    user_id = getattr(user, "pk", user)
+    offer_id = getattr(offer, "pk", offer)
+
+    logs = ActivityLog.objects.order_by("-created_at", "-id")
+    if user_id is not None:
+        logs = logs.filter(user_id=user_id)
+    if offer_id is not None:
+        logs = logs.filter(offer_id=offer_id)
+    if date_from:
+        logs = logs.filter(created_at__date__gte=date_from)
+    if date_to:
+        logs = logs.filter(created_at__date__lte=date_to)
+    results = list(logs[:limit] if limit else logs)
+
+    # Arşiv ayları tablodaki tüm kayıtlardan eskidir: sıra bozulmadan eklenir
+    for partition in archive_partitions(user_id, offer_id, date_from, date_to):
+        if limit and len(results) >= limit:
+            break
+        matches = []
+        for row in read_month_file(archive_dir() / partition.file_name):
+            if user_id is not None and row["user_id"] != user_id:
+                continue
+            if offer_id is not None and row["offer_id"] != offer_id:
+                continue
+            log = archived_log(row)
+            day = timezone.localtime(log.created_at).date()
+            if (date_from and day < date_from) or (date_to and day > date_to):
+                continue
+            matches.append(log)
+        matches.sort(key=lambda log: (log.created_at, log.id), reverse=True)
+        results.extend(matches)
+
+    return results[:limit] if limit else results
@@ -0,0 +1,204 @@
+"""
+Aktivite Logu Yazıcısı
+
+log_activity istek içinde satır yazmaz: kayıt sınırlı bir kuyruğa eklenir,
+arka plan thread'i kuyruğu ACTIVITY_LOG_FLUSH_MS'de bir ya da
+ACTIVITY_LOG_BATCH_SIZE kayıt birikince tek bulk_create ile yazar. SQLite'ta
+her log ayrı bir yazma transaction'ı açıp iş yazmalarıyla yarışmaz.
+
+- Transaction içinde çağrılırsa kayıt commit'te kuyruğa girer (geri alınan
+  işlemin logu yazılmaz, yazıcı henüz commit edilmemiş teklifi görmez).
+- Kuyruk doluysa (yazıcı geride kaldı) kayıt çağıran thread'de yazılır: log
+  kaybolmaz, sadece o istek yavaşlar.
+- Süreç kapanırken (atexit) kuyrukta kalanlar yazılır.
+- ACTIVITY_LOG_ASYNC = False iken (testler) her kayıt anında yazılır.
+- SQLite "database is locked" hatasında yazma artan aralıklarla tekrar
+  denenir. Kilit yine açılmazsa kayıt atılmaz: thread partiyi tutar ve bir
+  sonraki turda yeniden dener, istek içinde yazılan kayıtta hata yükselir.
+- Parti başka bir hatayla yazılamazsa kayıtlar tek tek denenir; sadece bozuk
+  kayıt atılır.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from functools import partial
+
+from django.conf import settings
+from django.db import OperationalError, close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_MS = 500
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_QUEUE_SIZE = 10000
+SHUTDOWN_TIMEOUT = 10  # saniye
+LOCK_RETRIES = 6
+LOCK_RETRY_DELAY = 0.05  # saniye, her denemede iki katına çıkar
+
+_FLUSH = object()
+_STOP = object()
+
+
+def async_enabled():
+    return getattr(settings, "ACTIVITY_LOG_ASYNC", True)
+
+
+def is_lock_error(exc):
+    """SQLite yazma kilidi (başka transaction yazıyor): geçicidir, tekrar denenir"""
+    return isinstance(exc, OperationalError) and "locked" in str(exc).lower()
+
+
+def insert_logs(logs):
+    """Kayıtları tek INSERT ile yazar; veritabanı kilitliyse bekleyip tekrar dener"""
+    from .models import ActivityLog
+
+    delay = LOCK_RETRY_DELAY
+    for attempt in range(LOCK_RETRIES):
+        try:
+            with transaction.atomic():
+                ActivityLog.objects.bulk_create(logs)
+            return
+        except OperationalError as exc:
+            if not is_lock_error(exc) or attempt == LOCK_RETRIES - 1:
+                raise
+        time.sleep(delay)
+        delay *= 2
+
+
+def write_logs(logs):
+    """Kayıtları yazar; kilit hatası yükselir, bozuk kayıt tek tek denenip atılır"""
+    try:
+        insert_logs(logs)
+        return
+    except Exception as exc:
+        if is_lock_error(exc):
+            raise
+        if len(logs) == 1:
+            logger.exception("Aktivite logu yazılamadı: %s", logs[0].action)
+            return
+    # Parti bozuk bir kayıt yüzünden (ör. bu arada silinmiş teklif) reddedildi
+    for log in logs:
+        write_logs([log])
+
+
+class ActivityLogWriter:
+    """Sınırlı kuyruk + toplu yazan arka plan thread'i"""
+
+    def __init__(self, write_batch=write_logs):
+        self.write_batch = write_batch
+        self.lock = threading.Lock()
+        self.queue = None
+        self.thread = None
+        self.pid = None
+        self.atexit_registered = False
+
+    def write(self, log):
+        """Kaydı (kaydedilmemiş ActivityLog) yazar ya da kuyruğa ekler"""
+        if not async_enabled():
+            self.write_batch([log])
+            return
+        # Transaction dışındaysa hemen çalışır
+        transaction.on_commit(partial(self._enqueue, log))
+
+    def _enqueue(self, log):
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(log)
+        except queue.Full:
+            self.write_batch([log])
+
+    def _running(self):
+        # fork sonrası thread çocuk sürece geçmez, yenisi başlatılır
+        return self.thread is not None and self.pid == os.getpid() and self.thread.is_alive()
+
+    def _ensure_started(self):
+        if self._running():
+            return
+        with self.lock:
+            if self._running():
+                return
+            self.queue = queue.Queue(maxsize=getattr(settings, "ACTIVITY_LOG_QUEUE_SIZE", DEFAULT_QUEUE_SIZE))
+            self.pid = os.getpid()
+            self.thread = threading.Thread(target=self._run, name="activity-log-writer", daemon=True)
+            self.thread.start()
+            if not self.atexit_registered:
+                atexit.register(self.shutdown)
+                self.atexit_registered = True
+
+    # -------------------------
+    # ARKA PLAN THREAD'İ
+    # -------------------------
+    def _run(self):
+        interval = getattr(settings, "ACTIVITY_LOG_FLUSH_MS", DEFAULT_FLUSH_MS) / 1000
+        batch_size = getattr(settings, "ACTIVITY_LOG_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+        batch = []
+        markers = 0
+        deadline = None
+        stopping = False
+        while True:
+            # Boş kuyrukta süresiz bekler: boşta thread iş yapmaz
+            timeout = max(deadline - time.monotonic(), 0) if batch else None
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _FLUSH or item is _STOP:
+                markers += 1
+                stopping = stopping or item is _STOP
+            elif item is not None:
+                if not batch:
+                    deadline = time.monotonic() + interval
+                batch.append(item)
+
+            if stopping or item is _FLUSH or len(batch) >= batch_size or (batch and time.monotonic() >= deadline):
+                if self._write(batch, markers):
+                    batch, markers = [], 0
+                    if stopping:
+                        return
+                else:
+                    # Veritabanı kilitli: parti tutulur, bir aralık sonra tekrar yazılır
+                    deadline = time.monotonic() + interval
+
+    def _write(self, batch, markers):
+        """Partiyi yazar; veritabanı hâlâ kilitliyse False döndürür"""
+        try:
+            if batch:
+                self.write_batch(batch)
+        except Exception as exc:
+            if not is_lock_error(exc):
+                self._done(batch, markers)
+                raise
+            logger.warning("Aktivite logu yazılamadı (veritabanı kilitli), %d kayıt tekrar denenecek", len(batch))
+            return False
+        finally:
+            close_old_connections()
+        self._done(batch, markers)
+        return True
+
+    def _done(self, batch, markers):
+        for _ in range(len(batch) + markers):
+            self.queue.task_done()
+
+    # -------------------------
+    # BOŞALTMA / KAPANIŞ
+    # -------------------------
+    def flush(self):
+        """Kuyruktaki tüm kayıtlar yazılana kadar bekler"""
+        if self._running():
+            self.queue.put(_FLUSH)
+            self.queue.join()
+
+    def shutdown(self):
+        """Thread'i durdurur, kalan kayıtları yazar (atexit)"""
+        if not self._running():
+            return
+        self.queue.put(_STOP)
+        self.thread.join(SHUTDOWN_TIMEOUT)
+        self.thread = None
+
+
+activity_log_writer = ActivityLogWriter()
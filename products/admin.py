@@ -1,8 +1,8 @@
 from django.contrib import admin
 from django.shortcuts import render, redirect
 from django.urls import path
-import pandas as pd
 
+from .importer import ImportFormatError, import_products
 from .models import Product, Offer, OfferItem
 
 
@@ -28,42 +28,21 @@ class ProductAdmin(admin.ModelAdmin):
                 self.message_user(request, "Lütfen bir Excel dosyası seçin.", level="error")
                 return redirect(".")
 
-            df = pd.read_excel(excel_file)
-
-            # Zorunlu kolon kontrolü
-            required_cols = {"name", "price", "vat_rate"}
-            if not required_cols.issubset(set(df.columns)):
-                self.message_user(
-                    request,
-                    f"Excel sütunları eksik. Zorunlu sütunlar: {required_cols}",
-                    level="error",
+            # Katalog tek sorguda belleğe alınır, fark bellekte çıkarılıp toplu yazılır.
+            # Ad dosyadaki gibi saklanır; eşleşme normalize ad ile yapılır.
+            try:
+                report = import_products(
+                    excel_file, required=("name", "price", "vat_rate"), uppercase_names=False
                 )
+            except ImportFormatError as e:
+                self.message_user(request, str(e), level="error")
                 return redirect(".")
 
-            created_count = 0
-            updated_count = 0
-
-            for _, row in df.iterrows():
-                name = str(row["name"]).strip()
-
-                product, created = Product.objects.update_or_create(
-                    name=name,
-                    defaults={
-                        "price": row["price"],
-                        "vat_rate": int(row["vat_rate"]),
-                    },
-                )
-
-                if created:
-                    created_count += 1
-                else:
-                    updated_count += 1
-
-            self.message_user(
-                request,
-                f"Excel yükleme tamamlandı. "
-                f"Yeni eklenen: {created_count}, Güncellenen: {updated_count}"
-            )
+            self.message_user(request, f"Excel yükleme tamamlandı. {report.summary}")
+            if report.errors:
+                details = "; ".join(f"Satır {e['row']}: {e['error']}" for e in report.errors[:10])
+                more = f" (+{len(report.errors) - 10} satır daha)" if len(report.errors) > 10 else ""
+                self.message_user(request, f"Hatalı satırlar: {details}{more}", level="warning")
 
             return redirect("../")  # Product listesine döner
 
@@ -129,15 +108,11 @@ class OfferAdmin(admin.ModelAdmin):
         return f"#{base_id}"
     get_offer_number.short_description = "Teklif No"
     
-    def item_count(self, obj):
-        """Ürün sayısı"""
-        return obj.items.count()
-    item_count.short_description = "Ürün Sayısı"
-    
     def total_amount(self, obj):
-        """Toplam tutar"""
-        return f"{obj.total_price():.2f} ₺"
+        """Toplam tutar (saklanan son toplam)"""
+        return f"{obj.grand_total:.2f} ₺"
     total_amount.short_description = "Toplam Tutar"
+    total_amount.admin_order_field = "grand_total"
     
     def has_add_permission(self, request):
         """Eczane kullanıcıları teklif ekleyemez"""
@@ -0,0 +1,162 @@
+"""
+Ürün Otomatik Tamamlama (bellek içi önek indeksi)
+
+Ürün adlarının normalize edilmiş kelimeleri (search.normalize_search_text)
+sıralı (kelime, ürün id) listesinde tutulur; önek araması bisect ile yapılır.
+
+İndeks ilk istekte Product tablosundan kurulur, bu süreçteki save/delete
+sinyalleriyle yerinde güncellenir. Katalog versiyonu (catalog.py) başka bir
+süreçte veya toplu bir işlemde artarsa indeks bir sonraki aramada yeniden
+kurulur; aynı anda gelen aramalar tek bir kurulumu bekler.
+"""
+import heapq
+import threading
+from bisect import bisect_left, insort
+
+from .catalog import get_catalog_version
+from .search import normalize_search_text
+
+MIN_QUERY_LENGTH = 2
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+
+class ProductAutocompleteIndex:
+    """
+    Sıralı dizi tabanlı önek indeksi.
+
+    entries: (kelime, ürün id) sıralı listesi
+    products: ürün id → (normalize ad, kelimeler, JSON'a gidecek dict)
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rebuild_lock = threading.Lock()
+        self.entries = []
+        self.products = {}
+        self.version = None
+
+    # -------------------------
+    # KURULUM / GÜNCELLEME
+    # -------------------------
+    def ensure_current(self):
+        """Katalog versiyonu değiştiyse indeksi yeniden kurar (tek kurulum)"""
+        version = get_catalog_version()
+        if self.version == version:
+            return
+        with self.rebuild_lock:
+            # Kilidi beklerken başka istek aynı versiyonu kurmuş olabilir
+            if self.version is None or self.version < version:
+                self.rebuild()
+
+    def rebuild(self):
+        from .models import Product
+
+        version = get_catalog_version()
+        entries = []
+        products = {}
+        for row in Product.objects.values_list("id", "name", "barcode", "price", "vat_rate").iterator(chunk_size=5000):
+            record = self._record(*row)
+            products[row[0]] = record
+            entries.extend((token, row[0]) for token in record[1])
+        entries.sort()
+        with self.lock:
+            self.entries = entries
+            self.products = products
+            self.version = version
+
+    @staticmethod
+    def _record(product_id, name, barcode, price, vat_rate):
+        normalized = normalize_search_text(name)
+        tokens = tuple(sorted(set(normalized.split())))
+        if barcode:
+            tokens += (barcode,)
+        return normalized, tokens, {
+            "id": product_id,
+            "name": name,
+            "barcode": barcode or "",
+            "price": str(price),
+            "vat_rate": vat_rate,
+        }
+
+    def _remove(self, product_id):
+        record = self.products.pop(product_id, None)
+        if record is None:
+            return
+        for token in record[1]:
+            i = bisect_left(self.entries, (token, product_id))
+            if i < len(self.entries) and self.entries[i] == (token, product_id):
+                del self.entries[i]
+
+    def product_changed(self, product, version):
+        """
+        Bu süreçte kaydedilen ürün: indeksi yerinde güncelle.
+        version, sinyalde artırılmış katalog versiyonudur.
+        """
+        with self.lock:
+            if not self._advance_version(version):
+                return
+            self._remove(product.pk)
+            record = self._record(product.pk, product.name, product.barcode, product.price, product.vat_rate)
+            self.products[product.pk] = record
+            for token in record[1]:
+                insort(self.entries, (token, product.pk))
+
+    def product_deleted(self, product_id, version):
+        with self.lock:
+            if self._advance_version(version):
+                self._remove(product_id)
+
+    def _advance_version(self, version):
+        # Arada başka süreç de değişiklik yaptıysa versiyon birden fazla artmıştır → yeniden kur
+        if self.version is not None and version == self.version + 1:
+            self.version = version
+            return True
+        self.version = None
+        return False
+
+    # -------------------------
+    # ARAMA
+    # -------------------------
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """
+        Sorgudaki her kelime, ürünün bir kelimesinin (veya barkodunun) öneki
+        olmalı. Sıralama: adı ilk kelimeyle başlayanlar, kısa adlar, alfabetik.
+        """
+        self.ensure_current()
+
+        tokens = normalize_search_text(query).split()
+        if not tokens or len("".join(tokens)) < MIN_QUERY_LENGTH:
+            return []
+
+        with self.lock:
+            # En dar önek aralığından aday topla, diğer kelimelerle süz
+            ranges = sorted(
+                ((self._prefix_range(token), token) for token in tokens),
+                key=lambda r: r[0][1] - r[0][0],
+            )
+            (lo, hi), _ = ranges[0]
+            if lo == hi:
+                return []
+            candidates = {product_id for _, product_id in self.entries[lo:hi]}
+            for _, token in ranges[1:]:
+                candidates = {
+                    product_id for product_id in candidates
+                    if any(t.startswith(token) for t in self.products[product_id][1])
+                }
+
+            first = tokens[0]
+            records = (self.products[product_id] for product_id in candidates)
+            best = heapq.nsmallest(
+                limit, records,
+                key=lambda r: (not r[0].startswith(first), len(r[0]), r[0]),
+            )
+        return [record[2] for record in best]
+
+    def _prefix_range(self, prefix):
+        lo = bisect_left(self.entries, (prefix,))
+        hi = bisect_left(self.entries, (prefix + "\uffff",))
+        return lo, hi
+
+
+product_index = ProductAutocompleteIndex()
@@ -0,0 +1,124 @@
+"""
+Barkod Okuyucu Hızlı Yolu
+
+Okunan barkod önce birebir (Product.barcode indeksi), bulunamazsa GTIN
+olarak normalize edilip aranır: UPC-A (12), EAN-13, GTIN-14 aynı ürünü
+başa eklenmiş sıfırlarla ifade eder ("0" + UPC-A = EAN-13). Sorgu indeksli
+kalsın diye normalize hal için olası sıfır dolgulu yazımlar barcode__in ile
+aranır.
+
+Sonuçlar (bulunamayanlar dahil) süreç içi LRU cache'te tutulur; katalog
+versiyonu (catalog.py, tüm worker'ların ortak veritabanı sayacı) değişince
+cache boşaltılır. Başka worker'daki ürün değişikliği de bu süreçte bayat
+eşleşme bırakmaz.
+"""
+import threading
+from collections import OrderedDict
+
+from .catalog import get_catalog_version
+
+GTIN_LENGTH = 14
+CACHE_SIZE = 4096
+
+
+def normalize_gtin(code):
+    """Barkodu rakamlara indirger, baştaki sıfırları atar; GTIN değilse None"""
+    digits = "".join(ch for ch in str(code or "") if ch.isdigit())
+    if not digits or len(digits) > GTIN_LENGTH:
+        return None
+    return digits.lstrip("0") or None
+
+
+def gtin_variants(code):
+    """Normalize barkodun 8–14 hane arası sıfır dolgulu tüm yazımları"""
+    core = normalize_gtin(code)
+    if core is None:
+        return []
+    return [core.zfill(length) for length in range(max(len(core), 8), GTIN_LENGTH + 1)] + [core]
+
+
+def has_valid_check_digit(code):
+    """GTIN kontrol hanesi (mod 10) doğru mu"""
+    digits = "".join(ch for ch in str(code or "") if ch.isdigit())
+    if len(digits) not in (8, 12, 13, 14):
+        return False
+    body, check = digits[:-1], int(digits[-1])
+    total = sum(int(d) * (3 if i % 2 == 0 else 1) for i, d in enumerate(reversed(body)))
+    return (10 - total % 10) % 10 == check
+
+
+class BarcodeLookup:
+    """Barkod → ürün bilgisi, LRU cache'li"""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.cache = OrderedDict()
+        self.version = None
+
+    def lookup(self, code):
+        """
+        Ürünü dict olarak döndürür (id, name, barcode, price, vat_rate,
+        match: exact / gtin); bulunamazsa None.
+        """
+        return self.lookup_many([code]).get(str(code or "").strip())
+
+    def lookup_many(self, codes):
+        """
+        Birden çok barkod (okutma partisi): katalog versiyonu bir kez okunur.
+
+        Returns:
+            {barkod: ürün dict'i ya da None}; boş barkodlar dahil edilmez
+        """
+        version = get_catalog_version()
+        with self.lock:
+            if version != self.version:
+                self.cache.clear()
+                self.version = version
+
+        results = {}
+        for code in codes:
+            code = str(code or "").strip()
+            if not code or code in results:
+                continue
+            with self.lock:
+                if code in self.cache:
+                    self.cache.move_to_end(code)
+                    results[code] = self.cache[code]
+                    continue
+
+            results[code] = result = self._query(code)
+
+            with self.lock:
+                if self.version == version:
+                    self.cache[code] = result
+                    if len(self.cache) > self.maxsize:
+                        self.cache.popitem(last=False)
+        return results
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+            self.version = None
+
+    @staticmethod
+    def _query(code):
+        from .models import Product
+
+        fields = ("id", "name", "barcode", "price", "vat_rate")
+        row = Product.objects.filter(barcode=code).values(*fields).first()
+        match = "exact"
+        if row is None:
+            variants = [v for v in gtin_variants(code) if v != code]
+            if not variants:
+                return None
+            row = Product.objects.filter(barcode__in=variants).order_by("id").values(*fields).first()
+            match = "gtin"
+        if row is None:
+            return None
+        row["price"] = str(row["price"])
+        row["match"] = match
+        return row
+
+
+barcode_cache = BarcodeLookup()
@@ -0,0 +1,222 @@
+"""
+Toplu Teklif PDF
+
+Filtreye (durum, tarih aralığı, firma) uyan tekliflerin PDF'lerini tek
+dosyada toplar. Export işi olarak run_export_worker içinde çalışır (bkz.
+export_jobs.py); kapsam tek teklif PDF yetkisiyle aynıdır
+(export_data.pdf_export_offers).
+
+- ZIP: teklifler CHUNK_SIZE'lık parçalara bölünüp bir süreç havuzunda
+  üretilir. Her süreç PDF'i doküman cache'inden alır (documents.py), daha
+  önce üretilmiş teklifler yeniden çizilmez. Parçalar geldikçe ZIP'e yazılır
+  ve işin ilerlemesi güncellenir.
+- Birleşik PDF: tüm teklifler tek dokümanda, her biri yeni sayfada ve kendi
+  yer imiyle (bookmark). Tek doküman olduğu için tek süreçte çizilir.
+"""
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import partial
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from reportlab.platypus import Flowable, PageBreak
+
+from .export_data import export_offers, pdf_export_offers
+from .offer_pdf import offer_pdf_doc, offer_story, render_offer_pdf
+
+CHUNK_SIZE = 20
+
+BATCH_STATUSES = ("sent", "approved", "rejected", "revised")
+
+# Durum seçiliyse tarih aralığı o duruma geçiş tarihine uygulanır
+DATE_FIELDS = {
+    "sent": "sent_at",
+    "approved": "approved_at",
+    "rejected": "rejected_at",
+}
+
+
+def pool_size():
+    return getattr(settings, "OFFER_PDF_BATCH_PROCESSES", None) or min(4, os.cpu_count() or 1)
+
+
+# ---------------------------------------------------------
+# FİLTRE
+# ---------------------------------------------------------
+def parse_batch_params(data):
+    """
+    İstek verisinden toplu PDF parametrelerini okur.
+
+    Returns:
+        (params, hata mesajı) - geçerliyse hata None
+    """
+    status = data.get("status", "").strip()
+    if status and status not in BATCH_STATUSES:
+        return None, "Geçersiz durum."
+
+    params = {"status": status, "merge": data.get("merge") in ("1", "on", "true")}
+    for key in ("date_from", "date_to"):
+        raw = data.get(key, "").strip()
+        if raw:
+            try:
+                date.fromisoformat(raw)
+            except ValueError:
+                return None, "Geçersiz tarih."
+        params[key] = raw
+    if params["date_from"] and params["date_to"] and params["date_from"] > params["date_to"]:
+        return None, "Başlangıç tarihi bitiş tarihinden sonra olamaz."
+
+    firm = data.get("firm", "").strip()
+    if firm and not firm.isdigit():
+        return None, "Geçersiz firma."
+    params["firm"] = int(firm) if firm else None
+    return params, None
+
+
+def batch_offers(user, params):
+    """Parametrelere uyan, kullanıcının PDF'ini alabileceği teklifler (taslaklar hariç)"""
+    offers = pdf_export_offers(user).exclude(status="draft")
+    status = params.get("status")
+    if status:
+        offers = offers.filter(status=status)
+
+    date_field = DATE_FIELDS.get(status, "created_at")
+    if params.get("date_from"):
+        offers = offers.filter(**{f"{date_field}__date__gte": params["date_from"]})
+    if params.get("date_to"):
+        offers = offers.filter(**{f"{date_field}__date__lte": params["date_to"]})
+
+    if params.get("firm"):
+        # Firma yöneticisi ve personelinin teklifleri
+        offers = offers.filter(Q(user_id=params["firm"]) | Q(user__manager_id=params["firm"]))
+    return offers.order_by(date_field, "id")
+
+
+def batch_extension(params):
+    return "pdf" if params.get("merge") else "zip"
+
+
+# ---------------------------------------------------------
+# ZIP (SÜREÇ HAVUZU)
+# ---------------------------------------------------------
+def _init_pool():
+    # spawn / forkserver ile başlayan süreçlerde Django kurulu değildir
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def load_offers(offer_ids):
+    """Teklifleri export grafiğiyle, verilen sırada yükler"""
+    from .models import Offer
+
+    offers = {offer.id: offer for offer in export_offers(Offer.objects.filter(id__in=offer_ids))}
+    return [offers[offer_id] for offer_id in offer_ids if offer_id in offers]
+
+
+def render_pdf_chunk(offer_ids):
+    """Havuz sürecinde: parçadaki tekliflerin PDF'lerini üretir; [(teklif id, PDF baytları)]"""
+    from .documents import document_cache
+
+    results = []
+    for offer in load_offers(offer_ids):
+        with document_cache.open(offer, "pdf", partial(render_offer_pdf, offer)) as document:
+            results.append((offer.id, document.read()))
+    return results
+
+
+def _map_chunks(chunks, processes):
+    if processes <= 1:
+        # Tek süreç (testler, tek çekirdek): aynı bağlantıyla sırayla
+        yield from map(render_pdf_chunk, chunks)
+        return
+    # Çocuk süreçler ebeveynin veritabanı bağlantısını paylaşmamalı
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_pool) as pool:
+        yield from pool.map(render_pdf_chunk, chunks)
+
+
+def write_pdf_zip(offer_ids, output, on_progress=None):
+    """Tekliflerin PDF'lerini ZIP olarak output'a yazar"""
+    chunks = [offer_ids[i:i + CHUNK_SIZE] for i in range(0, len(offer_ids), CHUNK_SIZE)]
+    processes = min(pool_size(), len(chunks))
+    done = 0
+    # PDF'ler zaten sıkıştırılmış, tekrar sıkıştırmak CPU harcar
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_STORED) as archive:
+        for results in _map_chunks(chunks, processes):
+            for offer_id, content in results:
+                archive.writestr(f"teklif_{offer_id}.pdf", content)
+            done += len(results)
+            if on_progress:
+                on_progress(done)
+
+
+# ---------------------------------------------------------
+# BİRLEŞİK PDF
+# ---------------------------------------------------------
+class OfferBookmark(Flowable):
+    """Bulunduğu sayfaya yer imi ekler; çizildiğinde on_draw çağrılır"""
+
+    def __init__(self, key, title, on_draw=None):
+        super().__init__()
+        self.key = key
+        self.title = title
+        self.on_draw = on_draw
+
+    def wrap(self, available_width, available_height):
+        return 0, 0
+
+    def draw(self):
+        self.canv.bookmarkPage(self.key)
+        self.canv.addOutlineEntry(self.title, self.key, level=0)
+        if self.on_draw:
+            self.on_draw()
+
+
+def write_merged_pdf(offer_ids, output, on_progress=None):
+    """Teklifleri yer imli tek PDF olarak output'a yazar"""
+    drawn = 0
+
+    def offer_drawn():
+        nonlocal drawn
+        drawn += 1
+        if on_progress and (drawn % CHUNK_SIZE == 0 or drawn == len(offer_ids)):
+            on_progress(drawn)
+
+    story = []
+    for i in range(0, len(offer_ids), CHUNK_SIZE):
+        for offer in load_offers(offer_ids[i:i + CHUNK_SIZE]):
+            if story:
+                story.append(PageBreak())
+            title = f"Teklif #{offer.id} - {offer.user.company_name or offer.user.username}"
+            story.append(OfferBookmark(f"offer-{offer.id}", title, offer_drawn))
+            story.extend(offer_story(offer))
+
+    # Yer imi panelini açık göster
+    offer_pdf_doc(output).build(story, onFirstPage=lambda canvas, doc: canvas.showOutline())
+
+
+def write_batch_pdfs(job, output):
+    """Export işinin toplu PDF dosyasını (ZIP ya da birleşik PDF) output'a yazar"""
+    from .models import ExportJob
+
+    offer_ids = list(batch_offers(job.user, job.params).values_list("id", flat=True))
+    if not offer_ids:
+        raise ValueError("Filtreye uyan teklif bulunamadı.")
+
+    job.total, job.progress = len(offer_ids), 0
+    ExportJob.objects.filter(id=job.id).update(total=job.total, progress=0)
+
+    def on_progress(done):
+        job.progress = done
+        ExportJob.objects.filter(id=job.id).update(progress=done)
+
+    if job.params.get("merge"):
+        write_merged_pdf(offer_ids, output, on_progress)
+    else:
+        write_pdf_zip(offer_ids, output, on_progress)
@@ -0,0 +1,192 @@
+"""
+Toplu Teklif Toplamları (NumPy)
+
+Export ve raporlar için: çok sayıda teklifin satır ve teklif toplamlarını
+tek sorguda yüklenen kolonlar üzerinden vektörel hesaplar.
+
+Kurallar totals.py / money.py ile birebir aynıdır (tam sayı kuruş,
+ROUND_HALF_UP); sonuçlar int64 kuruş dizileri olarak tutulur.
+"""
+import numpy as np
+from django.db.models import QuerySet
+
+from .models import OfferItem
+from .money import PERCENT_SCALE, from_kurus
+
+DISCOUNT_CODES = {"percent": 1, "amount": 2}
+
+# Bu sınırın altındaki çarpımlar int64'e sığar; üstü Python int ile hesaplanır
+INT64_SAFE = float(2 ** 62)
+
+
+def _to_kurus_array(values):
+    """2 haneli Decimal değerleri int64 kuruş dizisine çevirir"""
+    return np.rint(np.fromiter(values, dtype=np.float64) * 100).astype(np.int64)
+
+
+def _div_half_up(numerator, denominator):
+    """Negatif olmayan diziler için ROUND_HALF_UP tam sayı bölme"""
+    return (2 * numerator + denominator) // (2 * denominator)
+
+
+def _percent_of(amount, rate):
+    """
+    money.percent_of'un vektörel hali. amount × rate taşmasın diye
+    amount, PERCENT_SCALE'e göre bölüm / kalan olarak ayrılır.
+    """
+    quotient, remainder = np.divmod(amount, PERCENT_SCALE)
+    return quotient * rate + _div_half_up(remainder * rate, PERCENT_SCALE)
+
+
+class BulkOfferTotals:
+    """
+    Birden fazla teklifin toplamları.
+
+    lines[alan] dizileri item sırasıyla, offers[alan] dizileri offer_ids
+    sırasıyla kuruş cinsindendir; alan adları LineTotals / OfferTotals ile
+    aynıdır. Export'lar için offer_values() / line_values() TL float döndürür.
+
+    Args:
+        offers: Offer queryset'i (alt sorgu olarak kullanılır) veya id listesi
+    """
+
+    def __init__(self, offers):
+        if isinstance(offers, QuerySet):
+            item_filter = {"offer__in": offers.order_by().values("pk")}
+        else:
+            item_filter = {"offer_id__in": list(offers)}
+
+        rows = list(
+            OfferItem.objects.filter(**item_filter)
+            .order_by("offer_id", "id")
+            .values_list(
+                "offer_id", "id", "quantity", "unit_price", "vat_rate",
+                "discount_type", "discount_value",
+                "offer__overall_discount_type", "offer__overall_discount_value",
+            )
+        )
+        self._compute(rows)
+
+    # -------------------------
+    # HESAP
+    # -------------------------
+    def _compute(self, rows):
+        if rows:
+            columns = list(zip(*rows))
+        else:
+            columns = [()] * 9
+        item_offer_ids = np.array(columns[0], dtype=np.int64)
+        # Satırlar offer_id'ye göre sıralı; kalemi olmayan teklifler dizilerde yer almaz
+        self.offer_ids, line_offer = np.unique(item_offer_ids, return_inverse=True)
+        self.offer_index = {offer_id: i for i, offer_id in enumerate(self.offer_ids.tolist())}
+        self.item_ids = np.array(columns[1], dtype=np.int64)
+        self.item_index = {item_id: i for i, item_id in enumerate(self.item_ids.tolist())}
+        quantity = np.array(columns[2], dtype=np.int64)
+        unit_price = _to_kurus_array(columns[3])
+        vat_rate = _to_kurus_array(columns[4])
+        discount_code = np.array([DISCOUNT_CODES.get(t, 0) for t in columns[5]], dtype=np.int8)
+        discount_value = _to_kurus_array(columns[6])
+
+        # Satır iskontosu (birim başına)
+        unit_discount = np.where(
+            discount_code == 1,
+            _percent_of(unit_price, discount_value),
+            np.where(discount_code == 2, np.minimum(discount_value, unit_price), 0),
+        )
+        discounted_unit_price = np.maximum(unit_price - unit_discount, 0)
+
+        # İskontolu (net)
+        line_subtotal = discounted_unit_price * quantity
+        vat = _percent_of(line_subtotal, vat_rate)
+
+        # İskontosuz (gross)
+        gross_line_subtotal = unit_price * quantity
+        gross_vat = _percent_of(gross_line_subtotal, vat_rate)
+
+        lines = self.lines = {
+            "unit_discount_amount": unit_discount,
+            "discount_amount": unit_discount * quantity,
+            "line_subtotal": line_subtotal,
+            "vat_amount": vat,
+            "total_price": line_subtotal + vat,
+            "gross_line_subtotal": gross_line_subtotal,
+            "gross_vat_amount": gross_vat,
+            "gross_total_price": gross_line_subtotal + gross_vat,
+        }
+
+        offer_count = len(self.offer_ids)
+
+        # Her teklifin ilk satırı; satırlar sıralı olduğu için toplamlar reduceat ile
+        first = np.flatnonzero(np.r_[True, np.diff(line_offer) != 0]) if offer_count else line_offer
+
+        def per_offer(values):
+            if not offer_count:
+                return np.zeros(0, dtype=np.int64)
+            return np.add.reduceat(values, first)
+
+        net = per_offer(line_subtotal)
+        offers = self.offers = {
+            "items_subtotal_net": per_offer(gross_line_subtotal),
+            "items_subtotal_gross": per_offer(lines["gross_total_price"]),
+            "items_net_after_item_discounts": net,
+            "items_vat_after_item_discounts": per_offer(vat),
+            "items_gross_after_item_discounts": per_offer(lines["total_price"]),
+        }
+        offers["total_item_discounts"] = offers["items_subtotal_net"] - net
+        self.item_counts = np.bincount(line_offer, minlength=offer_count)
+
+        # Genel iskonto (teklif kolonları her satırda tekrar eder; ilkini al)
+        overall_code = np.array([DISCOUNT_CODES.get(columns[7][i], 0) for i in first.tolist()], dtype=np.int8)
+        overall_value = _to_kurus_array(columns[8][i] for i in first.tolist())
+
+        overall = np.where(
+            overall_code == 1,
+            _percent_of(net, overall_value),
+            np.where(overall_code == 2, np.minimum(overall_value, net), 0),
+        )
+        offers["overall_discount_amount"] = overall
+        offers["net_after_overall_discount"] = net - overall
+
+        # Genel iskonto sonrası KDV: satır × kalan × oran / (net × 10000)
+        line_net = net[line_offer]
+        remaining = offers["net_after_overall_discount"][line_offer]
+        denominator = np.maximum(line_net, 1) * PERCENT_SCALE
+        magnitude = 2 * line_subtotal.astype(np.float64) * remaining * vat_rate + denominator
+        safe = magnitude < INT64_SAFE
+
+        vat_after = np.zeros(len(line_subtotal), dtype=np.int64)
+        vat_after[safe] = _div_half_up(
+            line_subtotal[safe] * remaining[safe] * vat_rate[safe], denominator[safe]
+        )
+        # Çok büyük tutarlar: aynı formül, taşmasız Python int ile
+        for i in np.flatnonzero(~safe).tolist():
+            vat_after[i] = _div_half_up(
+                int(line_subtotal[i]) * int(remaining[i]) * int(vat_rate[i]), int(denominator[i])
+            )
+        vat_after[line_net == 0] = 0
+        lines["vat_after_overall_discount"] = vat_after
+
+        offers["vat_after_overall_discount"] = per_offer(vat_after)
+        offers["final_total"] = offers["net_after_overall_discount"] + offers["vat_after_overall_discount"]
+
+    # -------------------------
+    # ERİŞİM
+    # -------------------------
+    def offer_values(self, offer_id):
+        """Teklifin toplamları (TL, float); kalemi olmayan teklif için sıfırlar"""
+        i = self.offer_index.get(offer_id)
+        if i is None:
+            return dict.fromkeys(list(self.offers) + ["item_count"], 0)
+        values = {name: int(array[i]) / 100 for name, array in self.offers.items()}
+        values["item_count"] = int(self.item_counts[i])
+        return values
+
+    def line_values(self, item_id):
+        """Satırın tutarları (TL, float)"""
+        i = self.item_index[item_id]
+        return {name: int(array[i]) / 100 for name, array in self.lines.items()}
+
+    def offer_decimal(self, offer_id, name):
+        """Tek bir teklif toplamını Decimal olarak döndürür (rapor / karşılaştırma)"""
+        i = self.offer_index.get(offer_id)
+        return from_kurus(0 if i is None else int(self.offers[name][i]))
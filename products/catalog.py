@@ -0,0 +1,45 @@
+"""
+Katalog Versiyonu
+
+Ürün kataloğu her değiştiğinde artan sayaç. Süreç içi ürün indeksleri
+(otomatik tamamlama, barkod cache'i) kendi versiyonlarını bununla
+karşılaştırır; fark varsa kendilerini yeniler.
+
+Sayaç veritabanında tek satırlık CatalogVersion tablosunda tutulur: tüm
+worker süreçleri aynı değeri görür (süreç içi LocMem cache'te her worker'ın
+ayrı sayacı olurdu). Okuma birincil anahtarla tek satırdır.
+
+Product save/delete sinyalleri sayacı otomatik artırır; sinyal tetiklemeyen
+toplu işlemler (bulk_create, queryset.update) bump_catalog_version() çağırmalıdır.
+"""
+from django.db.models import F
+
+CATALOG_VERSION_ID = 1
+
+
+def get_catalog_version(for_update=False):
+    """
+    Güncel katalog versiyonu. for_update=True ise satır transaction sonuna
+    kadar kilitlenir (transaction içinde çağrılmalı): versiyonu kontrol edip
+    katalogu yazan işlem araya başka değişiklik girmeden tamamlanır.
+    """
+    from .models import CatalogVersion
+
+    versions = CatalogVersion.objects.filter(pk=CATALOG_VERSION_ID)
+    if for_update:
+        versions = versions.select_for_update()
+    version = versions.values_list("version", flat=True).first()
+    return version or 0
+
+
+def bump_catalog_version():
+    """Katalog değişti: tüm süreçlerdeki indeksler bir sonraki kullanımda yenilenir"""
+    from .models import CatalogVersion
+
+    versions = CatalogVersion.objects.filter(pk=CATALOG_VERSION_ID)
+    if not versions.update(version=F("version") + 1):
+        # İlk artış: satır yoksa oluştur (aynı anda oluşturan olduysa onunkini artır)
+        _, created = CatalogVersion.objects.get_or_create(pk=CATALOG_VERSION_ID, defaults={"version": 1})
+        if not created:
+            versions.update(version=F("version") + 1)
+    return versions.values_list("version", flat=True).get()
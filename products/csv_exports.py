@@ -0,0 +1,157 @@
+"""
+Ham Veri Export (CSV / TSV, akış halinde)
+
+Entegrasyonlar ve denetim için stilsiz çıktı. Satırlar values_list
+projeksiyonu üzerinden .iterator(chunk_size=...) ile okunur ve
+StreamingHttpResponse'a parça parça yazılır: ilk bayt hemen gider,
+bellek kullanımı satır sayısından bağımsızdır.
+
+Tutarlar nokta ondalıklı düz sayı, tarihler yerel saatle
+"YYYY-AA-GG SS:DD:ss" biçimindedir. Dosya başındaki BOM, Excel'in
+Türkçe karakterleri doğru açması içindir.
+"""
+import csv
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .export_data import export_staff
+from .totals import LineTotals
+
+CHUNK_SIZE = 2000
+ROWS_PER_WRITE = 500
+
+FORMATS = {
+    "csv": (",", "text/csv; charset=utf-8"),
+    "tsv": ("\t", "text/tab-separated-values; charset=utf-8"),
+}
+
+OFFER_HEADERS = [
+    "teklif_id", "teklif_no", "revizyon", "personel", "durum", "olusturma_tarihi",
+    "gonderilme_tarihi", "onay_tarihi", "red_tarihi", "urun_sayisi",
+    "iskonto_toplami", "kdv_haric_toplam", "kdv_toplami", "kdv_dahil_toplam", "red_nedeni",
+]
+OFFER_ITEM_HEADERS = [
+    "teklif_id", "teklif_no", "durum", "gonderilme_tarihi", "personel", "kalem_id",
+    "urun_id", "urun_adi", "barkod", "adet", "birim_fiyat", "kdv_orani",
+    "iskonto_tipi", "iskonto_degeri", "iskonto_tutari", "kdv_haric_toplam",
+    "kdv_tutari", "kdv_dahil_toplam",
+]
+PRODUCT_HEADERS = [
+    "urun_id", "urun_adi", "barkod", "fiyat", "kdv_orani",
+    "fiyat_guncelleme_tarihi", "eklenme_tarihi",
+]
+STAFF_HEADERS = [
+    "kullanici_id", "kullanici_adi", "ad", "soyad", "email", "aktif",
+    "kayit_tarihi", "son_giris", "toplam_teklif",
+]
+
+
+class _Echo:
+    """csv.writer için: yazılan satırı döndürür (Django dokümanındaki desen)"""
+
+    def write(self, value):
+        return value
+
+
+def _datetime(value):
+    return timezone.localtime(value).strftime("%Y-%m-%d %H:%M:%S") if value else ""
+
+
+# ---------------------------------------------------------
+# SATIR ÜRETİCİLERİ
+# ---------------------------------------------------------
+def offer_rows(offers, chunk_size=CHUNK_SIZE):
+    """Teklif başına bir satır; toplamlar saklanan kolonlardan okunur"""
+    rows = offers.values_list(
+        "id", "original_offer_id", "revision_number", "user__username", "status",
+        "created_at", "sent_at", "approved_at", "rejected_at", "item_count",
+        "discount_total", "net_total", "vat_total", "grand_total", "reject_reason",
+    ).iterator(chunk_size=chunk_size)
+    for (offer_id, original_id, revision, username, status, created_at, sent_at,
+         approved_at, rejected_at, item_count, discount, net, vat, grand, reject_reason) in rows:
+        yield [
+            offer_id, original_id or offer_id, revision, username, status,
+            _datetime(created_at), _datetime(sent_at), _datetime(approved_at), _datetime(rejected_at),
+            item_count, discount, net, vat, grand, reject_reason or "",
+        ]
+
+
+def offer_item_rows(offers, chunk_size=CHUNK_SIZE):
+    """
+    Kalem başına bir satır (ürün iskontoları sonrası satır tutarları);
+    teklif listesiyle aynı sırada, en yeni teklif önce.
+    """
+    from .models import OfferItem
+
+    items = (
+        OfferItem.objects
+        .filter(offer__in=offers.values("id"))
+        .order_by("-offer__created_at", "offer_id", "id")
+        .values_list(
+            "offer_id", "offer__original_offer_id", "offer__status", "offer__sent_at",
+            "offer__user__username", "id", "product_id", "product__name", "product__barcode",
+            "quantity", "unit_price", "vat_rate", "discount_type", "discount_value",
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    for (offer_id, original_id, status, sent_at, username, item_id, product_id, name, barcode,
+         quantity, unit_price, vat_rate, discount_type, discount_value) in items:
+        line = LineTotals(quantity, unit_price, vat_rate, discount_type, discount_value)
+        yield [
+            offer_id, original_id or offer_id, status, _datetime(sent_at), username, item_id,
+            product_id, name, barcode or "", quantity, unit_price, vat_rate,
+            discount_type, discount_value, line.discount_amount, line.line_subtotal,
+            line.vat_amount, line.total_price,
+        ]
+
+
+def product_rows(products, chunk_size=CHUNK_SIZE):
+    rows = products.values_list(
+        "id", "name", "barcode", "price", "vat_rate", "price_updated_at", "created_at",
+    ).iterator(chunk_size=chunk_size)
+    for product_id, name, barcode, price, vat_rate, price_updated_at, created_at in rows:
+        yield [product_id, name, barcode or "", price, vat_rate,
+               _datetime(price_updated_at), _datetime(created_at)]
+
+
+def staff_rows(staff, chunk_size=CHUNK_SIZE):
+    """Personel başına bir satır; teklif sayısı aynı sorguda sayılır"""
+    rows = export_staff(staff).values_list(
+        "id", "username", "first_name", "last_name", "email", "is_active_user",
+        "date_joined", "last_login", "offer_count",
+    ).iterator(chunk_size=chunk_size)
+    for user_id, username, first_name, last_name, email, active, joined, last_login, count in rows:
+        yield [user_id, username, first_name, last_name, email, int(active),
+               _datetime(joined), _datetime(last_login), count]
+
+
+# ---------------------------------------------------------
+# YANIT
+# ---------------------------------------------------------
+def stream_delimited(headers, rows, delimiter=","):
+    """Başlık + satırları metin parçaları halinde üretir (ROWS_PER_WRITE satırda bir)"""
+    writer = csv.writer(_Echo(), delimiter=delimiter, lineterminator="\r\n")
+    yield "\ufeff" + writer.writerow(headers)
+    buffer = []
+    for row in rows:
+        buffer.append(writer.writerow(row))
+        if len(buffer) >= ROWS_PER_WRITE:
+            yield "".join(buffer)
+            buffer = []
+    if buffer:
+        yield "".join(buffer)
+
+
+def delimited_response(fmt, filename, headers, rows):
+    """
+    Args:
+        fmt: "csv" veya "tsv" (FORMATS)
+        filename: Uzantısız dosya adı
+        headers: Başlık satırı
+        rows: Satır listeleri üreten iterable
+    """
+    delimiter, content_type = FORMATS[fmt]
+    response = StreamingHttpResponse(stream_delimited(headers, rows, delimiter), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    return response
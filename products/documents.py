@@ -0,0 +1,205 @@
+"""
+Teklif Doküman Cache'i (PDF / Excel)
+
+Tek teklif PDF / Excel çıktıları diskte saklanır; anahtar teklif id +
+Offer.document_version + LAYOUT_VERSION'dır. Versiyon teklif, kalemleri,
+fatura alanları veya teslimat adresleri değişince artar (bkz.
+bump_document_version, signals.py), böylece eski dosya bir daha okunmaz.
+
+- LRU: okunan dosyanın mtime'ı güncellenir; dizin OFFER_DOCUMENT_CACHE_MAX_BYTES
+  sınırını aşınca en uzun süredir okunmayan dosyalar silinir.
+- Birleştirme: aynı dokümana gelen eşzamanlı isteklerden sadece biri üretir,
+  diğerleri bekleyip hazır dosyayı okur (süreç içinde thread kilidi,
+  süreçler arasında fcntl dosya kilidi).
+"""
+import os
+import tempfile
+import threading
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import F
+
+try:
+    import fcntl
+except ImportError:  # Windows: sadece süreç içi kilit
+    fcntl = None
+
+# Çıktı düzeni (layout) değişince artırın: eski dosyalar kullanılmaz, LRU ile silinir
+LAYOUT_VERSION = 3
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+EVICT_TO_RATIO = 0.9
+LOCK_BUCKETS = 64
+
+
+def bump_document_version(offers):
+    """Verilen teklif queryset'inin doküman versiyonunu artırır"""
+    return offers.update(document_version=F("document_version") + 1)
+
+
+class OfferDocumentCache:
+    """Diskte, boyut sınırlı LRU doküman cache'i"""
+
+    def __init__(self, directory=None, max_bytes=None):
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.key_locks = {}
+
+    @property
+    def directory(self):
+        directory = self._directory or getattr(
+            settings, "OFFER_DOCUMENT_CACHE_DIR", Path(settings.BASE_DIR) / "cache" / "offer_documents"
+        )
+        return Path(directory)
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes or getattr(settings, "OFFER_DOCUMENT_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)
+
+    def path_for(self, offer, fmt):
+        return self.directory / f"{offer.pk}-{fmt}-v{offer.document_version}-l{LAYOUT_VERSION}.{fmt}"
+
+    # -------------------------
+    # OKUMA / ÜRETME
+    # -------------------------
+    def open(self, offer, fmt, render):
+        """
+        Dokümanı cache'ten açar, yoksa üretir.
+
+        Args:
+            offer: Offer (document_version yüklü)
+            fmt: Dosya uzantısı (pdf / xlsx)
+            render: render(output) → dokümanı ikili dosya nesnesine yazar
+
+        Returns:
+            Okumaya açık dosya nesnesi
+        """
+        path = self.path_for(offer, fmt)
+        handle = self._open_hit(path)
+        if handle:
+            return handle
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._render_lock(path.name):
+            # Beklerken başka istek üretmiş olabilir
+            handle = self._open_hit(path)
+            if handle:
+                return handle
+            self._write(path, render)
+            handle = open(path, "rb")
+
+        self._remove_old_versions(offer, fmt, path)
+        self.evict()
+        return handle
+
+    @staticmethod
+    def _open_hit(path):
+        try:
+            handle = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)  # LRU: son erişim
+        except OSError:
+            pass
+        return handle
+
+    def _write(self, path, render):
+        # Yarım dosya okunmasın diye geçici dosyaya yazıp atomik olarak taşı
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as output:
+                render(output)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @contextmanager
+    def _render_lock(self, key):
+        with self.lock:
+            entry = self.key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                if fcntl is None:
+                    yield
+                    return
+                lock_dir = self.directory / "locks"
+                lock_dir.mkdir(exist_ok=True)
+                # Sabit sayıda kilit dosyası: anahtar → kova
+                bucket = zlib.crc32(key.encode()) % LOCK_BUCKETS
+                with open(lock_dir / f"{bucket}.lock", "a") as lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    try:
+                        yield
+                    finally:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            with self.lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self.key_locks[key]
+
+    # -------------------------
+    # TEMİZLİK
+    # -------------------------
+    def _remove_old_versions(self, offer, fmt, current):
+        for path in self.directory.glob(f"{offer.pk}-{fmt}-v*.{fmt}"):
+            if path != current:
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """Toplam boyut sınırı aşılmışsa en eski erişilen dosyaları siler; silinen sayıyı döndürür"""
+        try:
+            entries = self._entries()
+        except FileNotFoundError:
+            return 0
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return 0
+
+        target = self.max_bytes * EVICT_TO_RATIO
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        try:
+            entries = self._entries()
+        except FileNotFoundError:
+            return
+        for _, _, path in entries:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+
+document_cache = OfferDocumentCache()
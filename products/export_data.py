@@ -0,0 +1,88 @@
+"""
+Export Veri Yükleyici
+
+Excel / PDF / CSV export'larının kullandığı teklif grafiğini sabit sayıda
+sorguyla yükler:
+
+    teklif → hazırlayan (+ yöneticisi), orijinal teklif,
+             onaylayan / reddeden (+ eczacısı)      → tek JOIN'li sorgu
+    kalemler → ürün, teslimat adresi                → Prefetch ile tek sorgu
+    personel → teklif sayısı                        → annotate (Count)
+
+Teklif ya da kalem sayısı arttıkça sorgu sayısı değişmez; export kodu
+ilişkilere erişirken veritabanına tekrar gitmez.
+"""
+from django.db.models import Count, Prefetch, Q, prefetch_related_objects
+
+OFFER_RELATED = (
+    "user__manager",
+    "original_offer",
+    "approved_by__manager",
+    "rejected_by__manager",
+)
+
+
+def items_prefetch():
+    """Kalemler + ürün + teslimat adresi, eklenme sırasıyla"""
+    from .models import OfferItem
+
+    return Prefetch(
+        "items",
+        queryset=OfferItem.objects.select_related("product", "delivery_address").order_by("id"),
+    )
+
+
+def export_offers(queryset=None, with_items=True):
+    """
+    Export için hazırlanmış teklif queryset'i.
+
+    Args:
+        queryset: Süzülmüş Offer queryset'i (verilmezse tüm teklifler)
+        with_items: Kalemler de prefetch edilsin mi
+    """
+    from .models import Offer
+
+    if queryset is None:
+        queryset = Offer.objects.all()
+    queryset = queryset.select_related(*OFFER_RELATED)
+    if with_items:
+        queryset = queryset.prefetch_related(items_prefetch())
+    return queryset
+
+
+def prefetch_offer_items(offers):
+    """Önceden yüklenmiş teklif listesine (ör. iterator parçası) kalemleri ekler"""
+    prefetch_related_objects(offers, items_prefetch())
+    return offers
+
+
+def firm_export_offers(user):
+    """Firma export'larına giren teklifler: yönetici kendi + personelinin, personel sadece kendi"""
+    from accounts.models import User
+    from .models import Offer
+
+    if user.is_manager:
+        firm_users = User.objects.filter(manager=user) | User.objects.filter(id=user.id)
+    else:
+        firm_users = User.objects.filter(id=user.id)
+    return Offer.objects.filter(user__in=firm_users).exclude(status="draft").order_by("-created_at")
+
+
+def pdf_export_offers(user):
+    """
+    Kullanıcının PDF'ini alabileceği teklifler (tek teklif PDF yetkisiyle aynı):
+    admin ve eczane tümü, yönetici kendi + personelinin, diğerleri sadece kendi.
+    """
+    from .models import Offer
+
+    offers = Offer.objects.all()
+    if user.is_superuser or user.is_staff or user.role == "eczane":
+        return offers
+    if user.is_manager:
+        return offers.filter(Q(user=user) | Q(user__manager=user))
+    return offers.filter(user=user)
+
+
+def export_staff(queryset):
+    """Personel queryset'ine offer_count ekler (personel başına sorgu yerine tek GROUP BY)"""
+    return queryset.annotate(offer_count=Count("offer"))
@@ -0,0 +1,300 @@
+"""
+Arka Plan Export İşleri
+
+Liste export endpoint'leri dosyayı istek içinde üretmez: ExportJob kaydı
+ekleyip hemen döner. run_export_worker komutu (bir veya birden çok süreç)
+işleri sırayla alır, dosyayı MEDIA_ROOT/exports/ altına yazar ve
+kullanıcıya indirme linkli bir Notification gönderir. Toplu teklif PDF'leri
+de (ZIP / birleşik PDF) aynı kuyrukla üretilir (bkz. batch_pdf.py).
+
+- Tekilleştirme: aynı kullanıcı + tip + parametreler için bekleyen/çalışan iş varsa yenisi
+  açılmaz (veritabanında koşullu unique constraint ile de korunur).
+- İş alma: en eski bekleyen iş "pending → running" koşullu UPDATE ile
+  alınır; aynı işi iki worker alamaz, satır kilidi gerekmez.
+- Kira (heartbeat): işi çalıştıran worker EXPORT_JOB_HEARTBEAT_SECONDS'ta
+  bir heartbeat_at'i günceller. EXPORT_JOB_TIMEOUT_MINUTES boyunca heartbeat
+  gelmeyen iş ölü worker'ın işidir, yeniden kuyruğa alınır; uzun süren ama
+  çalışan iş alınmaz.
+- Bitirme: sonuç "running + aynı worker" koşullu UPDATE ile yazılır. İş bu
+  arada başka worker'a geçtiyse eski worker sonucu yazmaz, dosyasını siler
+  ve bildirim göndermez; iş iki kez bitirilmez.
+- Süre aşımı: hazır dosyalar EXPORT_JOB_TTL_HOURS sonra silinir.
+"""
+import hashlib
+import json
+import os
+import secrets
+import socket
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import F, Q
+from django.urls import reverse
+from django.utils import timezone
+
+from .batch_pdf import batch_extension, write_batch_pdfs
+from .export_data import export_staff, firm_export_offers
+from .exports import workbook_file, write_offers_workbook, write_products_workbook, write_staff_workbook
+
+MAX_ATTEMPTS = 3
+
+# tip → indirme dosya adı öneki
+FILENAME_PREFIXES = {
+    "offers": "teklifler",
+    "products": "urunler",
+    "staff": "personeller",
+    "offer_pdfs": "teklif_pdf",
+}
+
+CONTENT_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "zip": "application/zip",
+    "pdf": "application/pdf",
+}
+
+
+def job_ttl():
+    return timedelta(hours=getattr(settings, "EXPORT_JOB_TTL_HOURS", 24))
+
+
+def job_timeout():
+    return timedelta(minutes=getattr(settings, "EXPORT_JOB_TIMEOUT_MINUTES", 30))
+
+
+def heartbeat_interval():
+    return getattr(settings, "EXPORT_JOB_HEARTBEAT_SECONDS", 30)
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+# ---------------------------------------------------------
+# KUYRUĞA EKLEME
+# ---------------------------------------------------------
+def dedup_key(user, kind, params=None):
+    raw = f"{user.pk}:{kind}:{json.dumps(params or {}, sort_keys=True)}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def enqueue_export(user, kind, params=None):
+    """
+    Export işi ekler; aynı istek (aynı parametrelerle) zaten sıradaysa onu döndürür.
+
+    Returns:
+        (ExportJob, created)
+    """
+    from .models import ExportJob
+
+    key = dedup_key(user, kind, params)
+    active = ExportJob.objects.filter(dedup_key=key, status__in=ExportJob.ACTIVE_STATUSES)
+    job = active.first()
+    if job:
+        return job, False
+    try:
+        with transaction.atomic():
+            return ExportJob.objects.create(user=user, kind=kind, dedup_key=key, params=params or {}), True
+    except IntegrityError:
+        # Aynı anda gelen diğer istek önce ekledi
+        return active.get(), False
+
+
+# ---------------------------------------------------------
+# WORKER
+# ---------------------------------------------------------
+def claim_next_job(worker=None):
+    """En eski bekleyen işi bu worker'a alır; iş yoksa None"""
+    from .models import ExportJob
+
+    worker = worker or worker_name()
+    while True:
+        job_id = (
+            ExportJob.objects.filter(status="pending")
+            .order_by("created_at", "id")
+            .values_list("id", flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+        now = timezone.now()
+        claimed = ExportJob.objects.filter(id=job_id, status="pending").update(
+            status="running", started_at=now, heartbeat_at=now, worker=worker, attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return ExportJob.objects.select_related("user").get(id=job_id)
+        # Başka worker aldı, sıradakine bak
+
+
+def export_extension(job):
+    if job.kind == "offer_pdfs":
+        return batch_extension(job.params)
+    return "xlsx"
+
+
+def write_export(job, output):
+    """İşin dosyasını output'a yazar (izin kapsamı endpoint'lerle aynı)"""
+    from accounts.models import User
+    from .models import Product
+
+    user = job.user
+    if job.kind == "offers":
+        write_offers_workbook(firm_export_offers(user), user.company_name or user.get_full_name(), output)
+    elif job.kind == "products":
+        write_products_workbook(Product.objects.all().order_by("name"), output)
+    elif job.kind == "staff":
+        staff = export_staff(User.objects.filter(manager=user)).order_by("-date_joined")
+        write_staff_workbook(staff, user.get_full_name() or user.username, output)
+    elif job.kind == "offer_pdfs":
+        write_batch_pdfs(job, output)
+    else:
+        raise ValueError(f"Bilinmeyen export tipi: {job.kind}")
+
+
+class JobHeartbeat:
+    """
+    İş çalışırken arka plan thread'inde heartbeat_at'i günceller (kira).
+    Sadece iş hâlâ bu worker'da "running" ise günceller.
+    """
+
+    def __init__(self, job, interval=None):
+        self.job = job
+        self.interval = heartbeat_interval() if interval is None else interval
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self._run, name=f"export-heartbeat-{self.job.id}", daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+    def _run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    beat(self.job)
+                except DatabaseError:  # Örn. SQLite kilidi: sonraki turda tekrar denenir
+                    pass
+        finally:
+            connection.close()
+
+
+def beat(job):
+    """İşin kirasını yeniler; iş artık bu worker'da değilse False döndürür"""
+    return owned(job).update(heartbeat_at=timezone.now()) > 0
+
+
+def owned(job):
+    """İş hâlâ bu worker'da çalışıyorsa onu seçen queryset"""
+    from .models import ExportJob
+
+    return ExportJob.objects.filter(id=job.id, status="running", worker=job.worker)
+
+
+def finish_job(job, **fields):
+    """
+    Sonucu koşullu UPDATE ile yazar; iş bu arada yeniden kuyruğa alınıp
+    başka worker'a geçtiyse hiçbir şey yazmaz ve False döndürür.
+    """
+    if not owned(job).update(**fields):
+        return False
+    for name, value in fields.items():
+        setattr(job, name, value)
+    return True
+
+
+def run_job(job):
+    """Alınmış (running) işi çalıştırır, sonucu kaydeder ve kullanıcıyı bilgilendirir"""
+    from .permissions_helpers import create_notification
+
+    try:
+        with JobHeartbeat(job):
+            output = workbook_file(write_export, job)
+            name = f"{FILENAME_PREFIXES[job.kind]}_{secrets.token_hex(8)}.{export_extension(job)}"
+            with output:
+                job.file.save(name, File(output), save=False)
+    except Exception as e:
+        if not finish_job(job, status="failed", error=str(e), finished_at=timezone.now()):
+            return job
+        create_notification(
+            user=job.user,
+            title="Dışa Aktarma Başarısız",
+            message=f"{job.get_kind_display()} hazırlanamadı. Lütfen tekrar deneyin.",
+            notification_type="error",
+            link=reverse("export_job_status", args=[job.id]),
+        )
+        return job
+
+    finished_at = timezone.now()
+    if not finish_job(
+        job, status="done", error="", file=job.file.name,
+        finished_at=finished_at, expires_at=finished_at + job_ttl(),
+    ):
+        # Kira kaybedildi: iş başka worker'da, bu dosya kullanılmayacak
+        job.file.delete(save=False)
+        return job
+    create_notification(
+        user=job.user,
+        title="Dışa Aktarma Hazır",
+        message=(
+            f"{job.get_kind_display()} dosyanız hazır. "
+            f"Link {timezone.localtime(job.expires_at).strftime('%d.%m.%Y %H:%M')} tarihine kadar geçerlidir."
+        ),
+        notification_type="success",
+        link=reverse("export_job_download", args=[job.id]),
+    )
+    return job
+
+
+def run_pending_jobs(worker=None, limit=None):
+    """Bekleyen işleri sırayla çalıştırır; çalıştırılan iş sayısını döndürür"""
+    count = 0
+    while limit is None or count < limit:
+        job = claim_next_job(worker)
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
+
+
+# ---------------------------------------------------------
+# BAKIM
+# ---------------------------------------------------------
+def expire_jobs(now=None):
+    """Süresi dolan dosyaları siler; silinen iş sayısını döndürür"""
+    from .models import ExportJob
+
+    now = now or timezone.now()
+    count = 0
+    for job in ExportJob.objects.filter(status="done", expires_at__lte=now).iterator():
+        job.file.delete(save=False)
+        job.status = "expired"
+        job.save(update_fields=["status", "file"])
+        count += 1
+    return count
+
+
+def requeue_stale_jobs(now=None):
+    """
+    Worker'ı ölmüş (EXPORT_JOB_TIMEOUT_MINUTES boyunca heartbeat atmamış)
+    işleri yeniden kuyruğa alır; MAX_ATTEMPTS denemeden sonra başarısız sayar.
+    """
+    from .models import ExportJob
+
+    now = now or timezone.now()
+    cutoff = now - job_timeout()
+    stale = ExportJob.objects.filter(status="running").filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+    failed = stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status="failed", error="Zaman aşımı", finished_at=now,
+    )
+    requeued = stale.update(status="pending", worker="", started_at=None, heartbeat_at=None)
+    return requeued, failed
@@ -0,0 +1,316 @@
+"""
+Liste Excel Export'ları (akış halinde): teklif, ürün, personel
+
+openpyxl write-only modunda çalışır: satırlar parça parça (chunk) okunan
+kayıtlardan üretilip doğrudan dosyaya yazılır, bellekte workbook
+tutulmaz. Stiller workbook başına bir kez NamedStyle olarak oluşturulur,
+hücreler sadece stil adını taşır. Çıktı SpooledTemporaryFile'a yazılır
+(küçük dosyalar bellekte, büyükler diskte kalır).
+"""
+import tempfile
+
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, NamedStyle, PatternFill
+from openpyxl.utils import get_column_letter
+
+from .export_data import prefetch_offer_items
+
+CHUNK_SIZE = 500
+SPOOL_MAX_SIZE = 10 * 1024 * 1024
+MONEY_FORMAT = '#,##0.00 ₺'
+
+STATUS_LABELS = {'sent': 'Bekliyor', 'approved': 'Onaylandı', 'rejected': 'Reddedildi', 'revised': 'Revize Edildi'}
+STATUS_COLORS = {'Onaylandı': '155724', 'Reddedildi': '721C24', 'Bekliyor': '856404'}
+DISCOUNT_LABELS = {'none': 'Yok', 'percent': '%', 'amount': '₺'}
+
+SUMMARY_HEADERS = ['Teklif No', 'Revizyon', 'Personel', 'Durum', 'Gönderilme Tarihi',
+                   'Onay/Red Tarihi', 'Ürün Sayısı', 'KDV Hariç Toplam',
+                   'KDV Toplamı', 'KDV Dahil Toplam', 'Red Nedeni']
+SUMMARY_WIDTHS = [12, 10, 20, 12, 18, 18, 12, 18, 15, 18, 30]
+SUMMARY_MONEY_COLUMNS = {8, 9, 10}
+
+ITEM_HEADERS = ['Teklif No', 'Personel', 'Durum', 'Tarih', 'Ürün Adı', 'Barkod',
+                'Adet', 'Birim Fiyat (KDV Hariç)', 'KDV %', 'İskonto Tipi',
+                'İskonto Değeri', 'İskonto Tutarı', 'KDV Hariç Toplam',
+                'KDV Tutarı', 'KDV Dahil Toplam']
+ITEM_WIDTHS = [12, 20, 12, 12, 30, 15, 8, 20, 8, 12, 12, 15, 18, 12, 18]
+ITEM_MONEY_COLUMNS = {8, 12, 13, 14, 15}
+
+PRODUCT_HEADERS = ['Sıra', 'Ürün Adı', 'Barkod', 'Birim Fiyat (KDV Dahil)', 'KDV %',
+                   'Fiyat Güncelleme Tarihi', 'Eklenme Tarihi']
+PRODUCT_WIDTHS = [6, 35, 15, 22, 8, 22, 22]
+PRODUCT_MONEY_COLUMNS = {4}
+
+STAFF_HEADERS = ['Sıra', 'Ad Soyad', 'Kullanıcı Adı', 'Email', 'Durum', 'Kayıt Tarihi', 'Son Giriş', 'Toplam Teklif']
+STAFF_WIDTHS = [6, 25, 18, 28, 10, 15, 20, 14]
+STAFF_STATUS_COLORS = {True: '155724', False: '721C24'}
+
+
+# ---------------------------------------------------------
+# STİLLER (workbook başına bir kez)
+# ---------------------------------------------------------
+def _register_styles(wb):
+    """Named style'ları workbook'a ekler; satır stilleri çift/tek satır için ikişer adet"""
+    center = Alignment(horizontal='center', vertical='center')
+
+    def add(name, font, fill=None, alignment=center, number_format=None):
+        style = NamedStyle(name=name, font=font, alignment=alignment)
+        if fill:
+            style.fill = fill
+        if number_format:
+            style.number_format = number_format
+        wb.add_named_style(style)
+
+    add('title', Font(name='Arial', bold=True, size=14, color='FFFFFF'), PatternFill('solid', start_color='1A3A6B'))
+    add('subtitle', Font(name='Arial', size=10, color='666666'), alignment=Alignment(horizontal='center'))
+    add('header', Font(name='Arial', bold=True, color='FFFFFF', size=11), PatternFill('solid', start_color='2F6FED'),
+        Alignment(horizontal='center', vertical='center', wrap_text=True))
+    add('total', Font(name='Arial', bold=True, color='FFFFFF'), PatternFill('solid', start_color='2F6FED'))
+    add('total_money', Font(name='Arial', bold=True, color='FFFFFF'), PatternFill('solid', start_color='2F6FED'),
+        number_format=MONEY_FORMAT)
+
+    for suffix, color in (('even', 'F8F9FA'), ('odd', 'FFFFFF')):
+        fill = PatternFill('solid', start_color=color)
+        add(f'cell_{suffix}', Font(name='Arial', size=10), fill)
+        add(f'money_{suffix}', Font(name='Arial', size=10), fill, number_format=MONEY_FORMAT)
+        for font_color in sorted(set(STATUS_COLORS.values()) | set(STAFF_STATUS_COLORS.values())):
+            add(f'status_{font_color}_{suffix}', Font(name='Arial', size=10, bold=True, color=font_color), fill)
+
+
+class _RowWriter:
+    """Write-only sheet'e stil adlarıyla satır yazar, satır numarasını takip eder"""
+
+    def __init__(self, ws, money_columns, widths):
+        self.ws = ws
+        self.money_columns = money_columns
+        self.row = 0
+        for i, width in enumerate(widths, 1):
+            ws.column_dimensions[get_column_letter(i)].width = width
+
+    def append(self, values, style=None, styles=None, height=None):
+        self.row += 1
+        if height:
+            self.ws.row_dimensions[self.row].height = height
+        cells = []
+        for col, value in enumerate(values, 1):
+            cell = WriteOnlyCell(self.ws, value=value)
+            cell_style = styles.get(col) if styles else None
+            cell_style = cell_style or style
+            if cell_style:
+                cell.style = cell_style
+            cells.append(cell)
+        self.ws.append(cells)
+
+    def title(self, text, column_count, style='title', height=None):
+        self.append([text] + [None] * (column_count - 1), style=style, height=height)
+        self.ws.merged_cells.add(f'A{self.row}:{get_column_letter(column_count)}{self.row}')
+
+    def data_styles(self):
+        """Sıradaki veri satırının (çift/tek) stil eki ve para kolonu stilleri"""
+        suffix = 'even' if (self.row + 1) % 2 == 0 else 'odd'
+        styles = {col: f'money_{suffix}' for col in self.money_columns}
+        return suffix, styles
+
+
+# ---------------------------------------------------------
+# VERİ
+# ---------------------------------------------------------
+def iter_offer_chunks(offers, chunk_size=CHUNK_SIZE, with_items=False):
+    """
+    Teklifleri parça parça döndürür: kullanıcı join'li tek sorgu (iterator),
+    her parça için NumPy toplu toplam hesabı ve istenirse kalemler + ürünler
+    prefetch'i (export_data, parça başına sabit sorgu).
+
+    Yields: (teklif listesi, BulkOfferTotals)
+    """
+    from .bulk_totals import BulkOfferTotals
+
+    chunk = []
+    for offer in offers.select_related('user').iterator(chunk_size=chunk_size):
+        chunk.append(offer)
+        if len(chunk) >= chunk_size:
+            yield _load_chunk(chunk, with_items, BulkOfferTotals)
+            chunk = []
+    if chunk:
+        yield _load_chunk(chunk, with_items, BulkOfferTotals)
+
+
+def _load_chunk(chunk, with_items, bulk_totals_class):
+    if with_items:
+        prefetch_offer_items(chunk)
+    return chunk, bulk_totals_class([offer.id for offer in chunk])
+
+
+def _offer_number(offer):
+    return f"#{offer.original_offer_id or offer.id}"
+
+
+# ---------------------------------------------------------
+# WORKBOOK
+# ---------------------------------------------------------
+def write_offers_workbook(offers, company_name, output, chunk_size=CHUNK_SIZE):
+    """
+    Teklif özeti + ürün detayları sayfalarını output'a yazar.
+
+    Args:
+        offers: Offer queryset'i (sıralı)
+        company_name: Başlıkta gösterilecek firma adı
+        output: Yazılabilir dosya nesnesi
+    """
+    wb = Workbook(write_only=True)
+    _register_styles(wb)
+    exported_at = timezone.now().strftime('%d.%m.%Y %H:%M')
+
+    # ========================
+    # SAYFA 1: TEKLİF ÖZETİ
+    # ========================
+    summary = _RowWriter(wb.create_sheet("Teklif Özeti"), SUMMARY_MONEY_COLUMNS, SUMMARY_WIDTHS)
+    summary.title(f"TEKLİF RAPORU - {company_name}", len(SUMMARY_HEADERS), height=35)
+    summary.title(f"Dışa Aktarma Tarihi: {exported_at}", len(SUMMARY_HEADERS), style='subtitle', height=20)
+    summary.append([], height=10)
+    summary.append(SUMMARY_HEADERS, style='header', height=30)
+    first_data_row = summary.row + 1
+
+    for chunk, totals in iter_offer_chunks(offers, chunk_size):
+        for offer in chunk:
+            values = totals.offer_values(offer.id)
+            decided_at = offer.approved_at or offer.rejected_at
+            status = STATUS_LABELS.get(offer.status, offer.status)
+            suffix, styles = summary.data_styles()
+            if status in STATUS_COLORS:
+                styles[4] = f'status_{STATUS_COLORS[status]}_{suffix}'
+            summary.append([
+                _offer_number(offer),
+                f"Rev.{offer.revision_number}" if offer.revision_number > 1 else "-",
+                offer.user.get_full_name() or offer.user.username,
+                status,
+                offer.sent_at.strftime('%d.%m.%Y %H:%M') if offer.sent_at else '-',
+                decided_at.strftime('%d.%m.%Y %H:%M') if decided_at else '-',
+                values['item_count'],
+                values['items_net_after_item_discounts'],
+                values['items_vat_after_item_discounts'],
+                values['final_total'],
+                offer.reject_reason or '-',
+            ], style=f'cell_{suffix}', styles=styles)
+
+    # Toplam satırı
+    last_data_row = summary.row
+    total_styles = {col: 'total_money' for col in SUMMARY_MONEY_COLUMNS}
+    summary.append(
+        ['TOPLAM', None, None, None, None, None]
+        + [f'=SUM({letter}{first_data_row}:{letter}{last_data_row})' for letter in 'GHIJ']
+        + [None],
+        style='total', styles=total_styles,
+    )
+
+    # ========================
+    # SAYFA 2: ÜRÜN DETAYLARI
+    # ========================
+    items = _RowWriter(wb.create_sheet("Ürün Detayları"), ITEM_MONEY_COLUMNS, ITEM_WIDTHS)
+    items.title(f"ÜRÜN DETAY RAPORU - {company_name}", len(ITEM_HEADERS), height=35)
+    items.append(ITEM_HEADERS, style='header', height=30)
+
+    for chunk, totals in iter_offer_chunks(offers, chunk_size, with_items=True):
+        for offer in chunk:
+            offer_number = _offer_number(offer)
+            staff = offer.user.get_full_name() or offer.user.username
+            status = STATUS_LABELS.get(offer.status, offer.status)
+            sent_at = offer.sent_at.strftime('%d.%m.%Y') if offer.sent_at else '-'
+            for item in offer.items.all():
+                line = totals.line_values(item.id)
+                suffix, styles = items.data_styles()
+                items.append([
+                    offer_number,
+                    staff,
+                    status,
+                    sent_at,
+                    item.product.name,
+                    item.product.barcode or '-',
+                    item.quantity,
+                    float(item.unit_price),
+                    item.vat_rate,
+                    DISCOUNT_LABELS.get(item.discount_type, '-'),
+                    float(item.discount_value),
+                    line['discount_amount'],
+                    line['line_subtotal'],
+                    line['vat_amount'],
+                    line['total_price'],
+                ], style=f'cell_{suffix}', styles=styles)
+
+    wb.save(output)
+
+
+def write_products_workbook(products, output, chunk_size=CHUNK_SIZE):
+    """Ürün listesi sayfasını output'a yazar (products: sıralı Product queryset'i)"""
+    wb = Workbook(write_only=True)
+    _register_styles(wb)
+    exported_at = timezone.now().strftime('%d.%m.%Y %H:%M')
+
+    sheet = _RowWriter(wb.create_sheet("Ürün Listesi"), PRODUCT_MONEY_COLUMNS, PRODUCT_WIDTHS)
+    sheet.title("ÜRÜN LİSTESİ", len(PRODUCT_HEADERS), height=35)
+    sheet.title(f"Dışa Aktarma Tarihi: {exported_at} | Toplam: {products.count()} ürün",
+                len(PRODUCT_HEADERS), style='subtitle')
+    sheet.append(PRODUCT_HEADERS, style='header', height=30)
+
+    rows = products.values_list('name', 'barcode', 'price', 'vat_rate', 'price_updated_at', 'created_at')
+    for index, (name, barcode, price, vat_rate, price_updated_at, created_at) in enumerate(
+            rows.iterator(chunk_size=chunk_size), 1):
+        suffix, styles = sheet.data_styles()
+        sheet.append([
+            index,
+            name,
+            barcode or '-',
+            float(price),
+            vat_rate,
+            price_updated_at.strftime('%d.%m.%Y %H:%M') if price_updated_at else '-',
+            created_at.strftime('%d.%m.%Y %H:%M') if created_at else '-',
+        ], style=f'cell_{suffix}', styles=styles)
+
+    wb.save(output)
+
+
+def write_staff_workbook(staff, owner_name, output):
+    """
+    Personel listesi sayfasını output'a yazar.
+
+    Args:
+        staff: export_data.export_staff ile offer_count eklenmiş, sıralı queryset
+        owner_name: Başlıkta gösterilecek yönetici adı
+        output: Yazılabilir dosya nesnesi
+    """
+    staff = list(staff)
+    wb = Workbook(write_only=True)
+    _register_styles(wb)
+    exported_at = timezone.now().strftime('%d.%m.%Y %H:%M')
+
+    sheet = _RowWriter(wb.create_sheet("Personel Listesi"), set(), STAFF_WIDTHS)
+    sheet.title(f"PERSONEL LİSTESİ - {owner_name}", len(STAFF_HEADERS), height=35)
+    sheet.title(f"Dışa Aktarma Tarihi: {exported_at} | Toplam: {len(staff)} personel",
+                len(STAFF_HEADERS), style='subtitle')
+    sheet.append(STAFF_HEADERS, style='header', height=30)
+
+    for index, member in enumerate(staff, 1):
+        suffix, styles = sheet.data_styles()
+        styles[5] = f'status_{STAFF_STATUS_COLORS[bool(member.is_active_user)]}_{suffix}'
+        sheet.append([
+            index,
+            member.get_full_name() or member.username,
+            member.username,
+            member.email,
+            'Aktif' if member.is_active_user else 'Pasif',
+            member.date_joined.strftime('%d.%m.%Y') if member.date_joined else '-',
+            member.last_login.strftime('%d.%m.%Y %H:%M') if member.last_login else 'Hiç giriş yapmadı',
+            member.offer_count,
+        ], style=f'cell_{suffix}', styles=styles)
+
+    wb.save(output)
+
+
+def workbook_file(write, *args):
+    """write(*args, output) ile workbook'u spooled temp dosyaya yazar, başa sarılmış dosyayı döndürür"""
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    write(*args, output)
+    output.seek(0)
+    return output
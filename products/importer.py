@@ -0,0 +1,505 @@
+"""
+Ürün Kataloğu İçe Aktarma
+
+Excel dosyası read-only modda satır satır okunur; satırlar parça parça
+(chunk) doğrulanıp normalize edilir ve mevcut katalogla bellekte
+karşılaştırılır. Eşleşme önce barkod, sonra normalize ad (search.py) ile
+yapılır. Değişiklikler parça başına tek transaction içinde
+bulk_create(update_conflicts=True) ile toplu yazılır.
+
+Plan (oluşturulacak / güncellenecek satırlar) sade dict'lerden oluşur;
+böylece önizleme için JSON olarak saklanıp dosya yeniden okunmadan
+uygulanabilir.
+"""
+import json
+import os
+import re
+import secrets
+import time
+from decimal import Decimal, InvalidOperation
+
+import openpyxl
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import search
+from .catalog import bump_catalog_version, get_catalog_version
+from .models import Product
+
+CHUNK_SIZE = 1000
+DEFAULT_VAT_RATE = 10
+MAX_PRICE = Decimal("99999999.99")
+
+# Eczane şablonu: Ürün Adı | Barkod | Birim Fiyat | KDV %
+POSITIONAL_COLUMNS = ("name", "barcode", "price", "vat_rate")
+
+# Başlık satırındaki olası kolon adları
+HEADER_ALIASES = {
+    "name": "name", "ürün adı": "name", "urun adi": "name", "ad": "name",
+    "barcode": "barcode", "barkod": "barcode",
+    "price": "price", "fiyat": "price", "birim fiyat": "price",
+    "vat_rate": "vat_rate", "kdv": "vat_rate", "kdv %": "vat_rate", "kdv oranı": "vat_rate",
+}
+
+
+class ImportFormatError(Exception):
+    """Dosya bütünüyle okunamıyor (eksik kolon, bozuk dosya)"""
+
+
+class StalePreviewError(Exception):
+    """Önizlemeden sonra katalog değişti; plan eski fiyatlar üzerine kurulu"""
+
+
+# ---------------------------------------------------------
+# OKUMA
+# ---------------------------------------------------------
+def read_rows(file, required=("name",)):
+    """
+    Excel'i read-only açar, (satır no, {kolon: değer}) üretir.
+
+    Başlık satırı tanınan kolon adları içeriyorsa kolonlar başlığa göre,
+    aksi halde eczane şablonundaki sıraya göre eşlenir.
+    """
+    try:
+        wb = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFormatError(f"Excel dosyası açılamadı: {e}")
+
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        mapping = {}
+        for index, title in enumerate(header):
+            key = HEADER_ALIASES.get(str(title or "").strip().lower())
+            if key and key not in mapping:
+                mapping[key] = index
+        if "name" not in mapping:
+            mapping = {key: index for index, key in enumerate(POSITIONAL_COLUMNS)}
+
+        missing = set(required) - set(mapping)
+        if missing:
+            raise ImportFormatError(f"Excel sütunları eksik. Zorunlu sütunlar: {', '.join(sorted(required))}")
+
+        for row_number, values in enumerate(rows, 2):
+            yield row_number, {
+                key: values[index] if index < len(values) else None
+                for key, index in mapping.items()
+            }
+    finally:
+        wb.close()
+
+
+def is_blank(value):
+    return value is None or str(value).strip() == ""
+
+
+def parse_row(values, uppercase_names=True):
+    """
+    Ham satırı doğrular ve normalize eder. uppercase_names False ise ad
+    dosyadaki gibi saklanır (admin); eşleşme her durumda normalize ad ile yapılır.
+    Returns: (name, barcode, price, vat_rate); hatada ValueError (mesajlı).
+    Boş fiyat / KDV None döner: yeni üründe varsayılan kullanılır, mevcut
+    üründe eski değer korunur (bkz. plan_chunk).
+    """
+    name = str(values.get("name") or "").strip()
+    if uppercase_names:
+        name = name.upper()
+    if not name:
+        raise ValueError("Ürün adı boş.")
+    if len(name) > Product._meta.get_field("name").max_length:
+        raise ValueError("Ürün adı çok uzun.")
+
+    barcode = values.get("barcode")
+    if isinstance(barcode, float) and barcode.is_integer():
+        barcode = int(barcode)  # Excel sayısal hücre: 8.69e12 → "8690..."
+    barcode = str(barcode).strip() if barcode not in (None, "") else ""
+    if len(barcode) > Product._meta.get_field("barcode").max_length:
+        raise ValueError("Barkod çok uzun.")
+
+    raw_price = values.get("price")
+    try:
+        price = None
+        if not is_blank(raw_price):
+            price = Decimal(str(raw_price).replace(",", ".")).quantize(Decimal("0.01"))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Geçersiz fiyat: {raw_price}")
+    if price is not None and not (0 <= price <= MAX_PRICE):
+        raise ValueError(f"Fiyat aralık dışında: {price}")
+
+    raw_vat = values.get("vat_rate")
+    try:
+        vat_rate = int(float(str(raw_vat).replace(",", "."))) if not is_blank(raw_vat) else None
+    except ValueError:
+        raise ValueError(f"Geçersiz KDV oranı: {raw_vat}")
+    if vat_rate is not None and not 0 <= vat_rate <= 100:
+        raise ValueError(f"KDV oranı aralık dışında: {vat_rate}")
+
+    return name, barcode, price, vat_rate
+
+
+def chunked(iterable, size=CHUNK_SIZE):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ---------------------------------------------------------
+# KATALOG & PLAN
+# ---------------------------------------------------------
+class CatalogSnapshot:
+    """
+    Mevcut katalog, tek sorguda belleğe alınır: barkod → kayıt,
+    normalize ad → kayıt. Kayıt: [id, name, barcode, price, vat_rate]
+    """
+
+    def __init__(self):
+        self.by_barcode = {}
+        self.by_name = {}
+        rows = Product.objects.values_list("id", "name", "barcode", "price", "vat_rate")
+        for row in rows.iterator(chunk_size=5000):
+            self.add(list(row))
+
+    def add(self, record):
+        if record[2]:
+            self.by_barcode[record[2]] = record
+        self.by_name[search.normalize_search_text(record[1])] = record
+
+    def match(self, name, barcode):
+        if barcode and barcode in self.by_barcode:
+            return self.by_barcode[barcode]
+        return self.by_name.get(search.normalize_search_text(name))
+
+
+class ImportReport:
+    """İçe aktarma sonucu: sayılar ve satır bazlı hata listesi"""
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.errors = []  # [{"row": 5, "error": "..."}]
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def error(self, row_number, message):
+        self.errors.append({"row": row_number, "error": message})
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    @property
+    def summary(self):
+        return (
+            f"Yeni: {self.created}, Güncellenen: {self.updated}, "
+            f"Değişmeyen: {self.unchanged}, Hatalı: {len(self.errors)} "
+            f"({self.elapsed:.1f} sn)"
+        )
+
+
+def plan_chunk(raw_rows, snapshot, report, seen, uppercase_names=True):
+    """
+    Bir parça satırı katalogla karşılaştırır.
+
+    Returns: (creates, updates) — JSON'a yazılabilir dict listeleri.
+    Değişmeyen ve hatalı satırlar report'a işlenir; seen, dosyada daha
+    önce geçen ürünleri (normalize ad / barkod → satır no) tutar.
+    """
+    creates = []
+    updates = []
+    for row_number, values in raw_rows:
+        if not any(value not in (None, "") for value in values.values()):
+            continue  # boş satır
+        try:
+            name, barcode, price, vat_rate = parse_row(values, uppercase_names)
+        except ValueError as e:
+            report.error(row_number, str(e))
+            continue
+
+        key = search.normalize_search_text(name)
+        previous = seen.get(("barcode", barcode)) if barcode else None
+        previous = previous or seen.get(("name", key))
+        if previous:
+            report.error(row_number, f"Aynı ürün dosyada {previous}. satırda da var, atlandı.")
+            continue
+        seen[("name", key)] = row_number
+        if barcode:
+            seen[("barcode", barcode)] = row_number
+
+        existing = snapshot.match(name, barcode)
+        if existing is None:
+            creates.append({
+                "row": row_number, "name": name, "barcode": barcode,
+                "price": str(Decimal("0.00") if price is None else price),
+                "vat_rate": DEFAULT_VAT_RATE if vat_rate is None else vat_rate,
+            })
+            continue
+
+        product_id, _, old_barcode, old_price, old_vat_rate = existing
+        # Boş hücre mevcut değeri silmez
+        if price is None:
+            price = old_price
+        if vat_rate is None:
+            vat_rate = old_vat_rate
+        matched_by = "barcode" if barcode and barcode == old_barcode else "name"
+        # Barkodu olmayan mevcut ürüne dosyadaki barkod yazılır; ad değiştirilmez
+        new_barcode = old_barcode or barcode
+        if old_price == price and old_vat_rate == vat_rate and (old_barcode or "") == (new_barcode or ""):
+            report.unchanged += 1
+            continue
+        updates.append({
+            "row": row_number, "id": product_id, "name": existing[1],
+            "barcode": new_barcode, "price": str(price), "vat_rate": vat_rate,
+            "old_barcode": old_barcode or "", "old_price": str(old_price), "old_vat_rate": old_vat_rate,
+            "file_barcode": barcode, "matched_by": matched_by,
+        })
+    return creates, updates
+
+
+# ---------------------------------------------------------
+# UYGULAMA
+# ---------------------------------------------------------
+def price_changed(row):
+    """Güncelleme satırı fiyatı ya da KDV'yi değiştiriyor mu (sadece barkod değişimi değil)"""
+    return Decimal(row["price"]) != Decimal(row["old_price"]) or row["vat_rate"] != row["old_vat_rate"]
+
+
+def apply_changes(creates, updates, snapshot=None):
+    """
+    Planı tek transaction içinde toplu yazar ve arama indeksini günceller.
+
+    Yeni ve güncellenen ürünler INSERT ... ON CONFLICT(name) DO UPDATE ile
+    yazılır: güncellenen satırlar mevcut adıyla gider, çakışmada fiyat /
+    KDV / barkod güncellenir (bulk_update'in CASE WHEN sorgusundan çok daha hızlı).
+    price_updated_at sadece fiyatı ya da KDV'si değişen satırlarda yenilenir;
+    yalnız barkodu değişenler ayrı sorguyla, tarihe dokunmadan yazılır.
+
+    Returns: (oluşturulan, güncellenen) sayıları
+    """
+    now = timezone.now()
+
+    def build(rows):
+        return [
+            Product(name=row["name"], barcode=row["barcode"] or None,
+                    price=Decimal(row["price"]), vat_rate=row["vat_rate"], price_updated_at=now)
+            for row in rows
+        ]
+
+    priced = build(list(creates) + [row for row in updates if price_changed(row)])
+    barcode_only = build([row for row in updates if not price_changed(row)])
+    products = priced + barcode_only
+    with transaction.atomic():
+        for batch, update_fields in (
+            (priced, ["barcode", "price", "vat_rate", "price_updated_at"]),
+            (barcode_only, ["barcode"]),
+        ):
+            if batch:
+                Product.objects.bulk_create(
+                    batch,
+                    update_conflicts=True,
+                    unique_fields=["name"],
+                    update_fields=update_fields,
+                )
+        if products:
+            missing = [p.name for p in products if p.pk is None]
+            if missing:
+                ids = dict(Product.objects.filter(name__in=missing).values_list("name", "id"))
+                for product in products:
+                    if product.pk is None:
+                        product.pk = ids.get(product.name)
+            search.index_products(products)
+
+    if snapshot is not None:
+        for product in products:
+            snapshot.add([product.pk, product.name, product.barcode, product.price, product.vat_rate])
+    return len(creates), len(updates)
+
+
+def import_products(file, chunk_size=CHUNK_SIZE, required=("name",), uppercase_names=True):
+    """
+    Dosyayı akış halinde okuyup parça parça içe aktarır. Eczane ekranı
+    adları büyük harfe çevirir; admin yüklemesi adı dosyadaki gibi bırakır.
+    Returns: ImportReport. Dosya açılamazsa ImportFormatError.
+    """
+    report = ImportReport()
+    snapshot = CatalogSnapshot()
+    seen = {}
+    try:
+        for raw_rows in chunked(read_rows(file, required), chunk_size):
+            creates, updates = plan_chunk(raw_rows, snapshot, report, seen, uppercase_names)
+            created, updated = apply_changes(creates, updates, snapshot)
+            report.created += created
+            report.updated += updated
+    finally:
+        if report.created or report.updated:
+            # Toplu işlemler sinyal tetiklemez: süreç içi indeksleri yenile
+            bump_catalog_version()
+    return report.finish()
+
+
+# ---------------------------------------------------------
+# ÖNİZLEME (DRY-RUN)
+# ---------------------------------------------------------
+PREVIEW_DIR = "import_previews"
+PREVIEW_TOKEN = re.compile(r"^[0-9a-f]{32}$")
+PREVIEW_MAX_AGE_HOURS = 24
+
+PREVIEW_TABS = (
+    ("new", "Yeni Ürünler"),
+    ("increase", "Fiyat Artışı"),
+    ("decrease", "Fiyat Düşüşü"),
+    ("vat", "KDV Değişikliği"),
+    ("unmatched_barcode", "Eşleşmeyen Barkod"),
+    ("errors", "Hatalı Satırlar"),
+)
+
+
+def build_preview(file, chunk_size=CHUNK_SIZE):
+    """
+    Dosyayı okuyup katalogla karşılaştırır, hiçbir şey yazmaz.
+    Plan, karşılaştırmanın yapıldığı katalog versiyonunu taşır (bkz. commit_preview).
+    Returns: JSON'a yazılabilir plan dict'i
+    """
+    report = ImportReport()
+    # Snapshot'tan önce okunur: okuma sırasında gelen değişiklik de planı eskitir
+    catalog_version = get_catalog_version()
+    snapshot = CatalogSnapshot()
+    seen = {}
+    creates = []
+    updates = []
+    for raw_rows in chunked(read_rows(file), chunk_size):
+        chunk_creates, chunk_updates = plan_chunk(raw_rows, snapshot, report, seen)
+        creates.extend(chunk_creates)
+        updates.extend(chunk_updates)
+    report.finish()
+    return {
+        "catalog_version": catalog_version,
+        "creates": creates,
+        "updates": updates,
+        "unchanged": report.unchanged,
+        "errors": report.errors,
+        "elapsed": report.elapsed,
+    }
+
+
+def preview_categories(plan):
+    """Plan satırlarını önizleme sekmelerine ayırır (fiyat değişimi % ile)"""
+    categories = {key: [] for key, _ in PREVIEW_TABS}
+    categories["new"] = plan["creates"]
+    categories["errors"] = plan["errors"]
+    for row in plan["creates"]:
+        if row["barcode"]:
+            categories["unmatched_barcode"].append(row)
+    for row in plan["updates"]:
+        old_price = Decimal(row["old_price"])
+        new_price = Decimal(row["price"])
+        if old_price != new_price:
+            row["change"] = str(new_price - old_price)
+            row["change_percent"] = (
+                f"{(new_price - old_price) / old_price * 100:+.1f}" if old_price else None
+            )
+            categories["increase" if new_price > old_price else "decrease"].append(row)
+        if row["old_vat_rate"] != row["vat_rate"]:
+            categories["vat"].append(row)
+        if row["file_barcode"] and row["matched_by"] == "name" and row["file_barcode"] != row["old_barcode"]:
+            categories["unmatched_barcode"].append(row)
+    return categories
+
+
+def _preview_path(token):
+    if not PREVIEW_TOKEN.match(token or ""):
+        return None
+    return os.path.join(settings.MEDIA_ROOT, PREVIEW_DIR, f"{token}.json")
+
+
+def save_preview(plan):
+    """Planı MEDIA_ROOT altına yazar, erişim token'ını döndürür"""
+    purge_stale_previews()
+    token = secrets.token_hex(16)
+    path = _preview_path(token)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(plan, f, ensure_ascii=False)
+    return token
+
+
+def load_preview(token):
+    path = _preview_path(token)
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def delete_preview(token):
+    path = _preview_path(token)
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+def purge_stale_previews(max_age_hours=None):
+    """
+    Onaylanmadan / iptal edilmeden bırakılmış (oturumu kapanmış) önizleme
+    dosyalarını siler. Her yeni önizlemede ve purge_import_previews
+    komutuyla çalışır.
+
+    Args:
+        max_age_hours: Bu kadar saatten eski dosyalar silinir
+            (varsayılan IMPORT_PREVIEW_MAX_AGE_HOURS)
+
+    Returns:
+        Silinen dosya sayısı
+    """
+    if max_age_hours is None:
+        max_age_hours = getattr(settings, "IMPORT_PREVIEW_MAX_AGE_HOURS", PREVIEW_MAX_AGE_HOURS)
+    directory = os.path.join(settings.MEDIA_ROOT, PREVIEW_DIR)
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        if not PREVIEW_TOKEN.match(entry.name.removesuffix(".json")):
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:  # Aynı anda başka istek sildi
+            pass
+    return removed
+
+
+def commit_preview(plan, chunk_size=CHUNK_SIZE):
+    """
+    Önizlenen planı dosyayı yeniden okumadan toplu uygular.
+
+    Önizlemeden sonra katalog değiştiyse (fiyat, KDV, ad güncellemesi, başka
+    içe aktarma) plan eski değerleri yazar, yeniden adlandırılmış ürünü tekrar
+    oluşturur: bu durumda hiçbir şey yazılmaz, StalePreviewError yükselir.
+    Kontrol ve yazma tek transaction içinde, versiyon satırı kilitliyken yapılır.
+
+    Returns: ImportReport
+    """
+    report = ImportReport()
+    report.unchanged = plan["unchanged"]
+    report.errors = plan["errors"]
+    with transaction.atomic():
+        if get_catalog_version(for_update=True) != plan.get("catalog_version"):
+            raise StalePreviewError(
+                "Önizlemeden sonra ürün kataloğu değişti. Lütfen dosyayı tekrar yükleyip önizleyin."
+            )
+        for creates in chunked(plan["creates"], chunk_size):
+            report.created += apply_changes(creates, [])[0]
+        for updates in chunked(plan["updates"], chunk_size):
+            report.updated += apply_changes([], updates)[1]
+        if report.created or report.updated:
+            bump_catalog_version()
+    return report.finish()
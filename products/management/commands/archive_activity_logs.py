@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from products.activity_archive import BATCH_SIZE, DEFAULT_HOT_MONTHS, archive_activity_logs
+
+
+class Command(BaseCommand):
+    help = "Eski ayların aktivite loglarını sıkıştırılmış JSONL arşive taşır (cron için)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hot-months", type=int,
+                            default=getattr(settings, "ACTIVITY_LOG_HOT_MONTHS", DEFAULT_HOT_MONTHS),
+                            help="Tabloda kalacak ay sayısı (varsayılan ACTIVITY_LOG_HOT_MONTHS)")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                            help=f"Okuma / silme partisi (varsayılan {BATCH_SIZE})")
+
+    def handle(self, *args, **options):
+        moved = [
+            (month, count)
+            for month, count in archive_activity_logs(options["hot_months"], max(options["batch_size"], 1))
+            if count
+        ]
+        for month, count in moved:
+            self.stdout.write(f"{month:%Y-%m}: {count} kayıt arşive taşındı.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Toplam {sum(count for _, count in moved)} kayıt, {len(moved)} ay."
+        ))
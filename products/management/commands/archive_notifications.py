@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from products.notification_retention import (
+    BATCH_SIZE,
+    DIGEST_MIN_COUNT,
+    archive_read_notifications,
+    collapse_digests,
+)
+
+
+class Command(BaseCommand):
+    help = "Tekrarlanan bildirimleri özet satırlarda toplar, eski okunmuş bildirimleri arşive taşır (cron için)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=getattr(settings, "NOTIFICATION_ARCHIVE_DAYS", 30),
+                            help="Bu kadar günden eski okunmuş bildirimler arşivlenir (varsayılan NOTIFICATION_ARCHIVE_DAYS)")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                            help=f"Transaction başına satır sayısı (varsayılan {BATCH_SIZE})")
+        parser.add_argument("--pause", type=float, default=0.0,
+                            help="Partiler arası bekleme, saniye (varsayılan 0)")
+        parser.add_argument("--digest-min", type=int, default=DIGEST_MIN_COUNT,
+                            help=f"Özete toplanacak en az tekrar sayısı (varsayılan {DIGEST_MIN_COUNT})")
+        parser.add_argument("--no-digest", action="store_true",
+                            help="Özet adımını atla, sadece arşivle")
+
+    def handle(self, *args, **options):
+        batch_size = max(options["batch_size"], 1)
+
+        if not options["no_digest"]:
+            collapsed = collapse_digests(max(options["digest_min"], 2), batch_size)
+            self.stdout.write(f"{collapsed} bildirim özet satırlarda toplandı.")
+
+        archived = archive_read_notifications(max(options["days"], 0), batch_size, options["pause"])
+        self.stdout.write(self.style.SUCCESS(f"{archived} okunmuş bildirim arşive taşındı."))
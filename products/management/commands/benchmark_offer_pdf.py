@@ -0,0 +1,72 @@
+import io
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import User
+from products.export_data import export_offers
+from products.models import Offer, OfferItem, Product
+from products.offer_pdf import FONT, render_offer_pdf
+
+PRODUCT_NAMES = (
+    "Parol 500 mg Tablet",
+    "İbuprofen Şurup 100 ml",
+    "Çinko Takviyesi Ğ-Plus",
+    "Gözlük Temizleme Mendili",
+    "Öksürük Pastili Ihlamur",
+)
+
+
+class Command(BaseCommand):
+    help = "Teklif PDF üretim süresini ölçer (geçici teklif oluşturur, sonunda geri alır)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lines", type=int, nargs="+", default=[10, 100, 1000],
+                            help="Ölçülecek kalem sayıları (varsayılan 10 100 1000)")
+        parser.add_argument("--repeat", type=int, default=3,
+                            help="Her boyut için tekrar sayısı (varsayılan 3)")
+
+    def handle(self, *args, **options):
+        repeat = max(options["repeat"], 1)
+        self.stdout.write(f"Yazı tipi: {FONT}")
+        self.stdout.write(f"{'Kalem':>7} {'En iyi (ms)':>12} {'Ortalama (ms)':>14} {'ms/kalem':>9} {'Boyut (KB)':>11}")
+
+        with transaction.atomic():
+            user = User.objects.create_user(
+                username="pdf_benchmark", password=None, role="firma", is_manager=True,
+                company_name="Örnek Ecza Deposu Şti.",
+            )
+            products = [
+                Product.objects.create(name=f"{name} #{i}", price=Decimal("12.50") + i, vat_rate=10)
+                for i, name in enumerate(PRODUCT_NAMES)
+            ]
+
+            for line_count in options["lines"]:
+                offer = Offer.objects.create(user=user, status="sent")
+                for i in range(line_count):
+                    product = products[i % len(products)]
+                    OfferItem(
+                        offer=offer, product=product, quantity=i % 7 + 1,
+                        unit_price=product.price, vat_rate=product.vat_rate,
+                        discount_type="percent" if i % 3 == 0 else "none", discount_value=5,
+                    ).save(update_totals=False)
+                offer.refresh_totals()
+
+                timings = []
+                for _ in range(repeat):
+                    loaded = export_offers(Offer.objects.filter(id=offer.id)).get()
+                    output = io.BytesIO()
+                    started = time.perf_counter()
+                    render_offer_pdf(loaded, output)
+                    timings.append((time.perf_counter() - started) * 1000)
+
+                best = min(timings)
+                self.stdout.write(
+                    f"{line_count:>7} {best:>12.1f} {sum(timings) / len(timings):>14.1f} "
+                    f"{best / line_count:>9.2f} {len(output.getvalue()) / 1024:>11.1f}"
+                )
+
+            # Ölçüm verisi kalıcı olmasın
+            transaction.set_rollback(True)
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from products.importer import PREVIEW_MAX_AGE_HOURS, purge_stale_previews
+
+
+class Command(BaseCommand):
+    help = "Onaylanmadan bırakılmış eski Excel içe aktarma önizlemelerini siler (cron için)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=float,
+                            default=getattr(settings, "IMPORT_PREVIEW_MAX_AGE_HOURS", PREVIEW_MAX_AGE_HOURS),
+                            help="Bu kadar saatten eski önizlemeler silinir (varsayılan IMPORT_PREVIEW_MAX_AGE_HOURS)")
+
+    def handle(self, *args, **options):
+        removed = purge_stale_previews(max(options["hours"], 0))
+        self.stdout.write(self.style.SUCCESS(f"{removed} eski önizleme dosyası silindi."))
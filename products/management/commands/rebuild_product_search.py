@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from products.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Ürün arama indeksini (FTS5) tüm ürünlerden yeniden oluşturur"
+
+    def handle(self, *args, **options):
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"{count} ürün indekslendi."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from products.models import Offer
+
+
+class Command(BaseCommand):
+    help = "Tekliflerin saklanan toplam kolonlarını (net/KDV/brüt/son toplam) yeniden hesaplar"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--offer", type=int, action="append", dest="offer_ids",
+                            help="Sadece verilen teklif(ler)i hesapla")
+
+    def handle(self, *args, **options):
+        offers = Offer.objects.all().order_by("id")
+        if options["offer_ids"]:
+            offers = offers.filter(id__in=options["offer_ids"])
+
+        count = 0
+        for offer in offers.iterator(chunk_size=500):
+            offer.refresh_totals()
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"{count} teklifin toplamları güncellendi."))
@@ -0,0 +1,73 @@
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from products.export_jobs import expire_jobs, requeue_stale_jobs, run_pending_jobs, worker_name
+
+MAINTENANCE_INTERVAL = 60  # saniye
+
+
+def maintenance():
+    """Süresi dolan dosyaları sil, ölü worker'ların işlerini yeniden kuyruğa al"""
+    expired = expire_jobs()
+    requeued, failed = requeue_stale_jobs()
+    return expired, requeued, failed
+
+
+def worker_loop(interval, once):
+    """Tek worker süreci: bekleyen işleri çalıştırır, kuyruk boşsa interval kadar bekler"""
+    name = worker_name()
+    last_maintenance = time.monotonic()
+    while True:
+        run_pending_jobs(name)
+        if once:
+            return
+        if time.monotonic() - last_maintenance >= MAINTENANCE_INTERVAL:
+            maintenance()
+            last_maintenance = time.monotonic()
+        time.sleep(interval)
+
+
+class Command(BaseCommand):
+    help = "Kuyruktaki export işlerini (ExportJob) çalıştırır; --processes ile birden çok süreç açar"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=1,
+                            help="Paralel worker süreci sayısı (varsayılan 1)")
+        parser.add_argument("--interval", type=float, default=2.0,
+                            help="Kuyruk boşken bekleme süresi, saniye (varsayılan 2)")
+        parser.add_argument("--once", action="store_true",
+                            help="Bekleyen işleri çalıştırıp çık (cron için)")
+
+    def handle(self, *args, **options):
+        processes = max(options["processes"], 1)
+        interval = options["interval"]
+        once = options["once"]
+
+        expired, requeued, failed = maintenance()
+        if expired or requeued or failed:
+            self.stdout.write(f"{expired} dosya silindi, {requeued} iş yeniden kuyruğa alındı, {failed} iş başarısız.")
+
+        try:
+            if processes == 1:
+                worker_loop(interval, once)
+            else:
+                # Çocuk süreçler ebeveynin veritabanı bağlantısını paylaşmamalı
+                connections.close_all()
+                # daemon değil: toplu PDF işleri kendi süreç havuzunu açar
+                workers = [
+                    multiprocessing.Process(target=worker_loop, args=(interval, once))
+                    for _ in range(processes)
+                ]
+                for worker in workers:
+                    worker.start()
+                self.stdout.write(self.style.SUCCESS(f"{processes} export worker'ı başlatıldı."))
+                for worker in workers:
+                    worker.join()
+        except KeyboardInterrupt:
+            self.stdout.write("Worker durduruldu.")
+            return
+
+        self.stdout.write(self.style.SUCCESS("Bekleyen export işleri tamamlandı."))
@@ -0,0 +1,43 @@
+# Generated by Django 6.0 on 2026-10-18 08:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0017_remove_offer_price_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='offer',
+            name='discount_total',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Ürün iskontoları + genel iskonto', max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='grand_total',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Son toplam (net + KDV)', max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='gross_total',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, help_text='İskontosuz KDV dahil toplam (50K eşiği bu alana bakar)', max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, help_text='Ürün satırı sayısı', verbose_name='Ürün Sayısı'),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='net_total',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Tüm iskontolar sonrası KDV hariç toplam', max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='vat_total',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Tüm iskontolar sonrası KDV toplamı', max_digits=14),
+        ),
+    ]
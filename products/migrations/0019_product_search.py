@@ -0,0 +1,52 @@
+# Generated by Django 6.0 on 2026-10-18 08:46
+
+import django.db.models.deletion
+import products.search
+from django.db import migrations, models
+
+
+def create_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS products_productsearch "
+        "USING fts5(name, barcode, tokenize='unicode61 remove_diacritics 2')"
+    )
+    Product = apps.get_model("products", "Product")
+    rows = [
+        (p.id, products.search.normalize_search_text(p.name), p.barcode or "")
+        for p in Product.objects.only("id", "name", "barcode").iterator()
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            "INSERT INTO products_productsearch (rowid, name, barcode) VALUES (%s, %s, %s)", rows
+        )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS products_productsearch")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0018_offer_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearch',
+            fields=[
+                ('product', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='products.product')),
+                ('name', products.search.SearchTextField()),
+                ('barcode', products.search.SearchTextField()),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'products_productsearch',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0 on 2026-10-18 09:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0019_product_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('offers', 'Teklif Listesi'), ('products', 'Ürün Listesi'), ('staff', 'Personel Listesi')], help_text='Export tipi', max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Sırada'), ('running', 'Hazırlanıyor'), ('done', 'Hazır'), ('failed', 'Başarısız'), ('expired', 'Süresi Doldu')], default='pending', help_text='İş durumu', max_length=20)),
+                ('dedup_key', models.CharField(help_text='Aynı isteği tekilleştirmek için anahtar (kullanıcı + tip)', max_length=64)),
+                ('file', models.FileField(blank=True, help_text='Üretilen dosya', upload_to='exports/')),
+                ('error', models.TextField(blank=True, help_text='Hata mesajı (başarısızsa)')),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='Çalıştırılma denemesi sayısı')),
+                ('worker', models.CharField(blank=True, help_text='İşi alan worker (host:pid)', max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Kuyruğa eklenme zamanı')),
+                ('started_at', models.DateTimeField(blank=True, help_text="Worker'ın işi aldığı zaman", null=True)),
+                ('finished_at', models.DateTimeField(blank=True, help_text='Bitiş zamanı', null=True)),
+                ('expires_at', models.DateTimeField(blank=True, help_text='Dosyanın silineceği zaman', null=True)),
+                ('user', models.ForeignKey(help_text='İşi isteyen kullanıcı', on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Export İşi',
+                'verbose_name_plural': 'Export İşleri',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='products_ex_status_7f615e_idx'), models.Index(fields=['user', '-created_at'], name='products_ex_user_id_d7d1dd_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ('pending', 'running'))), fields=('dedup_key',), name='unique_active_export_job')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0020_export_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='offer',
+            name='document_version',
+            field=models.PositiveIntegerField(default=1, help_text='Oluşturulan doküman versiyonu (değişiklikte artar)'),
+        ),
+    ]
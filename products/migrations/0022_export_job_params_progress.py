@@ -0,0 +1,38 @@
+# Generated by Django 6.0 on 2026-10-18 10:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0021_offer_document_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='params',
+            field=models.JSONField(blank=True, default=dict, help_text='Export filtreleri / seçenekleri (ör. toplu PDF için durum, tarih aralığı)'),
+        ),
+        migrations.AddField(
+            model_name='exportjob',
+            name='progress',
+            field=models.PositiveIntegerField(default=0, help_text='İşlenen kayıt sayısı'),
+        ),
+        migrations.AddField(
+            model_name='exportjob',
+            name='total',
+            field=models.PositiveIntegerField(default=0, help_text='İşlenecek toplam kayıt sayısı (bilinmiyorsa 0)'),
+        ),
+        migrations.AlterField(
+            model_name='exportjob',
+            name='dedup_key',
+            field=models.CharField(help_text='Aynı isteği tekilleştirmek için anahtar (kullanıcı + tip + parametreler)', max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='exportjob',
+            name='kind',
+            field=models.CharField(choices=[('offers', 'Teklif Listesi'), ('products', 'Ürün Listesi'), ('staff', 'Personel Listesi'), ('offer_pdfs', 'Toplu Teklif PDF')], help_text='Export tipi', max_length=20),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 6.0 on 2026-10-18 11:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0022_export_job_params_progress'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='digest_count',
+            field=models.PositiveIntegerField(default=1, help_text="Bu satırda toplanan bildirim sayısı (özet satırda 1'den büyük)"),
+        ),
+        migrations.CreateModel(
+            name='NotificationArchive',
+            fields=[
+                ('id', models.BigIntegerField(help_text="Orijinal bildirim id'si", primary_key=True, serialize=False)),
+                ('notification_type', models.CharField(choices=[('info', 'Bilgi'), ('success', 'Başarılı'), ('warning', 'Uyarı'), ('error', 'Hata')], help_text='Bildirim tipi', max_length=20)),
+                ('title', models.CharField(help_text='Bildirim başlığı', max_length=255)),
+                ('message', models.TextField(help_text='Bildirim mesajı')),
+                ('offer_id', models.BigIntegerField(blank=True, help_text="İlgili teklif id'si (teklif silinse de kayıt kalır)", null=True)),
+                ('digest_count', models.PositiveIntegerField(default=1, help_text='Satırda toplanan bildirim sayısı')),
+                ('created_at', models.DateTimeField(help_text='Oluşturulma zamanı')),
+                ('read_at', models.DateTimeField(blank=True, help_text='Okunma zamanı', null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True, help_text='Arşive taşınma zamanı')),
+                ('user', models.ForeignKey(db_index=False, help_text='Bildirimin alıcısı', on_delete=django.db.models.deletion.CASCADE, related_name='archived_notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Arşivlenmiş Bildirim',
+                'verbose_name_plural': 'Arşivlenmiş Bildirimler',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', '-created_at'], name='products_no_user_id_ff29d7_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 13:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0023_notification_digest_archive'),
+    ]
+
+    operations = [
+        # Varsayılan değer Python tarafında: kolon değişmez, SQLite'ta büyük
+        # tabloyu yeniden oluşturmamak için sadece model durumu güncellenir
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='activitylog',
+                    name='created_at',
+                    field=models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='İşlem zamanı (kuyrukta beklese de log_activity çağrıldığı an)'),
+                ),
+            ],
+        ),
+    ]
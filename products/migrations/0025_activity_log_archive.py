@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0024_activity_log_created_at_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityLogArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='Bölümün ayı (ayın ilk günü, yerel saat)', unique=True)),
+                ('file_name', models.CharField(help_text='ACTIVITY_LOG_ARCHIVE_DIR altındaki dosya adı', max_length=100)),
+                ('row_count', models.PositiveIntegerField(default=0, help_text='Dosyadaki kayıt sayısı')),
+                ('user_ids', models.JSONField(default=list, help_text='Bölümde kaydı olan kullanıcılar (işlemi yapan)')),
+                ('offer_ids', models.JSONField(default=list, help_text='Bölümde kaydı olan teklifler')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Son yazılma zamanı')),
+            ],
+            options={
+                'verbose_name': 'Aktivite Logu Arşivi',
+                'verbose_name_plural': 'Aktivite Logu Arşivleri',
+                'ordering': ['-month'],
+            },
+        ),
+    ]
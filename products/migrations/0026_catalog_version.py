@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-18 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0025_activity_log_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0, help_text='Katalog her değiştiğinde bir artar')),
+            ],
+            options={
+                'verbose_name': 'Katalog Versiyonu',
+                'verbose_name_plural': 'Katalog Versiyonu',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0026_catalog_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text="Worker'ın işi hâlâ çalıştırdığını son bildirdiği zaman", null=True),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0 on 2026-10-18 16:05
+
+from django.db import migrations
+
+from products.totals import OfferTotals
+
+BATCH_SIZE = 500
+TOTAL_FIELDS = ("net_total", "vat_total", "gross_total", "grand_total", "item_count", "discount_total")
+
+
+def backfill_offer_totals(apps, schema_editor):
+    """0018 kolonları 0 ile ekledi: mevcut tekliflerin toplamlarını kalemlerden (kuruş motoru) doldur"""
+    Offer = apps.get_model("products", "Offer")
+
+    offers = Offer.objects.order_by("id").prefetch_related("items")
+    batch = []
+    for offer in offers.iterator(chunk_size=BATCH_SIZE):
+        totals = OfferTotals.for_offer(offer, list(offer.items.all()))
+        offer.net_total = totals.net_after_overall_discount
+        offer.vat_total = totals.vat_after_overall_discount
+        offer.gross_total = totals.items_subtotal_gross
+        offer.grand_total = totals.final_total
+        offer.item_count = totals.item_count
+        offer.discount_total = totals.discount_total
+        batch.append(offer)
+        if len(batch) >= BATCH_SIZE:
+            Offer.objects.bulk_update(batch, TOTAL_FIELDS)
+            batch = []
+    if batch:
+        Offer.objects.bulk_update(batch, TOTAL_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0027_export_job_heartbeat'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_offer_totals, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,71 @@
-from decimal import Decimal, ROUND_HALF_UP
+from decimal import Decimal
 
 from django.conf import settings
 from django.db import models
+from django.db.models import Case, Count, ExpressionWrapper, F, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest, Least, Round
+from django.utils import timezone
+
+from .money import add_percent, from_kurus, remove_percent, to_kurus, to_rate
+from .search import SearchTextField
+from .totals import LineTotals, OfferTotals
+
+
+def _kurus(expression):
+    """TL cinsinden decimal ifadeyi tam sayı kuruşa çevirir (SQL)"""
+    return Cast(Round(expression * 100), models.BigIntegerField())
+
+
+def _round_half_up_div(numerator, denominator):
+    """Negatif olmayan tam sayılar için ROUND_HALF_UP bölme (SQL)"""
+    return (numerator + denominator // 2) / denominator
+
+
+class OfferQuerySet(models.QuerySet):
+
+    def with_totals(self):
+        """
+        Her teklife SQL aggregate ile toplam ekler:
+            line_count      → ürün satırı sayısı
+            gross_subtotal  → iskontosuz KDV dahil toplam (gross_total_price)
+            net_subtotal    → item iskontoları sonrası KDV hariç toplam
+            vat_subtotal    → item iskontoları sonrası KDV toplamı
+            discounted_subtotal → item iskontoları sonrası KDV dahil toplam (total_price)
+
+        Hesap, OfferItem property'leri ile aynı kurallarla kuruş (tam sayı)
+        üzerinden yapılır; sonuçlar Python hesabıyla kuruşu kuruşuna eşleşir.
+        """
+        unit_price = _kurus(F("items__unit_price"))
+        discount_value = _kurus(F("items__discount_value"))
+        vat_rate = _kurus(F("items__vat_rate"))
+        quantity = F("items__quantity")
+
+        unit_discount = Case(
+            When(items__discount_type="percent",
+                 then=_round_half_up_div(unit_price * discount_value, 10000)),
+            When(items__discount_type="amount", then=Least(discount_value, unit_price)),
+            default=Value(0),
+            output_field=models.BigIntegerField(),
+        )
+        line_net = Greatest(unit_price - unit_discount, Value(0)) * quantity
+        line_vat = _round_half_up_div(line_net * vat_rate, 10000)
+        gross_line = unit_price * quantity
+        gross_vat = _round_half_up_div(gross_line * vat_rate, 10000)
+
+        def money(kurus_sum):
+            # Kuruş toplamını TL'ye çevir
+            return ExpressionWrapper(
+                Coalesce(Sum(kurus_sum), Value(0)) * Value(Decimal("0.01")),
+                output_field=models.DecimalField(max_digits=14, decimal_places=2),
+            )
+
+        return self.annotate(
+            line_count=Count("items"),
+            gross_subtotal=money(gross_line + gross_vat),
+            net_subtotal=money(line_net),
+            vat_subtotal=money(line_vat),
+            discounted_subtotal=money(line_net + line_vat),
+        )
 
 
 class Offer(models.Model):
@@ -19,6 +83,8 @@ class Offer(models.Model):
         ("amount", "₺"),
     )
 
+    objects = OfferQuerySet.as_manager()
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
   
@@ -117,31 +183,143 @@ class Offer(models.Model):
         default=0
     )
 
+    # SAKLANAN TOPLAMLAR (OfferItem / genel iskonto değişince güncellenir)
+    net_total = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0,
+        help_text="Tüm iskontolar sonrası KDV hariç toplam"
+    )
+    vat_total = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0,
+        help_text="Tüm iskontolar sonrası KDV toplamı"
+    )
+    gross_total = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, db_index=True,
+        help_text="İskontosuz KDV dahil toplam (50K eşiği bu alana bakar)"
+    )
+    grand_total = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0,
+        help_text="Son toplam (net + KDV)"
+    )
+    item_count = models.PositiveIntegerField(default=0, verbose_name="Ürün Sayısı", help_text="Ürün satırı sayısı")
+    discount_total = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0,
+        help_text="Ürün iskontoları + genel iskonto"
+    )
+
+    # PDF / Excel cache anahtarı (documents.py): teklif, kalemleri, fatura bilgisi
+    # veya teslimat adresleri değişince artar
+    document_version = models.PositiveIntegerField(
+        default=1,
+        help_text="Oluşturulan doküman versiyonu (değişiklikte artar)"
+    )
+
+    TOTAL_FIELDS = ("net_total", "vat_total", "gross_total", "grand_total", "item_count", "discount_total")
+
+    # recalculate_totals() çağrıldı, henüz kaydedilmedi
+    _totals_recalculated = False
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_overall_discount = (instance.overall_discount_type, instance.overall_discount_value)
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.invalidate_totals()
+        # Genel iskonto değiştiyse saklanan toplamları yeniden hesapla
+        if self.pk and getattr(self, "_loaded_overall_discount", None) != (
+            self.overall_discount_type, self.overall_discount_value
+        ):
+            self.recalculate_totals()
+        if self._is_full_update(args, kwargs):
+            # document_version sadece F() ile artırılır (refresh_totals, offer_saved):
+            # bellekteki eski değer geri yazılırsa aynı versiyon tekrar kullanılır.
+            # Toplamlar da sadece bu nesnede yeniden hesaplandıysa yazılır; aksi halde
+            # başka bir Offer nesnesi üzerinden (OfferItem.save) yazılmış güncel toplamlar
+            # bellekteki eski değerlerle ezilirdi.
+            exclude = {"document_version"}
+            if not self._totals_recalculated:
+                exclude.update(self.TOTAL_FIELDS)
+            kwargs["update_fields"] = self._update_fields(exclude)
+        super().save(*args, **kwargs)
+        self._totals_recalculated = False
+        self._loaded_overall_discount = (self.overall_discount_type, self.overall_discount_value)
+
+    def _is_full_update(self, args, kwargs):
+        return (
+            self.pk is not None and not self._state.adding and not args
+            and kwargs.get("update_fields") is None and not kwargs.get("force_insert")
+        )
+
+    def _update_fields(self, exclude):
+        return [
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key and field.name not in exclude
+        ]
+
+    # -------------------------
+    # SAKLANAN TOPLAMLAR
+    # -------------------------
+    def recalculate_totals(self):
+        """Saklanan toplam alanlarını item'lardan yeniden hesaplar (kaydetmez)"""
+        self.invalidate_totals()
+        totals = self.totals
+        self.net_total = totals.net_after_overall_discount
+        self.vat_total = totals.vat_after_overall_discount
+        self.gross_total = totals.items_subtotal_gross
+        self.grand_total = totals.final_total
+        self.item_count = totals.item_count
+        self.discount_total = totals.discount_total
+        self._loaded_overall_discount = (self.overall_discount_type, self.overall_discount_value)
+        self._totals_recalculated = True
+
+    def refresh_totals(self):
+        """Toplamları yeniden hesaplar; sadece toplam kolonlarını yazar, doküman versiyonunu artırır"""
+        self.recalculate_totals()
+        Offer.objects.filter(pk=self.pk).update(
+            document_version=F("document_version") + 1,
+            **{name: getattr(self, name) for name in self.TOTAL_FIELDS}
+        )
+        self._totals_recalculated = False
+
+    # -------------------------
+    # TOPLAM HESAPLARI (OfferTotals, instance başına memoize)
+    # -------------------------
+    @property
+    def totals(self):
+        """Tek geçişte hesaplanan OfferTotals; save() ile sıfırlanır"""
+        if getattr(self, "_totals", None) is None:
+            self._totals = OfferTotals.for_offer(self)
+        return self._totals
+
+    def invalidate_totals(self):
+        self._totals = None
+
     # -------------------------
     # İTEM BAZLI HESAPLAR (İskontosuz)
     # -------------------------
     def items_subtotal_net(self):
         """Tüm ürünlerin KDV hariç toplam (iskonto öncesi)"""
-        return sum(item.gross_line_subtotal for item in self.items.all())
+        return self.totals.items_subtotal_net
 
     def items_subtotal_gross(self):
         """Tüm ürünlerin KDV dahil toplam (iskonto öncesi)"""
-        return sum(item.gross_total_price for item in self.items.all())
+        return self.totals.items_subtotal_gross
 
     # -------------------------
     # İTEM BAZLI HESAPLAR (İtem iskontoları uygulanmış)
     # -------------------------
     def items_net_after_item_discounts(self):
         """Tüm ürünlerin KDV hariç toplam (item iskontoları uygulanmış)"""
-        return sum(item.line_subtotal for item in self.items.all())
+        return self.totals.items_net_after_item_discounts
 
     def items_vat_after_item_discounts(self):
         """Tüm ürünlerin KDV toplamı (item iskontoları uygulanmış)"""
-        return sum(item.vat_amount for item in self.items.all())
+        return self.totals.items_vat_after_item_discounts
 
     def items_gross_after_item_discounts(self):
         """Tüm ürünlerin KDV dahil toplam (item iskontoları uygulanmış)"""
-        return sum(item.total_price for item in self.items.all())
+        return self.totals.items_gross_after_item_discounts
 
     # -------------------------
     # GENEL İSKONTO HESAPLAR
@@ -153,20 +331,12 @@ class Offer(models.Model):
         % ise: KDV hariç toplama (item iskontoları sonrası) yüzde uygular
         ₺ ise: sabit tutar
         """
-        net_after_items = self.items_net_after_item_discounts()
-        if self.overall_discount_type == "percent":
-            return (net_after_items * self.overall_discount_value / Decimal("100")).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-        elif self.overall_discount_type == "amount":
-            # Genel ₺ iskonto, net toplama capped
-            if self.overall_discount_value > net_after_items:
-                return net_after_items
-            return self.overall_discount_value
-        return Decimal("0")
+        return self.totals.overall_discount_amount
 
     @property
     def net_after_overall_discount(self):
         """Genel iskonto sonrası KDV hariç toplam"""
-        return self.items_net_after_item_discounts() - self.overall_discount_amount
+        return self.totals.net_after_overall_discount
 
     @property
     def vat_after_overall_discount(self):
@@ -175,35 +345,17 @@ class Offer(models.Model):
         Her ürün farklı KDV oranına sahip olabilir, bu yüzden
         oranı koruyarak hesaplıyoruz: her item'in oranı üzerinden.
         """
-        net_after_items = self.items_net_after_item_discounts()
-        if net_after_items == 0:
-            return Decimal("0")
-
-        # Her item için orantılı KDV hesapla
-        total_vat = Decimal("0")
-        for item in self.items.all():
-            if net_after_items > 0:
-                # İtem'in orantısı
-                item_ratio = item.line_subtotal / net_after_items
-                # İtem'in genel iskontodaki payı
-                item_overall_discount = self.overall_discount_amount * item_ratio
-                # İtem'in iskonto sonrası neti
-                item_net_final = item.line_subtotal - item_overall_discount
-                # KDV
-                item_vat = (item_net_final * Decimal(str(item.vat_rate)) / Decimal("100")).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-                total_vat += item_vat
-
-        return total_vat
+        return self.totals.vat_after_overall_discount
 
     @property
     def final_total(self):
         """Son toplam: net_after_overall_discount + vat_after_overall_discount"""
-        return self.net_after_overall_discount + self.vat_after_overall_discount
+        return self.totals.final_total
     
     @property
     def total_item_discounts(self):
         """Ürün iskontolarının toplamı"""
-        return self.items_subtotal_net() - self.items_net_after_item_discounts()
+        return self.totals.total_item_discounts
 
     # -------------------------
     # ESKİ UYUMLU (template'ler için)
@@ -256,13 +408,53 @@ class Product(models.Model):
     @property
     def price_without_vat(self):
         """KDV hariç fiyat: price / (1 + vat_rate/100)"""
-        from decimal import Decimal, ROUND_HALF_UP
-        return (self.price / (1 + Decimal(str(self.vat_rate)) / Decimal("100"))).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        return from_kurus(remove_percent(to_kurus(self.price), to_rate(self.vat_rate)))
 
     def __str__(self):
         return self.name
 
 
+class ProductSearch(models.Model):
+    """
+    Ürün arama indeksi (FTS5 sanal tablosu, bkz. search.py).
+    Tablo migration'da oluşturulur; Django yönetmez.
+    """
+    product = models.OneToOneField(
+        Product,
+        primary_key=True,
+        db_column="rowid",
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name="search_entry",
+    )
+    name = SearchTextField()
+    barcode = SearchTextField()
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "products_productsearch"
+
+
+class CatalogVersion(models.Model):
+    """
+    Ürün kataloğu versiyonu (tek satır, bkz. catalog.py).
+    Tüm worker süreçleri aynı satırı okur; artış F() ile tek UPDATE'tir.
+    """
+
+    version = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Katalog her değiştiğinde bir artar"
+    )
+
+    class Meta:
+        verbose_name = "Katalog Versiyonu"
+        verbose_name_plural = "Katalog Versiyonu"
+
+    def __str__(self):
+        return f"v{self.version}"
+
+
 class OfferItem(models.Model):
     DISCOUNT_TYPE_CHOICES = (
         ("none", "Yok"),
@@ -285,11 +477,26 @@ class OfferItem(models.Model):
     )
     discount_value = models.DecimalField(max_digits=10, decimal_places=2, default=0)
 
-    def save(self, *args, **kwargs):
+    def save(self, *args, update_totals=True, **kwargs):
         # unit_price = KDV HARİÇ fiyat olarak kaydet
         self.unit_price = self.product.price_without_vat
         self.vat_rate = self.product.vat_rate
+        self._line_totals = None
         super().save(*args, **kwargs)
+        # Teklifin saklanan toplamlarını güncelle
+        # (toplu güncellemelerde update_totals=False verilip sonda bir kez hesaplanır)
+        if update_totals:
+            self.offer.refresh_totals()
+
+    # -------------------------
+    # SATIR HESAPLARI (LineTotals, instance başına memoize)
+    # -------------------------
+    @property
+    def totals(self):
+        """Satırın LineTotals hesabı; save() ile sıfırlanır"""
+        if getattr(self, "_line_totals", None) is None:
+            self._line_totals = LineTotals.for_item(self)
+        return self._line_totals
 
     # -------------------------
     # KDV DAHİL BİRİM FIYAT
@@ -297,7 +504,7 @@ class OfferItem(models.Model):
     @property
     def unit_price_with_vat(self):
         """KDV dahil birim fiyat (görüntüleme için)"""
-        return (self.unit_price * (1 + Decimal(str(self.vat_rate)) / Decimal("100"))).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        return from_kurus(add_percent(to_kurus(self.unit_price), to_rate(self.vat_rate)))
 
     # -------------------------
     # İSKONTO HESAPLAR
@@ -309,20 +516,12 @@ class OfferItem(models.Model):
         %  → birim fiyata yüzde
         ₺  → birim fiyata sabit tutar düşür
         """
-        if self.discount_type == "percent":
-            return (self.unit_price * self.discount_value / Decimal("100")).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-        if self.discount_type == "amount":
-            # ₺ iskontu birim fiyata düşür, eksi olamaz
-            if self.discount_value > self.unit_price:
-                return self.unit_price
-            return self.discount_value
-        return Decimal("0")
+        return self.totals.unit_discount_amount
 
     @property
     def discounted_unit_price(self):
         """İskontolu birim fiyat"""
-        result = self.unit_price - self.unit_discount_amount
-        return max(result, Decimal("0"))
+        return self.totals.discounted_unit_price
 
     # -------------------------
     # İSKONTOLU (NET) HESAPLAR
@@ -330,22 +529,22 @@ class OfferItem(models.Model):
     @property
     def line_subtotal(self):
         """İskontolu birim fiyat × adet (KDV hariç)"""
-        return self.discounted_unit_price * self.quantity
+        return self.totals.line_subtotal
 
     @property
     def discount_amount(self):
         """Satırın toplam iskonto tutarı"""
-        return self.unit_discount_amount * self.quantity
+        return self.totals.discount_amount
 
     @property
     def vat_amount(self):
         """KDV tutarı (iskontolu tutar üzerinden)"""
-        return (self.line_subtotal * Decimal(str(self.vat_rate)) / Decimal("100")).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        return self.totals.vat_amount
 
     @property
     def total_price(self):
         """Satır toplam (iskontolu, KDV dahil)"""
-        return self.line_subtotal + self.vat_amount
+        return self.totals.total_price
 
     # -------------------------
     # İSKONTOSUZ (GROSS) HESAPLAR
@@ -353,17 +552,17 @@ class OfferItem(models.Model):
     @property
     def gross_line_subtotal(self):
         """Birim fiyat × adet (iskonto yok, KDV hariç)"""
-        return self.unit_price * self.quantity
+        return self.totals.gross_line_subtotal
 
     @property
     def gross_vat_amount(self):
         """KDV (iskontosuz)"""
-        return (self.gross_line_subtotal * Decimal(str(self.vat_rate)) / Decimal("100")).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        return self.totals.gross_vat_amount
 
     @property
     def gross_total_price(self):
         """Satır toplam (iskontosuz, KDV dahil)"""
-        return self.gross_line_subtotal + self.gross_vat_amount
+        return self.totals.gross_total_price
 
     def __str__(self):
         return f"{self.product.name} ({self.quantity})"
@@ -524,8 +723,9 @@ class ActivityLog(models.Model):
     )
     
     created_at = models.DateTimeField(
-        auto_now_add=True,
-        help_text="İşlem zamanı"
+        default=timezone.now,
+        editable=False,
+        help_text="İşlem zamanı (kuyrukta beklese de log_activity çağrıldığı an)"
     )
     
     class Meta:
@@ -542,6 +742,52 @@ class ActivityLog(models.Model):
         return f"{self.user.username} - {self.get_action_display()} ({self.created_at.strftime('%d.%m.%Y %H:%M')})"
 
 
+class ActivityLogArchive(models.Model):
+    """
+    Soğuk depoya (sıkıştırılmış JSONL) taşınmış bir aylık ActivityLog bölümü.
+    Dosyayı archive_activity_logs komutu yazar (bkz. activity_archive.py);
+    kullanıcı / teklif id listeleri sorguda açılacak dosyaları seçer.
+    """
+    
+    month = models.DateField(
+        unique=True,
+        help_text="Bölümün ayı (ayın ilk günü, yerel saat)"
+    )
+    
+    file_name = models.CharField(
+        max_length=100,
+        help_text="ACTIVITY_LOG_ARCHIVE_DIR altındaki dosya adı"
+    )
+    
+    row_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Dosyadaki kayıt sayısı"
+    )
+    
+    user_ids = models.JSONField(
+        default=list,
+        help_text="Bölümde kaydı olan kullanıcılar (işlemi yapan)"
+    )
+    
+    offer_ids = models.JSONField(
+        default=list,
+        help_text="Bölümde kaydı olan teklifler"
+    )
+    
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Son yazılma zamanı"
+    )
+    
+    class Meta:
+        ordering = ['-month']
+        verbose_name = "Aktivite Logu Arşivi"
+        verbose_name_plural = "Aktivite Logu Arşivleri"
+    
+    def __str__(self):
+        return f"{self.month:%Y-%m} ({self.row_count} kayıt)"
+
+
 # ===========================
 # BİLDİRİM SİSTEMİ
 # ===========================
@@ -605,6 +851,11 @@ class Notification(models.Model):
         help_text="Okunma zamanı"
     )
     
+    digest_count = models.PositiveIntegerField(
+        default=1,
+        help_text="Bu satırda toplanan bildirim sayısı (özet satırda 1'den büyük)"
+    )
+    
     created_at = models.DateTimeField(
         auto_now_add=True,
         help_text="Oluşturulma zamanı"
@@ -623,8 +874,236 @@ class Notification(models.Model):
         return f"{status} {self.user.username} - {self.title}"
     
     def mark_as_read(self):
-        """Bildirimi okundu olarak işaretle"""
-        if not self.is_read:
+        """Bildirimi okundu olarak işaretle (okunmamış sayacını da günceller)"""
+        from .notifications import mark_read
+        
+        if not self.is_read and mark_read(self.user, self.pk):
             self.is_read = True
-            self.read_at = models.DateTimeField(auto_now=True)
-            self.save()
\ No newline at end of file
+            self.read_at = timezone.now()
+
+
+class NotificationArchive(models.Model):
+    """
+    Okunmuş eski bildirimlerin arşivi. Sıcak tablo küçük kalsın diye
+    archive_notifications komutu taşır (bkz. notification_retention.py).
+    Link ve okundu bilgisi tutulmaz; teklif sadece id olarak saklanır.
+    """
+    
+    id = models.BigIntegerField(
+        primary_key=True,
+        help_text="Orijinal bildirim id'si"
+    )
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_notifications',
+        db_index=False,  # (user, -created_at) indeksi kapsar
+        help_text="Bildirimin alıcısı"
+    )
+    
+    notification_type = models.CharField(
+        max_length=20,
+        choices=Notification.TYPE_CHOICES,
+        help_text="Bildirim tipi"
+    )
+    
+    title = models.CharField(
+        max_length=255,
+        help_text="Bildirim başlığı"
+    )
+    
+    message = models.TextField(
+        help_text="Bildirim mesajı"
+    )
+    
+    offer_id = models.BigIntegerField(
+        null=True,
+        blank=True,
+        help_text="İlgili teklif id'si (teklif silinse de kayıt kalır)"
+    )
+    
+    digest_count = models.PositiveIntegerField(
+        default=1,
+        help_text="Satırda toplanan bildirim sayısı"
+    )
+    
+    created_at = models.DateTimeField(
+        help_text="Oluşturulma zamanı"
+    )
+    
+    read_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Okunma zamanı"
+    )
+    
+    archived_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="Arşive taşınma zamanı"
+    )
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Arşivlenmiş Bildirim"
+        verbose_name_plural = "Arşivlenmiş Bildirimler"
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.title}"
+
+# ===========================
+# ARKA PLAN EXPORT İŞLERİ
+# ===========================
+class ExportJob(models.Model):
+    """
+    Kuyruktaki export işi. Endpoint iş ekler ve hemen döner; dosyayı
+    run_export_worker komutu üretir (bkz. export_jobs.py).
+    """
+    
+    KIND_CHOICES = (
+        ('offers', 'Teklif Listesi'),
+        ('products', 'Ürün Listesi'),
+        ('staff', 'Personel Listesi'),
+        ('offer_pdfs', 'Toplu Teklif PDF'),
+    )
+    
+    STATUS_CHOICES = (
+        ('pending', 'Sırada'),
+        ('running', 'Hazırlanıyor'),
+        ('done', 'Hazır'),
+        ('failed', 'Başarısız'),
+        ('expired', 'Süresi Doldu'),
+    )
+    
+    ACTIVE_STATUSES = ('pending', 'running')
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='export_jobs',
+        help_text="İşi isteyen kullanıcı"
+    )
+    
+    kind = models.CharField(
+        max_length=20,
+        choices=KIND_CHOICES,
+        help_text="Export tipi"
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        help_text="İş durumu"
+    )
+    
+    dedup_key = models.CharField(
+        max_length=64,
+        help_text="Aynı isteği tekilleştirmek için anahtar (kullanıcı + tip + parametreler)"
+    )
+    
+    params = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Export filtreleri / seçenekleri (ör. toplu PDF için durum, tarih aralığı)"
+    )
+    
+    progress = models.PositiveIntegerField(
+        default=0,
+        help_text="İşlenen kayıt sayısı"
+    )
+    
+    total = models.PositiveIntegerField(
+        default=0,
+        help_text="İşlenecek toplam kayıt sayısı (bilinmiyorsa 0)"
+    )
+    
+    file = models.FileField(
+        upload_to='exports/',
+        blank=True,
+        help_text="Üretilen dosya"
+    )
+    
+    error = models.TextField(
+        blank=True,
+        help_text="Hata mesajı (başarısızsa)"
+    )
+    
+    attempts = models.PositiveIntegerField(
+        default=0,
+        help_text="Çalıştırılma denemesi sayısı"
+    )
+    
+    worker = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text="İşi alan worker (host:pid)"
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="Kuyruğa eklenme zamanı"
+    )
+    
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Worker'ın işi aldığı zaman"
+    )
+    
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Worker'ın işi hâlâ çalıştırdığını son bildirdiği zaman"
+    )
+    
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Bitiş zamanı"
+    )
+    
+    expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Dosyanın silineceği zaman"
+    )
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Export İşi"
+        verbose_name_plural = "Export İşleri"
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['user', '-created_at']),
+        ]
+        constraints = [
+            # Aynı kullanıcı + tip için aynı anda tek bekleyen/çalışan iş
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=models.Q(status__in=('pending', 'running')),
+                name='unique_active_export_job',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} - {self.user.username} ({self.get_status_display()})"
+    
+    @property
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
+    
+    @property
+    def progress_percent(self):
+        if not self.total:
+            return None
+        return min(100, self.progress * 100 // self.total)
+    
+    @property
+    def is_downloadable(self):
+        return self.status == 'done' and bool(self.file) and (
+            self.expires_at is None or self.expires_at > timezone.now()
+        )
@@ -0,0 +1,67 @@
+"""
+Para Hesapları (Kuruş)
+
+Fiyat, iskonto ve KDV hesapları tam sayı kuruş üzerinden yapılır.
+Yüzde oranları da yüzde × 100 olarak tam sayı tutulur (%12,5 → 1250).
+Yuvarlama kuralı her yerde ROUND_HALF_UP'tır; Decimal'e dönüş sadece
+gösterim/kayıt sınırında (from_kurus) yapılır.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+# Yüzde hesaplarında payda: 100 (yüzde) × 100 (oran ölçeği)
+PERCENT_SCALE = 10000
+
+
+def to_kurus(value):
+    """TL tutarını (Decimal/int/str/float) tam sayı kuruşa çevirir"""
+    if isinstance(value, int):
+        return value * 100
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return int(value.scaleb(2).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+# Oranlar (KDV %, iskonto %) aynı ölçekle tutulur
+to_rate = to_kurus
+
+
+def from_kurus(kurus):
+    """Tam sayı kuruşu 2 haneli Decimal TL'ye çevirir"""
+    return Decimal(kurus).scaleb(-2)
+
+
+def div_half_up(numerator, denominator):
+    """Tam sayı bölme, ROUND_HALF_UP (eşitlikte sıfırdan uzağa) yuvarlama"""
+    if numerator >= 0:
+        return (2 * numerator + denominator) // (2 * denominator)
+    return -((-2 * numerator + denominator) // (2 * denominator))
+
+
+def percent_of(amount, rate):
+    """amount (kuruş) × rate (yüzde × 100) / 100, kuruşa yuvarlanmış"""
+    return div_half_up(amount * rate, PERCENT_SCALE)
+
+
+def add_percent(amount, rate):
+    """amount × (1 + rate / 100), kuruşa yuvarlanmış (KDV dahil fiyat)"""
+    return div_half_up(amount * (PERCENT_SCALE + rate), PERCENT_SCALE)
+
+
+def remove_percent(amount, rate):
+    """amount / (1 + rate / 100), kuruşa yuvarlanmış (KDV hariç fiyat)"""
+    return div_half_up(amount * PERCENT_SCALE, PERCENT_SCALE + rate)
+
+
+class KurusField:
+    """
+    Kuruş tutan bir attribute'u Decimal TL olarak gösteren descriptor.
+    Template ve export'lar eskisi gibi Decimal görür.
+    """
+
+    def __init__(self, attr):
+        self.attr = attr
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return from_kurus(getattr(instance, self.attr))
@@ -0,0 +1,139 @@
+"""
+Bildirim Saklama (Özet + Arşiv)
+
+Notification tablosu sıcak tablodur: navbar ve açılır menü sorguları
+(user, is_read, -created_at) indeksinden okur. Tablo küçük kalsın diye
+archive_notifications komutu periyodik olarak çalıştırılır:
+
+- Özet (digest): aynı kullanıcıya, aynı teklif ve link için giden, aynı tip
+  ve başlıktaki bildirimler (ör. aynı teklif için tekrar eden "Yönetici Onayı
+  Gerekli") en yeni satırda toplanır. Farklı tekliflerin bildirimleri ayrı
+  iş oldukları için birleştirilmez. Özet satırın digest_count'u artar ve
+  mesajı kaç bildirimi kapsadığını söyler; eski satırlar
+  NotificationArchive'a kopyalanıp silinir. Okunmamış satırlar taşınmadan
+  önce toplu olarak okundu işaretlenir ve sayaç tek UPDATE ile azaltılır
+  (okunmamış özet satırı sayaçta tek bildirim sayılır).
+- Arşiv: N günden eski okunmuş bildirimler NotificationArchive'a taşınır.
+  Okunmuş satırlar sayacı etkilemez.
+
+Her iki adım da BATCH_SIZE'lık kısa transaction'larla çalışır; tablo uzun
+süre kilitlenmez, araya başka yazmalar girebilir.
+"""
+import re
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Max
+from django.utils import timezone
+
+from .notifications import adjust_unread
+
+BATCH_SIZE = 500
+DIGEST_MIN_COUNT = 3
+DIGEST_SUFFIX = re.compile(r" \(\+\d+ benzer bildirim\)$")
+
+ARCHIVE_FIELDS = (
+    "id", "user_id", "notification_type", "title", "message",
+    "offer_id", "digest_count", "created_at", "read_at",
+)
+
+
+# ---------------------------------------------------------
+# ÖZET (DIGEST)
+# ---------------------------------------------------------
+def digest_groups(min_count=DIGEST_MIN_COUNT):
+    """En az min_count satırı olan (kullanıcı, tip, başlık, teklif, link, okundu) grupları"""
+    from .models import Notification
+
+    return list(
+        Notification.objects.values("user_id", "notification_type", "title", "offer_id", "link", "is_read")
+        .annotate(rows=Count("id"), latest_id=Max("id"))
+        .filter(rows__gte=min_count)
+        .order_by()
+    )
+
+
+def digest_message(message, count):
+    """Özet satırın mesajı: kaç bildirimi kapsadığı sona eklenir (önceki ek değiştirilir)"""
+    message = DIGEST_SUFFIX.sub("", message)
+    return f"{message} (+{count - 1} benzer bildirim)" if count > 1 else message
+
+
+def collapse_group(group, batch_size=BATCH_SIZE):
+    """Grubun eski satırlarını en yeni satıra toplar; arşive taşınan satır sayısını döndürür"""
+    from .models import Notification, NotificationArchive
+
+    duplicates = Notification.objects.filter(
+        user_id=group["user_id"],
+        notification_type=group["notification_type"],
+        title=group["title"],
+        offer_id=group["offer_id"],
+        link=group["link"],
+        is_read=group["is_read"],
+        id__lt=group["latest_id"],
+    ).order_by("id")
+
+    removed = 0
+    while True:
+        with transaction.atomic():
+            rows = list(duplicates.values_list("id", "digest_count")[:batch_size])
+            if not rows:
+                return removed
+            ids = [row_id for row_id, _ in rows]
+            digest = Notification.objects.filter(pk=group["latest_id"])
+            updated = digest.update(digest_count=F("digest_count") + sum(count for _, count in rows))
+            if not updated:  # Özet satırı bu arada silinmiş
+                return removed
+            message, count = digest.values_list("message", "digest_count").get()
+            digest.update(message=digest_message(message, count))
+
+            # Okundu işaretleyip arşive taşı: post_delete sayacı satır satır azaltmaz
+            marked = Notification.objects.filter(pk__in=ids, is_read=False).update(
+                is_read=True, read_at=timezone.now(),
+            )
+            adjust_unread(group["user_id"], -marked)
+            archive_rows = Notification.objects.filter(pk__in=ids).values(*ARCHIVE_FIELDS)
+            NotificationArchive.objects.bulk_create([NotificationArchive(**row) for row in archive_rows])
+            Notification.objects.filter(pk__in=ids).delete()
+        removed += len(ids)
+
+
+def collapse_digests(min_count=DIGEST_MIN_COUNT, batch_size=BATCH_SIZE):
+    """Tekrarlanan bildirimleri özet satırlarda toplar; arşive taşınan satır sayısını döndürür"""
+    return sum(collapse_group(group, batch_size) for group in digest_groups(min_count))
+
+
+# ---------------------------------------------------------
+# ARŞİV
+# ---------------------------------------------------------
+def archive_read_notifications(days, batch_size=BATCH_SIZE, pause=0):
+    """
+    N günden eski okunmuş bildirimleri arşiv tablosuna taşır.
+
+    Args:
+        days: Bu kadar günden eski bildirimler taşınır
+        batch_size: Transaction başına satır sayısı
+        pause: Partiler arası bekleme (saniye), yoğun saatlerde yazmalara yer açar
+
+    Returns:
+        Taşınan bildirim sayısı
+    """
+    from .models import Notification, NotificationArchive
+
+    cutoff = timezone.now() - timedelta(days=days)
+    candidates = Notification.objects.filter(is_read=True, created_at__lt=cutoff).order_by("id")
+
+    archived = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            rows = list(candidates.filter(id__gt=last_id).values(*ARCHIVE_FIELDS)[:batch_size])
+            if not rows:
+                return archived
+            NotificationArchive.objects.bulk_create([NotificationArchive(**row) for row in rows])
+            Notification.objects.filter(pk__in=[row["id"] for row in rows]).delete()
+        archived += len(rows)
+        last_id = rows[-1]["id"]
+        if pause:
+            time.sleep(pause)
@@ -0,0 +1,237 @@
+"""
+Bildirim Akışı (Server-Sent Events)
+
+Her kullanıcı tek, uzun ömürlü bir SSE bağlantısı açar; yeni bildirimler
+sayfa yenilenmeden navbar'a düşer. Görünüm async'tir ve ASGI altında
+(teklif_sistemi.asgi, ör. uvicorn / daphne) çalışır: boşta bekleyen
+bağlantı thread tutmaz ve veritabanına sorgu atmaz.
+
+- Süreç içi yayın (NotificationBus): bildirim kaydı commit edilince alıcının
+  bu süreçteki bağlantıları uyandırılır. Bağlantı kendi imlecinden (son
+  gönderilen bildirim id'si) büyük bildirimleri okur ve gönderir.
+- Çoklu worker: başka süreçte oluşan bildirimler için süreç başına tek bir
+  yoklayıcı NOTIFICATION_STREAM_POLL_INTERVAL saniyede bir MAX(id) okur;
+  sadece artış varsa bağlı kullanıcılardan hangilerinin yeni bildirimi
+  olduğunu sorgular. Maliyet bağlantı sayısından bağımsızdır; bağlantı
+  yokken yoklama da durur.
+- WSGI altında (runserver, senkron gunicorn) akış açılmaz (204): tarayıcı
+  yeniden bağlanmaz, menü açılınca yüklenmeye devam eder.
+"""
+import asyncio
+import json
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+
+DEFAULT_POLL_INTERVAL = 5
+KEEPALIVE_SECONDS = 25
+RETRY_MS = 5000
+BATCH_SIZE = 50
+
+
+def poll_interval():
+    return getattr(settings, "NOTIFICATION_STREAM_POLL_INTERVAL", DEFAULT_POLL_INTERVAL)
+
+
+# ---------------------------------------------------------
+# VERİTABANI (senkron, sync_to_async ile çağrılır)
+# ---------------------------------------------------------
+def max_notification_id():
+    """En büyük bildirim id'si (birincil anahtar indeksinden tek okuma)"""
+    from .models import Notification
+
+    return Notification.objects.aggregate(max_id=Max("id"))["max_id"] or 0
+
+
+def recipients_between(after_id, up_to_id, user_ids):
+    """(after_id, up_to_id] aralığında bildirimi olan kullanıcılar (verilenler içinden)"""
+    from .models import Notification
+
+    return list(
+        Notification.objects.filter(id__gt=after_id, id__lte=up_to_id, user_id__in=user_ids)
+        .values_list("user_id", flat=True)
+        .distinct()
+    )
+
+
+def new_notifications(user_id, cursor):
+    """İmleçten sonraki bildirimler ve güncel okunmamış sayısı"""
+    from accounts.models import User
+    from .models import Notification
+    from .notifications import notification_payload
+
+    notifications = list(
+        Notification.objects.filter(user_id=user_id, id__gt=cursor).order_by("id")[:BATCH_SIZE]
+    )
+    if not notifications:
+        return [], None
+    count = User.objects.filter(pk=user_id).values_list("unread_notification_count", flat=True).first() or 0
+    return [notification_payload(notification) for notification in notifications], count
+
+
+# ---------------------------------------------------------
+# YAYIN (PUB / SUB)
+# ---------------------------------------------------------
+class Subscription:
+    """Tek SSE bağlantısı; yayın başka thread'den gelse de kendi event loop'unda uyanır"""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+
+    def wake(self):
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:  # Event loop kapanmış
+            pass
+
+    async def wait(self, timeout):
+        """Uyandırılırsa True, zaman aşımında False döndürür"""
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.event.clear()
+        return True
+
+
+class NotificationBus:
+    """Süreç içi bildirim yayını + süreçler arası MAX(id) yoklaması"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = {}
+        self.poller = None
+        self.last_id = None
+
+    def subscribe(self, user_id, cursor):
+        """
+        Bağlantıyı kaydeder.
+
+        Args:
+            user_id: Bildirimleri dinlenecek kullanıcı
+            cursor: Bağlantının gördüğü son bildirim id'si; yoklama bu
+                noktadan geriye düşmez, arada başka süreçte oluşan bildirim kaçmaz
+        """
+        subscription = Subscription(user_id)
+        with self.lock:
+            self.subscriptions.setdefault(user_id, set()).add(subscription)
+            if self.last_id is None or cursor < self.last_id:
+                self.last_id = cursor
+        self._start_poller()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.user_id)
+            if subscriptions:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.subscriptions[subscription.user_id]
+
+    def publish(self, user_ids):
+        """Kullanıcıların bu süreçteki bağlantılarını uyandırır (her thread'den çağrılabilir)"""
+        with self.lock:
+            targets = [
+                subscription
+                for user_id in set(user_ids)
+                for subscription in self.subscriptions.get(user_id, ())
+            ]
+        for subscription in targets:
+            subscription.wake()
+
+    def publish_on_commit(self, user_ids):
+        """Transaction commit edilince yayınla (geri alınan bildirim gönderilmez)"""
+        user_ids = list(user_ids)
+        transaction.on_commit(lambda: self.publish(user_ids))
+
+    # -------------------------
+    # YOKLAMA (ÇOKLU WORKER)
+    # -------------------------
+    def _start_poller(self):
+        interval = poll_interval()
+        if not interval:
+            return
+        with self.lock:
+            if self.poller is None or self.poller.done():
+                self.poller = asyncio.get_running_loop().create_task(self._poll(interval))
+
+    async def _poll(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            with self.lock:
+                if not self.subscriptions:
+                    self.poller = None
+                    self.last_id = None
+                    return
+            await self.poll_once()
+
+    async def poll_once(self):
+        """Başka süreçlerde oluşan bildirimlerin alıcılarını uyandırır"""
+        max_id = await sync_to_async(max_notification_id)()
+        with self.lock:
+            last_id = self.last_id
+            user_ids = list(self.subscriptions)
+        if last_id is None or max_id <= last_id or not user_ids:
+            with self.lock:
+                self.last_id = max(max_id, self.last_id or 0)
+            return
+
+        recipients = await sync_to_async(recipients_between)(last_id, max_id, user_ids)
+        with self.lock:
+            # Beklerken daha eski imleçle bağlanan olduysa onun aralığı korunur
+            if self.last_id == last_id:
+                self.last_id = max_id
+        self.publish(recipients)
+
+
+notification_bus = NotificationBus()
+
+
+# ---------------------------------------------------------
+# SSE
+# ---------------------------------------------------------
+def sse_event(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def notification_events(user_id, cursor=None, bus=notification_bus):
+    """
+    Kullanıcının SSE akışı (async generator).
+
+    Args:
+        user_id: Kullanıcı id'si
+        cursor: Son alınan bildirim id'si (Last-Event-ID); yoksa bağlantı
+            anından sonraki bildirimler gönderilir
+    """
+    if cursor is None:
+        cursor = await sync_to_async(max_notification_id)()
+    subscription = bus.subscribe(user_id, cursor)
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        # Abone olmadan önce oluşan bildirimler de ilk turda okunur
+        woken = True
+        while True:
+            if woken:
+                notifications, count = await sync_to_async(new_notifications)(user_id, cursor)
+                for notification in notifications:
+                    cursor = notification["id"]
+                    yield sse_event("notification", {"unread_count": count, "notification": notification}, cursor)
+                if len(notifications) == BATCH_SIZE:
+                    continue
+
+            woken = await subscription.wait(KEEPALIVE_SECONDS)
+            if not woken:
+                # Proxy'ler boşta bağlantıyı kapatmasın (yorum satırı, sorgu yok)
+                yield ": ping\n\n"
+    finally:
+        bus.unsubscribe(subscription)
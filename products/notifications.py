@@ -0,0 +1,181 @@
+"""
+Bildirim Sayacı
+
+Okunmamış bildirim sayısı User.unread_notification_count kolonunda tutulur;
+context processor sayfa başına sorgu atmadan rozeti buradan gösterir.
+
+- Yeni okunmamış bildirim (post_save) ve okunmamış bildirimin silinmesi
+  (post_delete, cascade dahil) sayacı signals.py üzerinden değiştirir.
+- Okundu işaretleme sadece gerçekten okunmamış satırları günceller ve sayacı
+  güncellenen satır sayısı kadar azaltır; eşzamanlı isteklerde sayaç kaymaz.
+- Tüm değişiklikler F() ile tek UPDATE'tir (okuma-yazma yarışı yok).
+
+Gönderim: dispatch_notifications aynı bildirimi tüm alıcılara tek
+bulk_create ile yazar. bulk_create post_save tetiklemediği için sayaçlar
+aynı transaction içinde tek UPDATE ile artırılır. Commit sonrası alıcıların
+açık bildirim akışları uyandırılır (bkz. notification_stream.py).
+"""
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+DROPDOWN_LIMIT = 10
+
+
+def adjust_unread(user_id, delta):
+    """Kullanıcının okunmamış sayacını delta kadar değiştirir (sıfırın altına inmez)"""
+    from accounts.models import User
+
+    if delta:
+        User.objects.filter(pk=user_id).update(
+            unread_notification_count=Greatest(F("unread_notification_count") + delta, Value(0)),
+        )
+
+
+def firm_root_id(user):
+    """Kullanıcının bağlı olduğu zincirin en üstündeki yöneticinin id'si (döngüye karşı korumalı)"""
+    from accounts.models import User
+
+    root_id, manager_id = user.pk, user.manager_id
+    seen = {root_id}
+    while manager_id and manager_id not in seen:
+        seen.add(manager_id)
+        root_id, manager_id = manager_id, (
+            User.objects.filter(pk=manager_id).values_list("manager_id", flat=True).first()
+        )
+    return root_id
+
+
+def firm_managers(user):
+    """
+    Kullanıcının firmasındaki onay verebilecek yöneticiler.
+
+    Firma hiyerarşisi: kök yönetici (manager alanı boş olan) ve ona bağlı
+    kullanıcılar. Kök, manager zinciri en üste kadar izlenerek bulunur
+    (personelin yöneticisi de bir yöneticiye bağlı olabilir). Kullanıcı
+    kendisi hariç tutulur. manager_id ve pk indeksli olduğundan sistemdeki
+    diğer firmalara bakılmaz.
+    """
+    from accounts.models import User
+
+    root_id = firm_root_id(user)
+    return (
+        User.objects.filter(Q(pk=root_id) | Q(manager_id=root_id))
+        .filter(role="firma", is_manager=True, is_approved=True)
+        .exclude(pk=user.pk)
+    )
+
+
+def dispatch_notifications(recipients, title, message, notification_type="info", offer=None, link=None):
+    """
+    Aynı bildirimi alıcılara toplu olarak gönderir.
+
+    Args:
+        recipients: User queryset'i ya da User / kullanıcı id listesi
+        title, message, notification_type, offer, link: Notification alanları
+
+    Returns:
+        Oluşturulan Notification listesi
+    """
+    from accounts.models import User
+    from .models import Notification
+    from .notification_stream import notification_bus
+
+    if hasattr(recipients, "values_list"):
+        user_ids = list(recipients.values_list("pk", flat=True))
+    else:
+        user_ids = [getattr(recipient, "pk", recipient) for recipient in recipients]
+    # Aynı kullanıcıya iki kez gitmesin, sıra korunur
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return []
+
+    with transaction.atomic():
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                user_id=user_id,
+                title=title,
+                message=message,
+                notification_type=notification_type,
+                offer=offer,
+                link=link,
+            )
+            for user_id in user_ids
+        ])
+        User.objects.filter(pk__in=user_ids).update(
+            unread_notification_count=F("unread_notification_count") + 1,
+        )
+        notification_bus.publish_on_commit(user_ids)
+    return notifications
+
+
+def mark_read(user, notification_id):
+    """Bildirimi okundu işaretler; okunmamışsa True döndürür"""
+    from .models import Notification
+
+    updated = Notification.objects.filter(id=notification_id, user=user, is_read=False).update(
+        is_read=True, read_at=timezone.now(),
+    )
+    adjust_unread(user.pk, -updated)
+    return bool(updated)
+
+
+def mark_all_read(user):
+    """Kullanıcının tüm bildirimlerini okundu işaretler; işaretlenen sayıyı döndürür"""
+    from .models import Notification
+
+    updated = Notification.objects.filter(user=user, is_read=False).update(
+        is_read=True, read_at=timezone.now(),
+    )
+    adjust_unread(user.pk, -updated)
+    return updated
+
+
+def unread_count(user):
+    """Güncel sayaç (istek başında yüklenen kullanıcı nesnesi eski kalmış olabilir)"""
+    from accounts.models import User
+
+    return User.objects.filter(pk=user.pk).values_list("unread_notification_count", flat=True).first() or 0
+
+
+def recount_unread(users=None):
+    """Sayaçları bildirim tablosundan yeniden hesaplar (onarım / ilk doldurma)"""
+    from accounts.models import User
+    from .models import Notification
+
+    if users is None:
+        users = User.objects.all()
+    unread = (
+        Notification.objects.filter(user=OuterRef("pk"), is_read=False)
+        .values("user")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    return users.update(unread_notification_count=Coalesce(Subquery(unread), 0))
+
+
+def recent_notifications(user, limit=DROPDOWN_LIMIT):
+    """Açılır menü için son bildirimler (JSON'a hazır sözlükler)"""
+    from .models import Notification
+
+    notifications = Notification.objects.filter(user=user).order_by("-created_at")[:limit]
+    return [notification_payload(notification) for notification in notifications]
+
+
+def notification_payload(notification):
+    """Açılır menü / bildirim akışı için JSON'a hazır sözlük"""
+    from django.utils.text import Truncator
+    from django.utils.timesince import timesince
+
+    return {
+        "id": notification.id,
+        "title": notification.title,
+        "message": Truncator(notification.message).words(15),
+        "type": notification.notification_type,
+        "link": notification.link or "",
+        "is_read": notification.is_read,
+        "count": notification.digest_count,
+        "created_at": notification.created_at.isoformat(),
+        "timesince": timesince(notification.created_at),
+    }
@@ -0,0 +1,439 @@
+"""
+Teklif PDF Düzeni
+
+Tek teklif PDF'inin (ve toplu PDF'in) reportlab düzeni. Maliyetli kurulum
+modül yüklenirken bir kez yapılır:
+
+- Yazı tipi: OFFER_PDF_FONT ayarındaki (yoksa bilinen yollardaki) TTF bir kez
+  kaydedilir. Türkçe karakterler doğru çıkar; reportlab TTF'lerin sadece
+  kullanılan glifleri içeren alt kümesini gömer. TTF bulunamazsa Helvetica.
+- Stiller: ParagraphStyle / TableStyle nesneleri her çağrıda yeniden kurulmaz.
+  reportlab yerleşim (wrap/split) sırasında flowable'ların üzerine durum
+  yazdığı için Paragraph'lar renderlar ve thread'ler arasında paylaşılmaz:
+  başlık gibi sabitler dokümana derin kopya olarak eklenir, etiket hücreleri
+  ve kalem tablosu başlığı her tabloda yeniden kurulur.
+- Kalemler: tek büyük tablo yerine ITEMS_PER_TABLE satırlık, başlık satırı
+  tekrarlanan tablolar. Sütuna sığan hücreler düz string, sadece sığmayan
+  metinler Paragraph ile sarılır; süre ve bellek kalem sayısıyla doğrusal.
+
+Düzen değişince documents.LAYOUT_VERSION artırılmalıdır (cache'teki eski
+PDF'ler kullanılmasın).
+"""
+import copy
+import logging
+import os
+from xml.sax.saxutils import escape
+
+import reportlab
+from django.conf import settings
+from django.utils import timezone
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFError, TTFont
+from reportlab.platypus import HRFlowable, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+logger = logging.getLogger(__name__)
+
+# Kalem tablosu parça boyu (yaklaşık bir sayfa). Tek büyük tabloyu reportlab her
+# sayfa bölmesinde baştan ölçer (kalem sayısında karesel); parçalar doğrusal.
+ITEMS_PER_TABLE = 40
+
+# =========================================================
+# YAZI TİPİ
+# =========================================================
+FONT_NAME = "OfferSans"
+BOLD_FONT_NAME = "OfferSans-Bold"
+
+_REPORTLAB_FONTS = os.path.join(os.path.dirname(reportlab.__file__), "fonts")
+
+# (normal, kalın) TTF yolları, sırayla denenir
+FONT_CANDIDATES = (
+    ("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"),
+    ("/usr/share/fonts/dejavu/DejaVuSans.ttf", "/usr/share/fonts/dejavu/DejaVuSans-Bold.ttf"),
+    # reportlab ile gelen Bitstream Vera (Türkçe karakterleri içerir)
+    (os.path.join(_REPORTLAB_FONTS, "Vera.ttf"), os.path.join(_REPORTLAB_FONTS, "VeraBd.ttf")),
+)
+
+
+def register_fonts():
+    """
+    Türkçe destekli TTF'yi kaydeder.
+
+    Returns:
+        (normal font adı, kalın font adı) - TTF bulunamazsa Helvetica
+    """
+    configured = getattr(settings, "OFFER_PDF_FONT", None)
+    candidates = ((tuple(configured),) if configured else ()) + FONT_CANDIDATES
+    for regular, bold in candidates:
+        if not (os.path.exists(regular) and os.path.exists(bold)):
+            continue
+        try:
+            pdfmetrics.registerFont(TTFont(FONT_NAME, regular))
+            pdfmetrics.registerFont(TTFont(BOLD_FONT_NAME, bold))
+        except TTFError as e:
+            logger.warning("PDF yazı tipi yüklenemedi (%s): %s", regular, e)
+            continue
+        # <b> etiketi kalın TTF'ye eşlensin
+        pdfmetrics.registerFontFamily(
+            FONT_NAME, normal=FONT_NAME, bold=BOLD_FONT_NAME, italic=FONT_NAME, boldItalic=BOLD_FONT_NAME,
+        )
+        return FONT_NAME, BOLD_FONT_NAME
+
+    logger.warning("Türkçe karakter destekli TTF bulunamadı, PDF'lerde Helvetica kullanılıyor.")
+    return "Helvetica", "Helvetica-Bold"
+
+
+FONT, BOLD_FONT = register_fonts()
+
+# =========================================================
+# STİLLER
+# =========================================================
+_NORMAL = getSampleStyleSheet()["Normal"]
+
+TEXT_COLOR = colors.HexColor("#333333")
+DISCOUNT_COLOR = colors.HexColor("#DC3545")
+GRID_COLOR = colors.HexColor("#DDDDDD")
+PRIMARY_COLOR = colors.HexColor("#2F6FED")
+
+TITLE_STYLE = ParagraphStyle(
+    "title", parent=_NORMAL, fontSize=18, fontName=BOLD_FONT,
+    textColor=colors.HexColor("#1A3A6B"), alignment=TA_CENTER, spaceAfter=8,
+)
+STATUS_STYLE = ParagraphStyle("status", parent=_NORMAL, fontName=FONT, fontSize=11, alignment=TA_CENTER, spaceAfter=10)
+LABEL_STYLE = ParagraphStyle("label", parent=_NORMAL, fontSize=9, fontName=BOLD_FONT, textColor=TEXT_COLOR)
+VALUE_STYLE = ParagraphStyle("value", parent=_NORMAL, fontSize=9, fontName=FONT, textColor=colors.HexColor("#555555"))
+NORMAL_STYLE = ParagraphStyle("normal", parent=_NORMAL, fontSize=9, fontName=FONT)
+ITEM_FONT_SIZE = 9
+
+TOTAL_LABEL_STYLE = ParagraphStyle("tl", parent=_NORMAL, fontName=FONT, fontSize=10, textColor=TEXT_COLOR)
+TOTAL_VALUE_STYLE = ParagraphStyle("tv", parent=TOTAL_LABEL_STYLE, alignment=TA_RIGHT)
+DISCOUNT_LABEL_STYLE = ParagraphStyle("dl", parent=TOTAL_LABEL_STYLE, textColor=DISCOUNT_COLOR)
+DISCOUNT_VALUE_STYLE = ParagraphStyle("dv", parent=TOTAL_VALUE_STYLE, textColor=DISCOUNT_COLOR)
+
+REJECT_NOTE_STYLE = ParagraphStyle(
+    "rednote", parent=_NORMAL, fontName=FONT, fontSize=10, textColor=colors.HexColor("#721C24"),
+    backColor=colors.HexColor("#FFF2F2"), leftPadding=8, topPadding=6, bottomPadding=6,
+)
+
+
+def _section_style(name, background, font_size=11, space_before=8):
+    return ParagraphStyle(
+        name, parent=_NORMAL, fontSize=font_size, fontName=BOLD_FONT, textColor=colors.white,
+        backColor=colors.HexColor(background), alignment=TA_CENTER, spaceBefore=space_before, spaceAfter=4,
+        leftPadding=6, rightPadding=6, topPadding=4, bottomPadding=4,
+    )
+
+
+H1_STYLE = _section_style("h1", "#2F6FED", font_size=12, space_before=10)
+H2_STYLE = _section_style("h2", "#28A745")
+H3_STYLE = _section_style("h3", "#764BA2")
+REJECT_STYLE = _section_style("red", "#DC3545")
+
+
+def _info_table_style(label_background):
+    return TableStyle([
+        ("BACKGROUND", (0, 0), (0, -1), colors.HexColor(label_background)),
+        ("BACKGROUND", (2, 0), (2, -1), colors.HexColor(label_background)),
+        ("GRID", (0, 0), (-1, -1), 0.5, GRID_COLOR),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("TOPPADDING", (0, 0), (-1, -1), 4),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+        ("LEFTPADDING", (0, 0), (-1, -1), 6),
+    ])
+
+
+FIRM_TABLE_STYLE = _info_table_style("#EEF1FF")
+PHARMACY_TABLE_STYLE = _info_table_style("#EAFFF2")
+INVOICE_TABLE_STYLE = _info_table_style("#F3EEFF")
+INFO_COL_WIDTHS = [3.5 * cm, 6 * cm, 3.5 * cm, 5.5 * cm]
+
+ITEMS_TABLE_STYLE = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, 0), PRIMARY_COLOR),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+    ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#F8F9FA")]),
+    ("GRID", (0, 0), (-1, -1), 0.5, GRID_COLOR),
+    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+    ("ALIGN", (1, 0), (1, -1), "LEFT"),
+    ("TOPPADDING", (0, 0), (-1, -1), 4),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+    # Paragraph olmayan (düz metin) hücreler
+    ("FONTNAME", (0, 1), (-1, -1), FONT),
+    ("FONTSIZE", (0, 1), (-1, -1), ITEM_FONT_SIZE),
+])
+# Son parça: altta TOPLAM satırı
+ITEMS_LAST_TABLE_STYLE = TableStyle(ITEMS_TABLE_STYLE.getCommands() + [
+    ("BACKGROUND", (0, -1), (-1, -1), colors.HexColor("#EEF1FF")),
+    ("FONTNAME", (0, -1), (-1, -1), BOLD_FONT),
+    ("TEXTCOLOR", (0, -1), (-1, -1), TEXT_COLOR),
+])
+ITEMS_COL_WIDTHS = [1 * cm, 5 * cm, 1.2 * cm, 1.8 * cm, 1.2 * cm, 2.5 * cm, 2 * cm, 1.8 * cm, 2 * cm, 2.5 * cm]
+# Hücre iç genişliği (sol + sağ padding 6pt); sığmayan metin Paragraph ile sarılır
+ITEMS_TEXT_WIDTHS = [width - 12 for width in ITEMS_COL_WIDTHS]
+
+TOTALS_TABLE_STYLE = TableStyle([
+    ("BACKGROUND", (0, -1), (-1, -1), PRIMARY_COLOR),
+    ("TEXTCOLOR", (0, -1), (-1, -1), colors.white),
+    ("GRID", (0, 0), (-1, -1), 0.5, GRID_COLOR),
+    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ("TOPPADDING", (0, 0), (-1, -1), 6),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+    ("LEFTPADDING", (0, 0), (-1, -1), 8),
+])
+TOTALS_COL_WIDTHS = [13 * cm, 5.5 * cm]
+
+STATUS_LABELS = {
+    "sent": "Bekliyor",
+    "approved": "Onaylandı",
+    "rejected": "Reddedildi",
+    "revised": "Revize Edildi",
+}
+STATUS_COLORS = {
+    "sent": "#856404",
+    "approved": "#155724",
+    "rejected": "#721C24",
+    "revised": "#004085",
+}
+
+# =========================================================
+# SABİT FLOWABLE'LAR
+# =========================================================
+TITLE = Paragraph("TEKLİF DETAY RAPORU", TITLE_STYLE)
+TITLE_RULE = HRFlowable(width="100%", thickness=2, color=PRIMARY_COLOR)
+SECTION_GAP = Spacer(1, 0.3 * cm)
+BLOCK_GAP = Spacer(1, 0.5 * cm)
+
+FIRM_SECTION = Paragraph("FİRMA BİLGİLERİ", H1_STYLE)
+PHARMACY_SECTION = Paragraph("ECZANE BİLGİLERİ", H2_STYLE)
+INVOICE_SECTION = Paragraph("FATURA BİLGİLERİ", H3_STYLE)
+ITEMS_SECTION = Paragraph("ÜRÜN DETAYLARI", H1_STYLE)
+TOTALS_SECTION = Paragraph("TOPLAM ÖZETİ", H1_STYLE)
+REJECT_SECTION = Paragraph("RED NEDENİ", REJECT_STYLE)
+
+
+ITEMS_HEADER_LABELS = (
+    "Sıra", "Ürün Adı", "Adet", "Birim<br/>Fiyat", "KDV<br/>%", "İskonto",
+    "KDV<br/>Hariç", "KDV", "Toplam", "Teslimat<br/>Adresi",
+)
+
+
+# =========================================================
+# YARDIMCILAR
+# =========================================================
+def fresh(flowable):
+    """Sabit flowable'ın dokümana eklenecek derin kopyası (yerleşim durumu paylaşılmaz)"""
+    return copy.deepcopy(flowable)
+
+
+def label(text):
+    """Kalın etiket hücresi; reportlab hücreyi yerleşimde değiştirdiği için her seferinde yeni"""
+    return Paragraph(f"<b>{text}</b>", LABEL_STYLE)
+
+
+def items_header():
+    """Kalem tablosu başlık satırı (her tablo kendi hücrelerini alır)"""
+    return [label(text) for text in ITEMS_HEADER_LABELS]
+
+
+def value(text, style=VALUE_STYLE):
+    """Kullanıcı verisi hücresi; boşsa '-', biçimlendirme karakterleri kaçırılır"""
+    return Paragraph(escape(str(text)) if text not in (None, "") else "-", style)
+
+
+def _date(day):
+    return day.strftime("%d.%m.%Y") if day else None
+
+
+def _datetime(moment):
+    return timezone.localtime(moment).strftime("%d.%m.%Y %H:%M") if moment else None
+
+
+def _money(amount):
+    return f"{float(amount):.2f}"
+
+
+def item_cell(text, column):
+    """Sütuna sığan metin düz string (Table doğrudan çizer), sığmayan Paragraph ile sarılır"""
+    text = str(text) if text not in (None, "") else "-"
+    if pdfmetrics.stringWidth(text, FONT, ITEM_FONT_SIZE) <= ITEMS_TEXT_WIDTHS[column]:
+        return text
+    return Paragraph(escape(text), NORMAL_STYLE)
+
+
+def item_row(idx, item):
+    discount = "-"
+    if item.discount_type != "none":
+        unit = "%" if item.discount_type == "percent" else "TL"
+        discount = f"{item.discount_value}{unit} (-{_money(item.discount_amount)})"
+    return [
+        str(idx),
+        item_cell(item.product.name, 1),
+        str(item.quantity),
+        item_cell(_money(item.unit_price), 3),
+        f"%{item.vat_rate}",
+        item_cell(discount, 5),
+        item_cell(_money(item.line_subtotal), 6),
+        item_cell(_money(item.vat_amount), 7),
+        item_cell(_money(item.total_price), 8),
+        item_cell(item.delivery_address.title if item.delivery_address else None, 9),
+    ]
+
+
+def items_tables(rows):
+    """Kalem satırlarını (son satır TOPLAM) başlıklı, sayfa boyunda tablolara böler"""
+    tables = []
+    for start in range(0, len(rows), ITEMS_PER_TABLE):
+        chunk = rows[start:start + ITEMS_PER_TABLE]
+        last = start + ITEMS_PER_TABLE >= len(rows)
+        # repeatRows: parça sayfa sonuna denk gelip bölünürse başlık yeni sayfada tekrarlanır
+        table = Table([items_header()] + chunk, colWidths=ITEMS_COL_WIDTHS, repeatRows=1)
+        table.setStyle(ITEMS_LAST_TABLE_STYLE if last else ITEMS_TABLE_STYLE)
+        tables.append(table)
+    return tables
+
+
+def _info_table(rows, style):
+    table = Table(
+        [[label(left), value(left_value), label(right), value(right_value)]
+         for left, left_value, right, right_value in rows],
+        colWidths=INFO_COL_WIDTHS,
+    )
+    table.setStyle(style)
+    return table
+
+
+# =========================================================
+# DOKÜMAN
+# =========================================================
+def offer_pdf_doc(output):
+    return SimpleDocTemplate(
+        output, pagesize=A4,
+        rightMargin=1.5 * cm, leftMargin=1.5 * cm, topMargin=1.5 * cm, bottomMargin=1.5 * cm,
+    )
+
+
+def render_offer_pdf(offer, output):
+    """Tek teklif PDF dokümanını output'a yazar (offer: export_offers ile yüklenmiş)"""
+    offer_pdf_doc(output).build(offer_story(offer))
+
+
+def offer_story(offer):
+    """Tek teklifin PDF akışı (flowable listesi); toplu PDF'te teklifler art arda eklenir"""
+    story = []
+
+    # Başlık
+    offer_no = f"#{offer.original_offer.id if offer.original_offer else offer.id}"
+    if offer.revision_number > 1:
+        offer_no += f" (Rev.{offer.revision_number})"
+
+    status_color = STATUS_COLORS.get(offer.status, "#333333")
+    story += [
+        fresh(TITLE),
+        Paragraph(
+            f'<font color="{status_color}"><b>Teklif No: {offer_no} | '
+            f'Durum: {STATUS_LABELS.get(offer.status, offer.status)}</b></font>',
+            STATUS_STYLE,
+        ),
+        fresh(TITLE_RULE),
+        fresh(SECTION_GAP),
+    ]
+
+    # Firma Bilgileri
+    user = offer.user
+    story += [
+        fresh(FIRM_SECTION),
+        _info_table([
+            ("Firma Adı", user.company_name, "Yetkili", user.company_responsible_person),
+            ("Vergi No", user.company_tax_number, "Vergi Dairesi", user.company_tax_office),
+            ("Telefon", user.company_phone, "Mobil", user.company_mobile),
+            ("E-posta", user.email, "Adres", user.company_address),
+            ("Hazırlayan", user.get_full_name() or user.username, "Kullanıcı Adı", user.username),
+        ], FIRM_TABLE_STYLE),
+        fresh(SECTION_GAP),
+    ]
+
+    # Eczane Bilgileri
+    pharmacy = None
+    if offer.approved_by:
+        pharmacy = offer.approved_by if offer.approved_by.is_manager else offer.approved_by.manager
+    elif offer.rejected_by:
+        pharmacy = offer.rejected_by if offer.rejected_by.is_manager else offer.rejected_by.manager
+
+    def pharmacy_field(name):
+        return getattr(pharmacy, name) if pharmacy else None
+
+    story += [
+        fresh(PHARMACY_SECTION),
+        _info_table([
+            ("Eczane Adı", pharmacy_field("pharmacy_name"), "Eczacı", pharmacy_field("pharmacist_name")),
+            ("Vergi No", pharmacy_field("pharmacy_tax_number"), "Ruhsat No", pharmacy_field("pharmacy_license_number")),
+            ("Telefon", pharmacy_field("pharmacy_phone"), "E-posta", pharmacy_field("pharmacy_email")),
+            ("Adres", pharmacy_field("pharmacy_address"),
+             "Onaylayan", offer.approved_by.get_full_name() if offer.approved_by else None),
+            ("Onay Tarihi", _datetime(offer.approved_at), "Termin Tarihi", _date(offer.delivery_deadline)),
+        ], PHARMACY_TABLE_STYLE),
+        fresh(SECTION_GAP),
+    ]
+
+    # Fatura Bilgileri
+    if offer.invoice_number or offer.invoice_date or offer.delivery_deadline:
+        story += [
+            fresh(INVOICE_SECTION),
+            _info_table([
+                ("Fatura No", offer.invoice_number, "Fatura Tarihi", _date(offer.invoice_date)),
+                ("Termin Tarihi", _date(offer.delivery_deadline), "Gönderi Tarihi", _datetime(offer.sent_at)),
+            ], INVOICE_TABLE_STYLE),
+            fresh(SECTION_GAP),
+        ]
+
+    # Ürün Detayları: sayfa boyunda tablolar, her birinde başlık satırı
+    rows = [item_row(idx, item) for idx, item in enumerate(offer.items.all(), 1)]
+    rows.append([
+        "", "TOPLAM", "", "", "", "",
+        _money(offer.items_net_after_item_discounts()),
+        _money(offer.items_vat_after_item_discounts()),
+        _money(offer.final_total),
+        "",
+    ])
+    story.append(fresh(ITEMS_SECTION))
+    story += items_tables(rows)
+    story.append(fresh(BLOCK_GAP))
+
+    # Toplam Özeti: (etiket, tutar, iskonto satırı mı)
+    summary = [
+        ("KDV Hariç Toplam (İskonto Öncesi)", f"{_money(offer.items_subtotal_net())} TL", False),
+        ("Ürün İskonto Toplamı", f"-{_money(offer.total_item_discounts)} TL", True),
+        ("KDV Hariç Toplam (İskonto Sonrası)", f"{_money(offer.items_net_after_item_discounts())} TL", False),
+    ]
+    if offer.overall_discount_type != "none":
+        summary += [
+            ("Genel İskonto", f"-{_money(offer.overall_discount_amount)} TL", True),
+            ("Genel İskonto Sonrası KDV Hariç", f"{_money(offer.net_after_overall_discount)} TL", False),
+        ]
+        vat = offer.vat_after_overall_discount
+    else:
+        vat = offer.items_vat_after_item_discounts()
+    summary.append(("KDV Toplamı", f"{_money(vat)} TL", False))
+
+    totals_rows = [
+        [Paragraph(text, DISCOUNT_LABEL_STYLE if is_discount else TOTAL_LABEL_STYLE),
+         Paragraph(amount, DISCOUNT_VALUE_STYLE if is_discount else TOTAL_VALUE_STYLE)]
+        for text, amount, is_discount in summary
+    ]
+    totals_rows.append([
+        Paragraph("<b>SON TOPLAM (KDV DAHİL)</b>", TOTAL_LABEL_STYLE),
+        Paragraph(f"<b>{_money(offer.final_total)} TL</b>", TOTAL_VALUE_STYLE),
+    ])
+    totals_table = Table(totals_rows, colWidths=TOTALS_COL_WIDTHS)
+    totals_table.setStyle(TOTALS_TABLE_STYLE)
+    story += [fresh(TOTALS_SECTION), totals_table]
+
+    # Red nedeni varsa
+    if offer.reject_reason:
+        story += [fresh(BLOCK_GAP), fresh(REJECT_SECTION), value(offer.reject_reason, REJECT_NOTE_STYLE)]
+
+    return story
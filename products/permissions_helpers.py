@@ -20,7 +20,7 @@ def check_offer_amount_threshold(offer, threshold=50000):
     Returns:
         bool: Eşiği aşıyorsa True
     """
-    return offer.gross_total_price >= Decimal(str(threshold))
+    return offer.gross_total >= Decimal(str(threshold))
 
 
 def can_user_send_offer(user, offer):
@@ -191,6 +191,9 @@ def log_activity(user, action, description, offer=None, target_user=None, metada
     """
     Aktivite logu kaydeder
     
+    Kayıt arka planda toplu yazılır (bkz. activity_log.py); dönen nesnenin
+    id'si yazılana kadar boştur.
+    
     Args:
         user: İşlemi yapan kullanıcı
         action: İşlem tipi (ActivityLog.ACTION_CHOICES'tan biri)
@@ -203,6 +206,7 @@ def log_activity(user, action, description, offer=None, target_user=None, metada
     Returns:
         ActivityLog instance
     """
+    from .activity_log import activity_log_writer
     from .models import ActivityLog
     
     ip_address = None
@@ -213,7 +217,7 @@ def log_activity(user, action, description, offer=None, target_user=None, metada
         else:
             ip_address = request.META.get('REMOTE_ADDR')
     
-    log = ActivityLog.objects.create(
+    log = ActivityLog(
         user=user,
         action=action,
         description=description,
@@ -222,6 +226,7 @@ def log_activity(user, action, description, offer=None, target_user=None, metada
         metadata=metadata,
         ip_address=ip_address
     )
+    activity_log_writer.write(log)
     
     return log
 
@@ -241,52 +246,38 @@ def create_notification(user, title, message, notification_type='info', offer=No
     Returns:
         Notification instance
     """
-    from .models import Notification
+    from .notifications import dispatch_notifications
     
-    notification = Notification.objects.create(
-        user=user,
+    return dispatch_notifications(
+        [user],
         title=title,
         message=message,
         notification_type=notification_type,
         offer=offer,
         link=link
-    )
-    
-    return notification
+    )[0]
 
 
 def notify_manager_for_approval(offer):
     """
-    Teklif için yöneticiye onay bildirimi gönderir
+    Teklif için firmanın yöneticilerine onay bildirimi gönderir
+    
+    Alıcılar sadece teklifi oluşturan kullanıcının firmasından seçilir
+    (bkz. notifications.firm_managers).
     
     Args:
         offer: Offer instance
     """
-    # Firma personelinin yöneticisini bul
-    manager = offer.user.manager
-    
-    if not manager:
-        # Yönetici yoksa, firma rolündeki tüm yöneticilere gönder
-        from accounts.models import User
-        managers = User.objects.filter(role='firma', is_manager=True, is_approved=True)
-        for mgr in managers:
-            create_notification(
-                user=mgr,
-                title="Yönetici Onayı Gerekli",
-                message=f"{offer.user.get_full_name()} tarafından {offer.gross_total_price:,.2f} TL tutarında teklif oluşturuldu ve onayınızı bekliyor.",
-                notification_type='warning',
-                offer=offer,
-                link=f'/products/my-offers/{offer.id}/'
-            )
-    else:
-        create_notification(
-            user=manager,
-            title="Yönetici Onayı Gerekli",
-            message=f"{offer.user.get_full_name()} tarafından {offer.gross_total_price:,.2f} TL tutarında teklif oluşturuldu ve onayınızı bekliyor.",
-            notification_type='warning',
-            offer=offer,
-            link=f'/products/my-offers/{offer.id}/'
-        )
+    from .notifications import dispatch_notifications, firm_managers
+    
+    dispatch_notifications(
+        firm_managers(offer.user),
+        title="Yönetici Onayı Gerekli",
+        message=f"{offer.user.get_full_name()} tarafından {offer.gross_total:,.2f} TL tutarında teklif oluşturuldu ve onayınızı bekliyor.",
+        notification_type='warning',
+        offer=offer,
+        link=f'/products/my-offers/{offer.id}/'
+    )
 
 
 def notify_user_on_manager_approval(offer, approved):
@@ -297,9 +288,11 @@ def notify_user_on_manager_approval(offer, approved):
         offer: Offer instance
         approved: Onaylandı mı? (bool)
     """
+    from .notifications import dispatch_notifications
+    
     if approved:
-        create_notification(
-            user=offer.user,
+        dispatch_notifications(
+            [offer.user_id],
             title="Teklifiniz Onaylandı",
             message=f"#{offer.id} nolu teklifiniz yönetici tarafından onaylandı ve eczaneye gönderildi.",
             notification_type='success',
@@ -307,8 +300,8 @@ def notify_user_on_manager_approval(offer, approved):
             link=f'/products/my-offers/{offer.id}/'
         )
     else:
-        create_notification(
-            user=offer.user,
+        dispatch_notifications(
+            [offer.user_id],
             title="Teklifiniz Reddedildi",
             message=f"#{offer.id} nolu teklifiniz yönetici tarafından reddedildi. Sebep: {offer.manager_rejection_reason}",
             notification_type='error',
@@ -326,10 +319,12 @@ def notify_on_offer_status_change(offer, old_status, new_status):
         old_status: Eski durum
         new_status: Yeni durum
     """
+    from .notifications import dispatch_notifications
+    
     # Eczane onayı
     if new_status == 'approved':
-        create_notification(
-            user=offer.user,
+        dispatch_notifications(
+            [offer.user_id],
             title="Teklifiniz Onaylandı! 🎉",
             message=f"#{offer.id} nolu teklifiniz eczane tarafından onaylandı.",
             notification_type='success',
@@ -339,11 +334,11 @@ def notify_on_offer_status_change(offer, old_status, new_status):
     
     # Eczane reddi
     elif new_status == 'rejected':
-        create_notification(
-            user=offer.user,
+        dispatch_notifications(
+            [offer.user_id],
             title="Teklifiniz Reddedildi",
             message=f"#{offer.id} nolu teklifiniz eczane tarafından reddedildi. Sebep: {offer.reject_reason or 'Belirtilmedi'}",
             notification_type='error',
             offer=offer,
             link=f'/products/my-offers/{offer.id}/'
-        )
\ No newline at end of file
+        )
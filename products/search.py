@@ -0,0 +1,135 @@
+"""
+Ürün Arama İndeksi (SQLite FTS5)
+
+products_productsearch sanal tablosu her ürün için normalize edilmiş adı ve
+barkodu tutar (rowid = Product.id). Ad ve arama metni aynı normalize
+fonksiyonundan geçer: Türkçe küçük harf + aksan katlama, böylece
+"İLAÇ", "ilac", "ILAC" aynı kayda denk gelir.
+
+İndeks Product save/delete sinyalleriyle, toplu işlemlerde index_products()
+ile güncellenir. SQLite dışındaki veritabanlarında icontains'e düşülür.
+"""
+import re
+import unicodedata
+
+from django.db import connection, models
+
+SEARCH_TABLE = "products_productsearch"
+
+# Türkçe büyük → küçük (str.lower() "İ" için birleşik nokta bırakır, "I" → "i" yapar)
+TURKISH_LOWER = str.maketrans({"I": "ı", "İ": "i"})
+# Aramada harf ayrımı yapılmaz: ı/i, ğ/g, ü/u, ş/s, ö/o, ç/c eşlenir
+TURKISH_FOLD = str.maketrans({"ı": "i", "ğ": "g", "ü": "u", "ş": "s", "ö": "o", "ç": "c"})
+
+NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_search_text(text):
+    """Metni indeks / sorgu için normalize eder (küçük harf, aksansız, sadece harf-rakam)"""
+    text = str(text or "").translate(TURKISH_LOWER).lower().translate(TURKISH_FOLD)
+    text = "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+    return NON_WORD.sub(" ", text).strip()
+
+
+def build_match_query(query):
+    """Kullanıcı metninden FTS5 sorgusu: her kelime önek araması, hepsi AND"""
+    tokens = normalize_search_text(query).split()
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def is_available():
+    return connection.vendor == "sqlite"
+
+
+# ---------------------------------------------------------
+# ORM: products_productsearch MATCH lookup'ı
+# ---------------------------------------------------------
+class FullTextMatch(models.Lookup):
+    """
+    field__match=<fts sorgusu> → "<alias>"."<tablo>" MATCH %s
+
+    FTS5'te tablo adıyla aynı gizli kolon tüm kolonlarda arama yapar;
+    böylece ad ve barkod tek MATCH ile aranır.
+    """
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        table = self.lhs.target.model._meta.db_table
+        lhs = f"{compiler.quote_name_unless_alias(self.lhs.alias)}.{connection.ops.quote_name(table)}"
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", rhs_params
+
+
+class SearchTextField(models.TextField):
+    """FTS5 tablosundaki metin kolonu (match lookup'ı destekler)"""
+
+
+SearchTextField.register_lookup(FullTextMatch)
+
+
+# ---------------------------------------------------------
+# ARAMA
+# ---------------------------------------------------------
+def search_products(queryset, query, ranked=True):
+    """
+    Product queryset'ini arama metnine göre filtreler.
+
+    Args:
+        queryset: Product queryset'i
+        query: Kullanıcının yazdığı metin (ad veya barkod, önek)
+        ranked: True ise sonuçlar FTS5 rank (bm25) sırasına göre gelir;
+            mevcut sıralama ikincil sıralama olarak korunur
+    """
+    if not is_available():
+        return queryset.filter(models.Q(name__icontains=query) | models.Q(barcode__icontains=query))
+
+    match = build_match_query(query)
+    if not match:
+        return queryset.none()
+
+    queryset = queryset.filter(search_entry__name__match=match)
+    if ranked:
+        queryset = queryset.order_by("search_entry__rank", *queryset.query.order_by)
+    return queryset
+
+
+# ---------------------------------------------------------
+# İNDEKS GÜNCELLEME
+# ---------------------------------------------------------
+def index_products(products):
+    """Ürünleri indekse yazar (varsa eski kayıtların yerine)"""
+    rows = [(p.id, normalize_search_text(p.name), p.barcode or "") for p in products]
+    if not rows or not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+        cursor.executemany(f"INSERT INTO {SEARCH_TABLE} (rowid, name, barcode) VALUES (%s, %s, %s)", rows)
+
+
+def remove_products(product_ids):
+    """Silinen ürünleri indeksten çıkarır"""
+    product_ids = list(product_ids)
+    if not product_ids or not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [(pk,) for pk in product_ids])
+
+
+def rebuild_index(batch_size=2000):
+    """İndeksi tüm ürünlerden yeniden oluşturur, eklenen kayıt sayısını döndürür"""
+    from .models import Product
+
+    if not is_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+    count = 0
+    batch = []
+    for product in Product.objects.only("id", "name", "barcode").iterator(chunk_size=batch_size):
+        batch.append(product)
+        if len(batch) >= batch_size:
+            index_products(batch)
+            count += len(batch)
+            batch = []
+    index_products(batch)
+    return count + len(batch)
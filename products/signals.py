@@ -0,0 +1,72 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from accounts.models import Address
+
+from . import search
+from .autocomplete import product_index
+from .catalog import bump_catalog_version
+from .documents import bump_document_version
+from .models import Notification, Offer, OfferItem, Product
+from .notification_stream import notification_bus
+from .notifications import adjust_unread
+
+
+@receiver(post_delete, sender=OfferItem)
+def offer_item_deleted(sender, instance, origin=None, **kwargs):
+    """Ürün satırı silinince (cascade dahil) teklif toplamlarını güncelle"""
+    # Teklifin kendisi siliniyorsa hesaplamaya gerek yok
+    if isinstance(origin, Offer) or (isinstance(origin, QuerySet) and origin.model is Offer):
+        return
+    offer = Offer.objects.filter(pk=instance.offer_id).first()
+    if offer:
+        offer.refresh_totals()
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, **kwargs):
+    """Ürün arama ve otomatik tamamlama indekslerini güncel tut"""
+    search.index_products([instance])
+    # Geri alınan transaction'ın değişikliği indekse girmez (sayaç da geri alınır)
+    version = bump_catalog_version()
+    transaction.on_commit(partial(product_index.product_changed, instance, version))
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    search.remove_products([instance.pk])
+    version = bump_catalog_version()
+    transaction.on_commit(partial(product_index.product_deleted, instance.pk, version))
+
+
+@receiver(post_save, sender=Offer)
+def offer_saved(sender, instance, **kwargs):
+    """Teklif (durum, fatura, iskonto...) değişti: cache'teki PDF / Excel geçersiz"""
+    # Kalem değişiklikleri refresh_totals() içinde aynı UPDATE ile artırılır
+    bump_document_version(Offer.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Address)
+@receiver(pre_delete, sender=Address)
+def delivery_address_changed(sender, instance, **kwargs):
+    """Teslimat adresi değişti / silinecek: bu adresi kullanan tekliflerin dokümanları geçersiz"""
+    bump_document_version(Offer.objects.filter(items__delivery_address=instance))
+
+
+@receiver(post_save, sender=Notification)
+def notification_created(sender, instance, created, **kwargs):
+    """Yeni okunmamış bildirim: alıcının sayacını artır, açık akışına gönder"""
+    if created and not instance.is_read:
+        adjust_unread(instance.user_id, 1)
+        notification_bus.publish_on_commit([instance.user_id])
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    """Okunmamış bildirim silindi (teklif / kullanıcı silinmesi dahil): sayacı azalt"""
+    if not instance.is_read:
+        adjust_unread(instance.user_id, -1)
@@ -1,3 +1,1640 @@
+import random
+from decimal import Decimal, ROUND_HALF_UP
+from types import SimpleNamespace
+
 from django.test import TestCase
 
-# Create your tests here.
+from accounts.models import User
+from .models import Offer, OfferItem, Product
+from .totals import LineTotals, OfferTotals
+
+
+def create_random_offers(user, rnd, offer_count=15, product_count=40):
+    """Rastgele fiyat / KDV / iskonto kombinasyonlarıyla teklifler oluşturur"""
+    products = [
+        Product.objects.create(
+            name=f"URUN {i}",
+            price=Decimal(rnd.randint(1, 250000)) / 100,
+            vat_rate=rnd.choice([0, 1, 8, 10, 20]),
+        )
+        for i in range(product_count)
+    ]
+    offers = []
+    for _ in range(offer_count):
+        offer = Offer.objects.create(
+            user=user,
+            overall_discount_type=rnd.choice(["none", "percent", "amount"]),
+            overall_discount_value=Decimal(rnd.randint(0, 5000)) / 100,
+        )
+        for product in rnd.sample(products, rnd.randint(0, 12)):
+            OfferItem.objects.create(
+                offer=offer,
+                product=product,
+                quantity=rnd.randint(1, 500),
+                unit_price=0,
+                vat_rate=0,
+                discount_type=rnd.choice(["none", "percent", "amount"]),
+                discount_value=Decimal(rnd.randint(0, 12000)) / 100,
+            )
+        offers.append(offer)
+    return offers
+
+
+class OfferWithTotalsTests(TestCase):
+
+    def test_annotations_match_model_properties(self):
+        user = User.objects.create(username="firma", role="firma")
+        create_random_offers(user, random.Random(2026))
+
+        with self.assertNumQueries(1):
+            offers = list(Offer.objects.with_totals())
+
+        for offer in offers:
+            self.assertEqual(offer.line_count, offer.items.count())
+            self.assertEqual(offer.gross_subtotal, offer.gross_total_price())
+            self.assertEqual(offer.net_subtotal, offer.items_net_after_item_discounts())
+            self.assertEqual(offer.vat_subtotal, offer.items_vat_after_item_discounts())
+            self.assertEqual(offer.discounted_subtotal, offer.total_price())
+
+    def test_filtered_list_queries_do_not_grow_with_rows(self):
+        user = User.objects.create_user(username="liste", password="x", role="firma")
+        offers = create_random_offers(user, random.Random(5), offer_count=10)
+        Offer.objects.filter(pk__in=[offer.pk for offer in offers[:4]]).update(status="approved")
+        self.client.force_login(user)
+
+        def queries():
+            from django.db import connection
+            from django.template.defaultfilters import floatformat
+            from django.test.utils import CaptureQueriesContext
+
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get("/products/my-offers/approved/")
+            self.assertContains(response, floatformat(offers[0].total_price(), 2))
+            return len(context.captured_queries)
+
+        before = queries()
+        Offer.objects.filter(user=user).update(status="approved")
+        self.assertEqual(queries(), before)
+
+
+class StoredOfferTotalsTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="firma", password="x", role="firma", is_manager=True)
+        self.offers = create_random_offers(self.user, random.Random(77), offer_count=3, product_count=15)
+
+    def assertStored(self, offer):
+        stored = Offer.objects.get(pk=offer.pk)
+        totals = Offer.objects.get(pk=offer.pk).totals
+        self.assertEqual(stored.gross_total, totals.items_subtotal_gross)
+        self.assertEqual(stored.grand_total, totals.final_total)
+        self.assertEqual(stored.item_count, totals.item_count)
+
+    def test_stored_totals_follow_items_and_overall_discount(self):
+        for offer in self.offers:
+            self.assertStored(offer)
+
+        offer = Offer.objects.filter(pk__in=[o.pk for o in self.offers], items__isnull=False).first()
+        item = offer.items.first()
+        item.quantity += 10
+        item.save()
+        self.assertStored(offer)
+        item.delete()
+        self.assertStored(offer)
+
+        offer = Offer.objects.get(pk=offer.pk)
+        offer.overall_discount_type = "percent"
+        offer.overall_discount_value = Decimal("12.5")
+        offer.save()
+        self.assertStored(offer)
+
+    def test_stale_instance_save_keeps_totals_written_elsewhere(self):
+        stale = Offer.objects.get(pk=self.offers[1].pk)
+        product = Product.objects.create(name="PAHALI", price=Decimal("9999.99"), vat_rate=10)
+        OfferItem.objects.create(offer_id=stale.pk, product=product, quantity=5, unit_price=0, vat_rate=0)
+
+        stale.status = "sent"
+        stale.save()
+        self.assertStored(stale)
+
+    def test_migration_backfills_existing_offers(self):
+        from importlib import import_module
+        from django.apps import apps
+
+        # 0018 sonrası durum: kolonlar 0
+        Offer.objects.update(gross_total=0, grand_total=0, item_count=0)
+        import_module("products.migrations.0028_backfill_offer_totals").backfill_offer_totals(apps, None)
+        for offer in self.offers:
+            self.assertStored(offer)
+
+    def test_revise_computes_totals_once(self):
+        from unittest import mock
+
+        original = max(self.offers, key=lambda offer: offer.items.count())
+        self.assertGreater(original.items.count(), 1)
+        Offer.objects.filter(pk=original.pk).update(status="rejected")
+        self.client.force_login(self.user)
+        with mock.patch.object(Offer, "refresh_totals", autospec=True, side_effect=Offer.refresh_totals) as spy:
+            self.client.post(f"/products/offer/revise/{original.pk}/", {"revision_note": "Fiyat"})
+
+        revision = Offer.objects.get(original_offer=original)
+        self.assertEqual(spy.call_count, 1)
+        self.assertEqual(revision.item_count, original.items.count())
+        self.assertStored(revision)
+
+
+class OfferTotalsMemoTests(TestCase):
+
+    def test_properties_share_one_pass_and_reset_on_save(self):
+        user = User.objects.create_user(username="firma", password="x", role="firma")
+        offers = create_random_offers(user, random.Random(31), offer_count=4, product_count=15)
+        offer = Offer.objects.get(pk=max(offers, key=lambda o: o.items.count()).pk)
+        self.assertGreater(offer.items.count(), 1)
+
+        # Tüm toplamlar tek item sorgusundan, tek geçişte
+        with self.assertNumQueries(1):
+            values = (
+                offer.items_subtotal_net(), offer.items_subtotal_gross(), offer.total_price(),
+                offer.items_net_after_item_discounts(), offer.items_vat_after_item_discounts(),
+                offer.overall_discount_amount, offer.net_after_overall_discount,
+                offer.vat_after_overall_discount, offer.final_total, offer.total_item_discounts,
+            )
+        self.assertEqual(offer.final_total, offer.net_after_overall_discount + offer.vat_after_overall_discount)
+
+        # Kaydedince memo sıfırlanır, yeni iskonto ile yeniden hesaplanır
+        offer.overall_discount_type = "amount"
+        offer.overall_discount_value = Decimal("1.00")
+        offer.save()
+        self.assertEqual(offer.overall_discount_amount, Decimal("1.00"))
+        self.assertEqual(offer.items_subtotal_gross(), values[1])
+
+    def test_detail_page_queries_do_not_grow_with_items(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        user = User.objects.create_user(username="firma", password="x", role="firma", is_manager=True)
+        self.client.force_login(user)
+        offers = create_random_offers(user, random.Random(32), offer_count=6, product_count=15)
+        Offer.objects.filter(pk__in=[o.pk for o in offers]).update(status="sent")
+        counts = sorted(offers, key=lambda o: o.items.count())
+        small, large = counts[0], counts[-1]
+        self.assertGreater(large.items.count(), small.items.count() + 2)
+
+        def queries(offer):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(f"/products/my-offers/{offer.id}/")
+            self.assertEqual(response.status_code, 200)
+            return len(context)
+
+        self.assertEqual(queries(small), queries(large))
+
+
+# ---------------------------------------------------------
+# Eski Decimal hesap (referans) — kuruş motoru ile karşılaştırma için
+# ---------------------------------------------------------
+CENT = Decimal("0.01")
+
+
+def _q(value):
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def reference_line(item):
+    if item.discount_type == "percent":
+        unit_discount = _q(item.unit_price * item.discount_value / Decimal("100"))
+    elif item.discount_type == "amount":
+        unit_discount = min(item.discount_value, item.unit_price)
+    else:
+        unit_discount = Decimal("0")
+    line_subtotal = max(item.unit_price - unit_discount, Decimal("0")) * item.quantity
+    vat_amount = _q(line_subtotal * Decimal(str(item.vat_rate)) / Decimal("100"))
+    gross_line_subtotal = item.unit_price * item.quantity
+    gross_vat_amount = _q(gross_line_subtotal * Decimal(str(item.vat_rate)) / Decimal("100"))
+    return {
+        "unit_discount_amount": unit_discount,
+        "line_subtotal": line_subtotal,
+        "discount_amount": unit_discount * item.quantity,
+        "vat_amount": vat_amount,
+        "total_price": line_subtotal + vat_amount,
+        "gross_line_subtotal": gross_line_subtotal,
+        "gross_vat_amount": gross_vat_amount,
+        "gross_total_price": gross_line_subtotal + gross_vat_amount,
+    }
+
+
+def reference_offer(offer, items):
+    lines = [reference_line(item) for item in items]
+    net_after_items = sum((line["line_subtotal"] for line in lines), Decimal("0"))
+    if offer.overall_discount_type == "percent":
+        overall = _q(net_after_items * offer.overall_discount_value / Decimal("100"))
+    elif offer.overall_discount_type == "amount":
+        overall = min(offer.overall_discount_value, net_after_items)
+    else:
+        overall = Decimal("0")
+    vat_after = Decimal("0")
+    if net_after_items > 0:
+        for item, line in zip(items, lines):
+            item_net_final = line["line_subtotal"] - overall * (line["line_subtotal"] / net_after_items)
+            vat_after += _q(item_net_final * Decimal(str(item.vat_rate)) / Decimal("100"))
+    items_subtotal_net = sum((line["gross_line_subtotal"] for line in lines), Decimal("0"))
+    return lines, {
+        "items_subtotal_net": items_subtotal_net,
+        "items_subtotal_gross": sum((line["gross_total_price"] for line in lines), Decimal("0")),
+        "items_net_after_item_discounts": net_after_items,
+        "items_vat_after_item_discounts": sum((line["vat_amount"] for line in lines), Decimal("0")),
+        "items_gross_after_item_discounts": sum((line["total_price"] for line in lines), Decimal("0")),
+        "total_item_discounts": items_subtotal_net - net_after_items,
+        "overall_discount_amount": overall,
+        "net_after_overall_discount": net_after_items - overall,
+        "vat_after_overall_discount": vat_after,
+        "final_total": net_after_items - overall + vat_after,
+    }
+
+
+def random_money(rnd, upper):
+    return Decimal(rnd.randint(0, upper)) / 100
+
+
+class KurusEngineDifferentialTests(TestCase):
+    """Kuruş motoru, eski Decimal hesapla birebir aynı sonucu vermeli"""
+
+    def test_matches_decimal_reference_on_random_offers(self):
+        rnd = random.Random(4004)
+        for _ in range(2000):
+            offer = SimpleNamespace(
+                overall_discount_type=rnd.choice(["none", "percent", "amount"]),
+                overall_discount_value=random_money(rnd, rnd.choice([100, 5000, 10000000])),
+            )
+            items = [
+                SimpleNamespace(
+                    quantity=rnd.randint(1, rnd.choice([10, 1000, 100000])),
+                    unit_price=random_money(rnd, rnd.choice([100, 250000, 99999999])),
+                    vat_rate=Decimal(rnd.choice([0, 1, 8, 10, 18, 20, rnd.randint(0, 10000)])) / 100,
+                    discount_type=rnd.choice(["none", "percent", "amount"]),
+                    discount_value=random_money(rnd, rnd.choice([100, 10000, 500000])),
+                )
+                for _ in range(rnd.randint(0, 15))
+            ]
+
+            expected_lines, expected = reference_offer(offer, items)
+            totals = OfferTotals.for_offer(offer, items)
+
+            for item, expected_line in zip(items, expected_lines):
+                for name, value in expected_line.items():
+                    self.assertEqual(getattr(item._line_totals, name), value, name)
+            for name, value in expected.items():
+                self.assertEqual(getattr(totals, name), value, name)
+
+    def test_line_totals_are_decimal(self):
+        line = LineTotals(3, Decimal("10.10"), Decimal("20.00"), "percent", Decimal("12.5"))
+        self.assertIsInstance(line.total_price, Decimal)
+        self.assertEqual(line.unit_discount_amount, Decimal("1.26"))
+        self.assertEqual(line.total_price, Decimal("31.82"))
+
+
+class BulkOfferTotalsTests(TestCase):
+    """NumPy toplu hesap, teklif başına OfferTotals ile aynı sonucu vermeli"""
+
+    def test_matches_offer_totals(self):
+        from .bulk_totals import BulkOfferTotals
+
+        user = User.objects.create(username="firma", role="firma")
+        offers = create_random_offers(user, random.Random(5005), offer_count=40)
+
+        with self.assertNumQueries(1):
+            bulk = BulkOfferTotals(Offer.objects.all())
+
+        for offer in Offer.objects.prefetch_related("items"):
+            totals = offer.totals
+            for name in bulk.offers:
+                self.assertEqual(bulk.offer_decimal(offer.id, name), getattr(totals, name), name)
+            self.assertEqual(bulk.offer_values(offer.id)["item_count"], totals.item_count)
+            for item in offer.items.all():
+                values = bulk.line_values(item.id)
+                for name, value in values.items():
+                    self.assertAlmostEqual(value, float(getattr(item.totals, name)), places=6)
+        self.assertEqual(len(offers), 40)
+
+
+class ProductSearchTests(TestCase):
+
+    def test_turkish_folding_prefix_and_sync(self):
+        from .search import search_products
+
+        iyot = Product.objects.create(name="İYOT ÇÖZELTİSİ 30 ML", barcode="8690001112223", price=10, vat_rate=10)
+        Product.objects.create(name="IŞIK KREMİ", barcode="8690009998887", price=10, vat_rate=10)
+
+        def names(query):
+            return set(search_products(Product.objects.all(), query).values_list("name", flat=True))
+
+        self.assertEqual(names("iyot"), {"İYOT ÇÖZELTİSİ 30 ML"})
+        self.assertEqual(names("cozelti"), {"İYOT ÇÖZELTİSİ 30 ML"})
+        self.assertEqual(names("ışık"), {"IŞIK KREMİ"})
+        self.assertEqual(names("isik krem"), {"IŞIK KREMİ"})
+        self.assertEqual(names("869000999"), {"IŞIK KREMİ"})
+        self.assertEqual(names("\"*"), set())
+
+        iyot.name = "POVİDON İYOT"
+        iyot.save()
+        self.assertEqual(names("povidon"), {"POVİDON İYOT"})
+        iyot.delete()
+        self.assertEqual(names("iyot"), set())
+
+
+class ProductAutocompleteTests(TestCase):
+
+    def test_prefix_search_follows_catalog_changes(self):
+        from .autocomplete import product_index
+        from .catalog import bump_catalog_version
+
+        Product.objects.create(name="PAROL 500 MG 20 TB.", barcode="8699111", price=30, vat_rate=10)
+        Product.objects.create(name="APAROL ŞURUP", barcode="8699222", price=40, vat_rate=10)
+
+        def names(query):
+            return [row["name"] for row in product_index.search(query)]
+
+        self.assertEqual(names("par"), ["PAROL 500 MG 20 TB."])
+        self.assertEqual(names("surup"), ["APAROL ŞURUP"])
+        self.assertEqual(names("8699"), ["APAROL ŞURUP", "PAROL 500 MG 20 TB."])
+
+        parol_plus = Product.objects.create(name="PAROL PLUS", price=35, vat_rate=10)
+        self.assertEqual(names("parol pl"), ["PAROL PLUS"])
+        parol_plus.delete()
+        self.assertEqual(names("parol pl"), [])
+
+        # Sinyal tetiklemeyen toplu güncelleme
+        Product.objects.filter(name="APAROL ŞURUP").update(name="APAROL SÜSPANSİYON")
+        bump_catalog_version()
+        self.assertEqual(names("susp"), ["APAROL SÜSPANSİYON"])
+
+    def test_version_is_shared_and_rebuild_runs_once(self):
+        import threading
+        from unittest import mock
+
+        from django.db.models import F
+
+        from .autocomplete import ProductAutocompleteIndex
+        from .models import CatalogVersion
+
+        Product.objects.create(name="PAROL 500 MG 20 TB.", price=30, vat_rate=10)
+        index = ProductAutocompleteIndex()
+        index.search("parol")
+
+        # Başka worker'ın artışı: süreç içi cache değil, veritabanındaki satır
+        Product.objects.filter(name="PAROL 500 MG 20 TB.").update(name="PAROL PLUS")
+        CatalogVersion.objects.update(version=F("version") + 1)
+
+        self.assertEqual([row["name"] for row in index.search("parol pl")], ["PAROL PLUS"])
+
+        # Versiyon artışından sonra aynı anda gelen aramalar tek kurulum bekler
+        # (thread'ler test transaction'ını göremez: veritabanı erişimi taklit edilir)
+        version = index.version + 1
+
+        def rebuild(self):
+            self.version = version
+
+        with mock.patch("products.autocomplete.get_catalog_version", return_value=version), \
+                mock.patch.object(ProductAutocompleteIndex, "rebuild", autospec=True, side_effect=rebuild) as rebuilt:
+            threads = [threading.Thread(target=index.ensure_current) for _ in range(4)]
+            with index.rebuild_lock:
+                for thread in threads:
+                    thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(rebuilt.call_count, 1)
+
+
+class BarcodeScanTests(TestCase):
+
+    def setUp(self):
+        from .barcodes import barcode_cache
+
+        barcode_cache.clear()
+        self.user = User.objects.create_user(username="firma", password="x", role="firma")
+        self.client.force_login(self.user)
+        self.ean = Product.objects.create(name="EAN URUN", barcode="8690001112223", price=12, vat_rate=10)
+        self.upc = Product.objects.create(name="UPC URUN", barcode="0036000291452", price=24, vat_rate=20)
+
+    def test_lookup_exact_then_gtin(self):
+        response = self.client.get("/products/barcode/", {"code": "8690001112223"})
+        self.assertEqual(response.json()["product"]["match"], "exact")
+
+        # UPC-A (12 hane) ve GTIN-14 yazımı aynı ürünü bulur
+        for code in ("036000291452", "00036000291452"):
+            product = self.client.get("/products/barcode/", {"code": code}).json()["product"]
+            self.assertEqual((product["id"], product["match"]), (self.upc.id, "gtin"))
+
+        self.assertEqual(self.client.get("/products/barcode/", {"code": "123"}).status_code, 404)
+
+        # Ürün değişince cache boşalır
+        self.ean.barcode = "8690001119999"
+        self.ean.save()
+        self.assertEqual(self.client.get("/products/barcode/", {"code": "8690001112223"}).status_code, 404)
+
+    def test_change_in_another_worker_clears_cache(self):
+        from django.db.models import F
+
+        from .barcodes import barcode_cache
+        from .models import CatalogVersion
+
+        self.assertEqual(barcode_cache.lookup("8690001112223")["id"], self.ean.id)
+
+        # Başka worker: sinyal bu süreçte çalışmaz, sadece ortak sayaç artar
+        Product.objects.filter(pk=self.ean.pk).update(barcode="8690001119999")
+        CatalogVersion.objects.update(version=F("version") + 1)
+        self.assertIsNone(barcode_cache.lookup("8690001112223"))
+
+        with self.assertNumQueries(4):  # versiyon + 2 birebir + 1 GTIN; tekrar eden barkod sorulmaz
+            products = barcode_cache.lookup_many(["8690001119999", "036000291452", "8690001119999", ""])
+        self.assertEqual(products["8690001119999"]["id"], self.ean.id)
+        self.assertEqual(products["036000291452"]["id"], self.upc.id)
+
+    def test_scan_adds_items_to_draft_offer(self):
+        scans = [
+            {"barcode": "8690001112223", "quantity": 2},
+            {"barcode": "036000291452", "quantity": 1},
+            {"barcode": "8690001112223", "quantity": 3},
+            {"barcode": "999"},
+        ]
+        response = self.client.post("/products/barcode/scan/", {"items": scans}, content_type="application/json")
+        data = response.json()
+        self.assertEqual(data["not_found"], ["999"])
+
+        offer = Offer.objects.get(id=data["offer_id"], status="draft")
+        self.assertEqual(
+            dict(offer.items.values_list("product__name", "quantity")),
+            {"EAN URUN": 5, "UPC URUN": 1},
+        )
+        self.assertEqual(offer.gross_total, offer.gross_total_price())
+
+        self.client.post("/products/barcode/scan/", {"items": scans[:1]}, content_type="application/json")
+        self.assertEqual(offer.items.get(product=self.ean).quantity, 7)
+
+
+def make_workbook(rows, header=("Ürün Adı", "Barkod", "Birim Fiyat", "KDV %")):
+    """Test için bellekte Excel dosyası"""
+    import io
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.append(list(header))
+    for row in rows:
+        ws.append(list(row))
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+class ProductImportTests(TestCase):
+
+    def test_streaming_import_upserts_and_reports(self):
+        from .importer import import_products
+
+        Product.objects.create(name="PAROL 500 MG", barcode="8690001", price=Decimal("30.00"), vat_rate=10)
+        Product.objects.create(name="İYOT ÇÖZELTİSİ", barcode=None, price=Decimal("15.00"), vat_rate=20)
+        Product.objects.create(name="ASPIRIN 100", barcode="8690003", price=Decimal("20.00"), vat_rate=10)
+
+        report = import_products(make_workbook([
+            ("Parol 500 mg (yeni ad)", "8690001", "32,50", 10),  # barkodla eşleşir, güncellenir
+            ("iyot çözeltisi", 8690002, 15, 20),                  # adla eşleşir, barkod eklenir
+            ("ASPIRIN 100", "8690003", 20, 10),                    # değişmez
+            ("YENI URUN", "8690004", 9.9, 10),                     # oluşturulur
+            ("YENI URUN", "8690005", 9.9, 10),                     # dosyada tekrar
+            ("", "", "", ""),                                      # boş satır, atlanır
+            ("BOZUK FIYAT", "", "abc", 10),
+            ("BOZUK KDV", "", 10, 150),
+        ]), chunk_size=3)
+
+        self.assertEqual((report.created, report.updated, report.unchanged), (1, 2, 1))
+        self.assertEqual([e["row"] for e in report.errors], [6, 8, 9])
+
+        parol = Product.objects.get(barcode="8690001")
+        self.assertEqual((parol.name, parol.price), ("PAROL 500 MG", Decimal("32.50")))
+        self.assertEqual(Product.objects.get(name="İYOT ÇÖZELTİSİ").barcode, "8690002")
+        self.assertEqual(Product.objects.get(name="YENI URUN").price, Decimal("9.90"))
+
+        from .search import search_products
+        self.assertTrue(search_products(Product.objects.all(), "yeni").exists())
+
+    def test_blank_price_or_vat_does_not_overwrite_existing_product(self):
+        from .importer import import_products
+
+        Product.objects.create(name="PAROL 500 MG", barcode="8690001", price=Decimal("30.00"), vat_rate=20)
+        Product.objects.create(name="ASPIRIN 100", barcode="8690003", price=Decimal("20.00"), vat_rate=10)
+
+        report = import_products(make_workbook([
+            ("PAROL 500 MG", "8690001", "", None),   # boş fiyat ve KDV: değişmez
+            ("ASPIRIN 100", "8690003", " ", 20),     # sadece KDV güncellenir
+            ("YENI URUN", "", None, None),           # yeni üründe varsayılanlar
+        ]))
+
+        self.assertEqual((report.created, report.updated, report.unchanged), (1, 1, 1))
+        parol = Product.objects.get(name="PAROL 500 MG")
+        self.assertEqual((parol.price, parol.vat_rate), (Decimal("30.00"), 20))
+        aspirin = Product.objects.get(name="ASPIRIN 100")
+        self.assertEqual((aspirin.price, aspirin.vat_rate), (Decimal("20.00"), 20))
+        yeni = Product.objects.get(name="YENI URUN")
+        self.assertEqual((yeni.price, yeni.vat_rate), (Decimal("0.00"), 10))
+
+    def test_price_updated_at_changes_only_with_price_or_vat(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .importer import import_products
+
+        Product.objects.create(name="PAROL 500 MG", barcode=None, price=Decimal("30.00"), vat_rate=10)
+        Product.objects.create(name="ASPIRIN 100", barcode="8690003", price=Decimal("20.00"), vat_rate=10)
+        Product.objects.create(name="MAJEZIK", barcode="8690006", price=Decimal("40.00"), vat_rate=10)
+        old = timezone.now() - timedelta(days=30)
+        Product.objects.update(price_updated_at=old)
+
+        report = import_products(make_workbook([
+            ("PAROL 500 MG", "8690001", 30, 10),    # sadece barkod eklenir
+            ("ASPIRIN 100", "8690003", 25, 10),     # fiyat değişir
+            ("MAJEZIK", "8690006", 40, 20),         # KDV değişir
+        ]))
+
+        self.assertEqual(report.updated, 3)
+        parol = Product.objects.get(name="PAROL 500 MG")
+        self.assertEqual((parol.barcode, parol.price_updated_at), ("8690001", old))
+        self.assertGreater(Product.objects.get(name="ASPIRIN 100").price_updated_at, old)
+        self.assertGreater(Product.objects.get(name="MAJEZIK").price_updated_at, old)
+
+    def test_admin_import_uses_header_columns(self):
+        admin = User.objects.create_superuser(username="admin", password="x", email="a@example.com")
+        self.client.force_login(admin)
+        Product.objects.create(name="PAROL 500 MG", price=Decimal("30.00"), vat_rate=10)
+
+        # Ad dosyadaki gibi saklanır; mevcut ürün normalize adla eşleşir
+        upload = make_workbook([("Parol 500 mg", 10, "35.00"), ("Yeni Ürün", 20, "12.00")], header=("name", "vat_rate", "price"))
+        upload.name = "katalog.xlsx"
+        response = self.client.post("/admin/products/product/import-excel/", {"excel_file": upload}, follow=True)
+
+        self.assertContains(response, "Yeni: 1, Güncellenen: 1")
+        self.assertEqual(Product.objects.get(name="PAROL 500 MG").price, Decimal("35.00"))
+        self.assertEqual(Product.objects.get(name="Yeni Ürün").vat_rate, 20)
+        self.assertEqual(Product.objects.count(), 2)
+
+        missing = make_workbook([("X", 1)], header=("name", "price"))
+        missing.name = "eksik.xlsx"
+        response = self.client.post("/admin/products/product/import-excel/", {"excel_file": missing}, follow=True)
+        self.assertContains(response, "Excel sütunları eksik")
+
+    def test_dry_run_preview_then_commit(self):
+        import os
+        import tempfile
+
+        from django.test import override_settings
+
+        user = User.objects.create_user(username="eczane", password="x", role="eczane", is_manager=True)
+        self.client.force_login(user)
+        Product.objects.create(name="PAROL 500 MG", barcode="8690001", price=Decimal("40.00"), vat_rate=10)
+        Product.objects.create(name="ASPIRIN 100", barcode="8690003", price=Decimal("20.00"), vat_rate=10)
+
+        upload = make_workbook([
+            ("PAROL 500 MG", "8690001", "30.00", 10),
+            ("ASPIRIN 100", "8690099", "25.00", 20),
+            ("YENI URUN", "8690004", "9.90", 10),
+        ])
+        upload.name = "liste.xlsx"
+
+        media_root = tempfile.mkdtemp()
+        with override_settings(MEDIA_ROOT=media_root):
+            response = self.client.post(
+                "/products/pharmacy/products/import-excel/", {"excel_file": upload, "dry_run": "1"}
+            )
+            self.assertRedirects(response, "/products/pharmacy/products/import-excel/preview/")
+            # Önizleme hiçbir şey yazmaz
+            self.assertFalse(Product.objects.filter(name="YENI URUN").exists())
+
+            tabs = {key: count for key, _, count in self.client.get(response.url).context["tabs"]}
+            self.assertEqual(tabs, {"new": 1, "increase": 1, "decrease": 1, "vat": 1, "unmatched_barcode": 2, "errors": 0})
+            page = self.client.get(response.url, {"tab": "decrease"})
+            self.assertEqual(page.context["rows"][0]["change_percent"], "-25.0")
+
+            self.client.post("/products/pharmacy/products/import-excel/commit/")
+
+        self.assertEqual(Product.objects.get(name="PAROL 500 MG").price, Decimal("30.00"))
+        self.assertEqual(Product.objects.get(name="ASPIRIN 100").vat_rate, 20)
+        self.assertTrue(Product.objects.filter(name="YENI URUN").exists())
+        self.assertNotIn("import_preview_token", self.client.session)
+        self.assertEqual(os.listdir(os.path.join(media_root, "import_previews")), [])
+
+    def test_commit_rejects_preview_when_catalog_changed(self):
+        import tempfile
+
+        from django.contrib.messages import get_messages
+        from django.test import override_settings
+
+        user = User.objects.create_user(username="eczane", password="x", role="eczane", is_manager=True)
+        self.client.force_login(user)
+        parol = Product.objects.create(name="PAROL 500 MG", barcode="8690001", price=Decimal("40.00"), vat_rate=10)
+        upload = make_workbook([("PAROL 500 MG", "8690001", "30.00", 10), ("YENI URUN", "", "9.90", 10)])
+        upload.name = "liste.xlsx"
+
+        with override_settings(MEDIA_ROOT=tempfile.mkdtemp()):
+            self.client.post("/products/pharmacy/products/import-excel/", {"excel_file": upload, "dry_run": "1"})
+            # Önizleme ile onay arasında fiyat ve ad değişti
+            parol.name = "PAROL 500 MG TB."
+            parol.price = Decimal("45.00")
+            parol.save()
+
+            response = self.client.post("/products/pharmacy/products/import-excel/commit/")
+
+        self.assertRedirects(response, "/products/pharmacy/products/import-excel/", fetch_redirect_response=False)
+        self.assertIn("kataloğu değişti", str(list(get_messages(response.wsgi_request))[0]))
+        parol.refresh_from_db()
+        self.assertEqual(parol.price, Decimal("45.00"))
+        self.assertFalse(Product.objects.filter(name__in=["PAROL 500 MG", "YENI URUN"]).exists())
+        self.assertNotIn("import_preview_token", self.client.session)
+
+    def test_stale_previews_are_purged(self):
+        import io
+        import os
+        import tempfile
+        import time
+
+        from django.conf import settings
+        from django.core.management import call_command
+        from django.test import override_settings
+
+        from .importer import load_preview, save_preview
+
+        with override_settings(MEDIA_ROOT=tempfile.mkdtemp()):
+            abandoned = save_preview({"creates": []})
+            directory = os.path.join(settings.MEDIA_ROOT, "import_previews")
+            old = time.time() - 25 * 3600
+            os.utime(os.path.join(directory, f"{abandoned}.json"), (old, old))
+            open(os.path.join(directory, "notes.txt"), "w").close()  # önizleme olmayan dosya
+
+            # Yeni önizleme eskileri temizler
+            current = save_preview({"creates": []})
+            self.assertIsNone(load_preview(abandoned))
+            self.assertEqual(load_preview(current), {"creates": []})
+
+            os.utime(os.path.join(directory, f"{current}.json"), (old, old))
+            out = io.StringIO()
+            call_command("purge_import_previews", stdout=out)
+            self.assertIn("1 eski önizleme", out.getvalue())
+            self.assertEqual(os.listdir(directory), ["notes.txt"])
+
+
+class CsvExportTests(TestCase):
+
+    def setUp(self):
+        self.manager = User.objects.create_user(username="yonetici", password="x", role="firma", is_manager=True)
+        self.staff = User.objects.create_user(username="personel", password="x", role="firma", manager=self.manager)
+        other = User.objects.create_user(username="baska", password="x", role="firma", is_manager=True)
+        rnd = random.Random(13)
+        self.offers = create_random_offers(self.staff, rnd, offer_count=4, product_count=15)
+        Offer.objects.create(user=other, status="sent")
+        Offer.objects.filter(id__in=[o.id for o in self.offers[:3]]).update(status="sent")
+        self.client.force_login(self.manager)
+
+    def read(self, url):
+        import csv
+        import io
+
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        text = b"".join(response.streaming_content).decode("utf-8-sig")
+        delimiter = "\t" if url.rstrip("/").endswith("tsv") else ","
+        return response, list(csv.reader(io.StringIO(text), delimiter=delimiter))
+
+    def test_offer_and_item_rows_are_scoped_to_firm(self):
+        response, rows = self.read("/products/export/offers/csv/")
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        sent = {o.id for o in self.offers[:3]}
+        self.assertEqual({int(row[0]) for row in rows[1:]}, sent)
+
+        _, rows = self.read("/products/export/offers/items/tsv/")
+        items = OfferItem.objects.filter(offer_id__in=sent)
+        self.assertEqual(len(rows) - 1, items.count())
+        by_id = {item.id: item for item in items}
+        for row in rows[1:]:
+            self.assertEqual(Decimal(row[-1]), by_id[int(row[5])].total_price)
+
+        self.assertEqual(self.client.get("/products/export/offers/xls/").status_code, 404)
+
+    def test_staff_and_permissions(self):
+        _, rows = self.read("/products/export/staff/csv/")
+        self.assertEqual([(row[1], row[-1]) for row in rows[1:]], [("personel", "4")])
+
+        self.client.force_login(self.staff)
+        response = self.client.get("/products/export/offers/csv/")
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.client.get("/products/export/staff/csv/").status_code, 302)
+        _, rows = self.read("/products/export/products/csv/")
+        self.assertEqual(len(rows) - 1, Product.objects.count())
+
+
+class ExportQueryCountTests(TestCase):
+    """Export sorgu sayısı teklif / kalem sayısından bağımsız olmalı"""
+
+    def setUp(self):
+        from accounts.models import Address
+
+        self.manager = User.objects.create_user(username="yonetici", password="x", role="firma", is_manager=True)
+        self.pharmacist = User.objects.create_user(
+            username="eczaci", password="x", role="eczane", is_manager=True,
+            pharmacy_name="Merkez Eczanesi", pharmacist_name="Ayşe Yılmaz", pharmacy_tax_number="123",
+            pharmacy_license_number="456", pharmacy_phone="0212", pharmacy_email="eczane@example.com",
+            pharmacy_address="İstanbul",
+        )
+        self.pharmacy_staff = User.objects.create_user(
+            username="eczane_personel", password="x", role="eczane", manager=self.pharmacist
+        )
+        self.address = Address.objects.create(user=self.manager, title="Depo", city="İstanbul", address_line="Adres")
+        self.products = [
+            Product.objects.create(name=f"URUN {i}", barcode=f"869{i:04d}", price=Decimal(10 + i), vat_rate=10)
+            for i in range(30)
+        ]
+
+    def add_offers(self, count, item_count):
+        user = User.objects.create_user(
+            username=f"personel{User.objects.count()}", password="x", role="firma", manager=self.manager
+        )
+        offers = []
+        for _ in range(count):
+            offer = Offer.objects.create(
+                user=user, status="approved", approved_by=self.pharmacy_staff,
+                original_offer=offers[0] if offers else None,
+            )
+            for product in self.products[:item_count]:
+                OfferItem.objects.create(
+                    offer=offer, product=product, quantity=2, unit_price=0, vat_rate=0,
+                    delivery_address=self.address,
+                )
+            offers.append(offer)
+        return offers
+
+    def count_queries(self, url):
+        import tempfile
+        from django.db import connection
+        from django.test import override_settings
+        from django.test.utils import CaptureQueriesContext
+
+        self.client.force_login(self.manager)
+        with override_settings(OFFER_DOCUMENT_CACHE_DIR=tempfile.mkdtemp()), \
+                CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+            if response.streaming:
+                b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def test_query_count_is_constant(self):
+        small = self.add_offers(2, item_count=2)
+        before = self.count_all(small[-1])
+
+        large = self.add_offers(12, item_count=30)
+        self.add_offers(5, item_count=10)
+        after = self.count_all(large[-1])
+
+        self.assertEqual(before, after)
+        # oturum + kullanıcı + teklif (JOIN'li) + kalemler
+        self.assertEqual(before[:2], [4, 4])
+
+    def count_all(self, offer):
+        """Tek teklif Excel/PDF istekleri + worker'da çalışan liste export'ları"""
+        import io
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .export_jobs import write_export
+        from .models import ExportJob
+
+        counts = [
+            self.count_queries(f"/products/export/offer/{offer.id}/excel/"),
+            self.count_queries(f"/products/export/offer/{offer.id}/pdf/"),
+        ]
+        for kind in ("offers", "staff"):
+            job = ExportJob(user=self.manager, kind=kind)
+            with CaptureQueriesContext(connection) as context:
+                write_export(job, io.BytesIO())
+            counts.append(len(context))
+        return counts
+
+
+class OffersWorkbookTests(TestCase):
+
+    def test_streamed_workbook_matches_offer_totals_across_chunks(self):
+        import io
+        import openpyxl
+        from .exports import write_offers_workbook
+
+        user = User.objects.create_user(username="firma", password="x", role="firma", is_manager=True)
+        create_random_offers(user, random.Random(41), offer_count=5, product_count=15)
+        offers = Offer.objects.filter(user=user).order_by("id")
+
+        output = io.BytesIO()
+        write_offers_workbook(offers, "Firma A.Ş.", output, chunk_size=2)  # 3 parça
+        wb = openpyxl.load_workbook(io.BytesIO(output.getvalue()))
+
+        summary = wb["Teklif Özeti"]
+        self.assertEqual(summary["A1"].value, "TEKLİF RAPORU - Firma A.Ş.")
+        rows = list(summary.iter_rows(min_row=5, max_row=4 + offers.count(), values_only=True))
+        for offer, row in zip(offers, rows):
+            self.assertEqual(row[0], f"#{offer.id}")
+            self.assertEqual(row[6], offer.items.count())
+            self.assertAlmostEqual(float(row[9]), float(offer.final_total), places=2)
+        self.assertEqual(summary.cell(row=5 + offers.count(), column=10).value, f"=SUM(J5:J{4 + offers.count()})")
+        # Hücreler sadece named style adını taşır
+        self.assertEqual((summary["A5"].style, summary["A6"].style), ("cell_odd", "cell_even"))
+        self.assertEqual(summary["H5"].number_format, "#,##0.00 ₺")
+
+        items = wb["Ürün Detayları"]
+        item_rows = list(items.iter_rows(min_row=3, values_only=True))
+        self.assertEqual(len(item_rows), OfferItem.objects.filter(offer__user=user).count())
+        line = OfferItem.objects.filter(offer__user=user).order_by("offer_id", "id").first()
+        first = next(row for row in item_rows if row[4] == line.product.name and row[0] == f"#{line.offer_id}")
+        self.assertAlmostEqual(float(first[14]), float(line.total_price), places=2)
+
+
+class ExportJobTests(TestCase):
+
+    def setUp(self):
+        self.manager = User.objects.create_user(username="yonetici", password="x", role="firma", is_manager=True)
+        User.objects.create_user(username="personel", password="x", role="firma", manager=self.manager)
+        self.client.force_login(self.manager)
+
+    def test_enqueue_dedup_worker_and_download(self):
+        import io
+        import os
+        import tempfile
+        import openpyxl
+        from django.core.management import call_command
+        from django.test import override_settings
+        from .export_jobs import expire_jobs
+        from .models import ExportJob, Notification
+
+        with override_settings(MEDIA_ROOT=tempfile.mkdtemp()):
+            response = self.client.get("/products/export/staff/")
+            job = ExportJob.objects.get()
+            self.assertRedirects(response, f"/products/export/jobs/{job.id}/")
+            # Aynı istek tekrar gelirse yeni iş açılmaz
+            self.client.get("/products/export/staff/")
+            self.assertEqual(ExportJob.objects.count(), 1)
+            self.assertEqual(self.client.get(response.url, {"format": "json"}).json()["status"], "pending")
+
+            call_command("run_export_worker", "--once", stdout=io.StringIO())
+
+            status = self.client.get(response.url, {"format": "json"}).json()
+            self.assertEqual(status["status"], "done")
+            notification = Notification.objects.get(user=self.manager)
+            self.assertEqual(notification.link, status["download_url"])
+
+            download = self.client.get(status["download_url"])
+            self.assertEqual(download.status_code, 200)
+            content = b"".join(download.streaming_content)
+            sheet = openpyxl.load_workbook(io.BytesIO(content)).active
+            self.assertEqual(sheet["B4"].value, "personel")
+
+            # Başka kullanıcı indiremez
+            other = User.objects.create_user(username="baska", password="x", role="firma", is_manager=True)
+            self.client.force_login(other)
+            self.assertEqual(self.client.get(status["download_url"]).status_code, 404)
+
+            # TTL dolunca dosya silinir
+            job.refresh_from_db()
+            path = job.file.path
+            self.assertEqual(expire_jobs(now=job.expires_at), 1)
+            job.refresh_from_db()
+            self.assertEqual(job.status, "expired")
+            self.assertFalse(os.path.exists(path))
+
+            # Yeni istek yeni iş açar
+            self.client.force_login(self.manager)
+            self.client.get("/products/export/staff/")
+            self.assertEqual(ExportJob.objects.filter(status="pending").count(), 1)
+
+    def test_running_job_keeps_lease_and_stale_worker_does_not_finish(self):
+        import os
+        import tempfile
+        from datetime import timedelta
+        from django.test import override_settings
+        from django.utils import timezone
+        from .export_jobs import beat, claim_next_job, requeue_stale_jobs, run_job
+        from .models import ExportJob, Notification
+
+        media_root = tempfile.mkdtemp()
+        with override_settings(MEDIA_ROOT=media_root):
+            self.client.get("/products/export/staff/")
+            job = claim_next_job("host:1")
+
+            # Uzun süren ama heartbeat atan iş yeniden kuyruğa alınmaz
+            long_ago = timezone.now() - timedelta(hours=2)
+            ExportJob.objects.filter(id=job.id).update(started_at=long_ago)
+            self.assertTrue(beat(job))
+            self.assertEqual(requeue_stale_jobs(), (0, 0))
+
+            # Heartbeat kesildi: iş başka worker'a geçer
+            ExportJob.objects.filter(id=job.id).update(heartbeat_at=long_ago)
+            self.assertEqual(requeue_stale_jobs(), (1, 0))
+            self.assertFalse(beat(job))
+            second = claim_next_job("host:2")
+
+            # Eski worker bitirse de sonucu yazmaz, dosyası kalmaz, bildirim gitmez
+            run_job(job)
+            self.assertEqual(os.listdir(os.path.join(media_root, "exports")), [])
+            second.refresh_from_db()
+            self.assertEqual((second.status, second.worker, second.file.name), ("running", "host:2", ""))
+            self.assertFalse(Notification.objects.exists())
+
+            run_job(second)
+            second.refresh_from_db()
+            self.assertEqual(second.status, "done")
+            self.assertEqual(Notification.objects.count(), 1)
+
+
+class OfferDocumentCacheTests(TestCase):
+
+    def setUp(self):
+        import tempfile
+        from accounts.models import Address
+
+        self.cache_dir = tempfile.mkdtemp()
+        self.user = User.objects.create_user(username="firma", password="x", role="firma", is_manager=True)
+        self.address = Address.objects.create(user=self.user, title="Depo", city="Ankara", address_line="Adres")
+        product = Product.objects.create(name="PAROL", price=Decimal("20.00"), vat_rate=10)
+        self.offer = Offer.objects.create(user=self.user, status="approved")
+        self.item = OfferItem.objects.create(
+            offer=self.offer, product=product, quantity=1, unit_price=0, vat_rate=0, delivery_address=self.address,
+        )
+        self.client.force_login(self.user)
+
+    def download(self, fmt="pdf"):
+        from unittest import mock
+        from django.test import override_settings
+        from . import views
+
+        url = f"/products/export/offer/{self.offer.id}/{'excel' if fmt == 'xlsx' else fmt}/"
+        name = "_render_offer_excel" if fmt == "xlsx" else "render_offer_pdf"
+        with override_settings(OFFER_DOCUMENT_CACHE_DIR=self.cache_dir), \
+                mock.patch.object(views, name, wraps=getattr(views, name)) as spy:
+            response = self.client.get(url)
+            content = b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        return content, spy.call_count
+
+    def test_cached_until_offer_items_or_address_change(self):
+        import os
+
+        content, renders = self.download()
+        self.assertTrue(content.startswith(b"%PDF"))
+        self.assertEqual(renders, 1)
+        self.assertEqual(self.download(), (content, 0))
+        self.assertEqual(self.download("xlsx")[1], 1)
+
+        # Kalem, fatura alanı ve teslimat adresi değişiklikleri versiyonu artırır
+        versions = [Offer.objects.get(id=self.offer.id).document_version]
+        self.item.quantity = 3
+        self.item.save()
+        versions.append(Offer.objects.get(id=self.offer.id).document_version)
+        self.offer.refresh_from_db()
+        self.offer.invoice_number = "FTR-1"
+        self.offer.save()
+        versions.append(Offer.objects.get(id=self.offer.id).document_version)
+        self.address.city = "İzmir"
+        self.address.save()
+        versions.append(Offer.objects.get(id=self.offer.id).document_version)
+        self.assertEqual(versions, sorted(set(versions)))
+
+        self.assertEqual(self.download()[1], 1)
+        # Eski versiyonun dosyası silinir
+        self.assertEqual(len([name for name in os.listdir(self.cache_dir) if name.endswith(".pdf")]), 1)
+
+    def test_stale_instance_save_does_not_reuse_version(self):
+        offer = Offer.objects.get(id=self.offer.id)
+        # Kalem değişikliği versiyonu veritabanında artırır, offer nesnesi eski kalır
+        self.item.quantity = 5
+        self.item.save()
+        after_item = Offer.objects.get(id=self.offer.id).document_version
+
+        offer.status = "sent"
+        offer.save()
+        self.assertEqual(Offer.objects.get(id=self.offer.id).document_version, after_item + 1)
+
+    def test_lru_eviction_and_coalesced_render(self):
+        import os
+        import threading
+        import time
+        from .documents import OfferDocumentCache
+
+        cache = OfferDocumentCache(directory=self.cache_dir, max_bytes=2500)
+        offers = [SimpleNamespace(pk=pk, document_version=1) for pk in range(4)]
+
+        def render(output):
+            output.write(b"x" * 1000)
+
+        for offer in offers[:2]:
+            cache.open(offer, "pdf", render).close()
+            time.sleep(0.01)
+        cache.open(offers[0], "pdf", render).close()  # 0 son erişilen
+        time.sleep(0.01)
+        cache.open(offers[2], "pdf", render).close()
+        names = sorted(name for name in os.listdir(self.cache_dir) if name.endswith(".pdf"))
+        self.assertEqual(names, [cache.path_for(offers[0], "pdf").name, cache.path_for(offers[2], "pdf").name])
+
+        calls = []
+
+        def slow_render(output):
+            calls.append(1)
+            time.sleep(0.2)
+            output.write(b"pdf")
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.open(offers[3], "pdf", slow_render).read()))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [b"pdf"] * 5)
+
+
+class BatchPdfExportTests(TestCase):
+
+    def setUp(self):
+        from datetime import datetime
+        from django.utils import timezone
+
+        self.manager = User.objects.create_user(
+            username="yonetici", password="x", role="firma", is_manager=True, company_name="Acme",
+        )
+        staff = User.objects.create_user(username="personel", password="x", role="firma", manager=self.manager)
+        other = User.objects.create_user(username="baska", password="x", role="firma", is_manager=True)
+        self.pharmacist = User.objects.create_user(username="eczaci", password="x", role="eczane")
+        product = Product.objects.create(name="PAROL", price=Decimal("20.00"), vat_rate=10)
+
+        def add_offer(user, day, status="approved"):
+            offer = Offer.objects.create(user=user, status=status)
+            Offer.objects.filter(id=offer.id).update(
+                approved_at=timezone.make_aware(datetime(2026, 3, day, 12)) if status == "approved" else None,
+            )
+            OfferItem.objects.create(offer=offer, product=product, quantity=1, unit_price=0, vat_rate=0)
+            return offer.id
+
+        self.march_1 = [add_offer(self.manager, 1), add_offer(staff, 1), add_offer(other, 1)]
+        self.march_2 = add_offer(self.manager, 2)
+        add_offer(self.manager, 1, status="draft")
+
+    def run_batch(self, user, data):
+        import io
+        import tempfile
+        from django.core.management import call_command
+        from django.test import override_settings
+        from .models import ExportJob
+
+        self.client.force_login(user)
+        with override_settings(MEDIA_ROOT=tempfile.mkdtemp(), OFFER_DOCUMENT_CACHE_DIR=tempfile.mkdtemp(),
+                               OFFER_PDF_BATCH_PROCESSES=1):
+            response = self.client.post("/products/export/offers/pdf/", data)
+            job = ExportJob.objects.get(user=user)
+            self.assertRedirects(response, f"/products/export/jobs/{job.id}/")
+            call_command("run_export_worker", "--once", stdout=io.StringIO())
+
+            status = self.client.get(response.url, {"format": "json"}).json()
+            self.assertEqual(status["status"], "done")
+            self.assertEqual(status["progress"], status["total"])
+            download = self.client.get(status["download_url"])
+            return download, b"".join(download.streaming_content)
+
+    def test_zip_follows_single_offer_permissions(self):
+        import io
+        import zipfile
+
+        data = {"status": "approved", "date_from": "2026-03-01", "date_to": "2026-03-01"}
+        download, content = self.run_batch(self.manager, data)
+        self.assertEqual(download["Content-Type"], "application/zip")
+        # Yönetici kendi + personelinin tekliflerini alır, başka firmanınkini almaz
+        names = zipfile.ZipFile(io.BytesIO(content)).namelist()
+        self.assertEqual(names, [f"teklif_{offer_id}.pdf" for offer_id in self.march_1[:2]])
+
+    def test_merged_pdf_with_bookmarks_and_firm_filter(self):
+        download, content = self.run_batch(self.pharmacist, {"firm": self.manager.id, "merge": "1"})
+        self.assertEqual(download["Content-Type"], "application/pdf")
+        self.assertTrue(content.startswith(b"%PDF"))
+        self.assertIn(b"/Outlines", content)
+        self.assertEqual(content.count(b"Teklif #"), 3)
+
+    def test_invalid_or_empty_filter_does_not_enqueue(self):
+        from .models import ExportJob
+
+        self.client.force_login(self.manager)
+        self.client.post("/products/export/offers/pdf/", {"date_from": "03/01/2026"})
+        self.client.post("/products/export/offers/pdf/", {"status": "rejected"})
+        self.assertFalse(ExportJob.objects.exists())
+
+
+class OfferPdfLayoutTests(TestCase):
+
+    def test_turkish_text_markup_and_missing_pharmacy_fields(self):
+        import io
+        from .export_data import export_offers
+        from .offer_pdf import FONT, FONT_NAME, render_offer_pdf
+
+        firm = User.objects.create_user(
+            username="firma", password="x", role="firma", is_manager=True, company_name="Şahin & Oğulları <Ecza>",
+        )
+        # Eczane alanları boş eczacı (önceden Paragraph(None) hatası veriyordu)
+        pharmacist = User.objects.create_user(username="eczaci", password="x", role="eczane", is_manager=True)
+        product = Product.objects.create(name="İlaç <Şurup>", price=Decimal("20.00"), vat_rate=10)
+        offer = Offer.objects.create(user=firm, status="approved", approved_by=pharmacist)
+        OfferItem.objects.create(offer=offer, product=product, quantity=2, unit_price=0, vat_rate=0)
+
+        output = io.BytesIO()
+        render_offer_pdf(export_offers().get(id=offer.id), output)
+        content = output.getvalue()
+        self.assertTrue(content.startswith(b"%PDF"))
+        # TTF alt kümesi gömülür
+        self.assertEqual(FONT, FONT_NAME)
+        self.assertIn(b"/FontFile2", content)
+
+    def test_large_offer_renders_in_page_sized_tables(self):
+        import io
+        from reportlab.platypus import Paragraph, Table
+        from .export_data import export_offers
+        from .offer_pdf import ITEMS_HEADER_LABELS, ITEMS_PER_TABLE, offer_story, render_offer_pdf
+
+        firm = User.objects.create_user(username="firma", password="x", role="firma", is_manager=True)
+        short = Product.objects.create(name="PAROL", price=Decimal("20.00"), vat_rate=10)
+        long = Product.objects.create(name="Uzun ürün adı " * 8, price=Decimal("20.00"), vat_rate=10)
+        offer = Offer.objects.create(user=firm, status="sent")
+        for i in range(ITEMS_PER_TABLE * 2 + 5):
+            OfferItem(
+                offer=offer, product=long if i == 0 else short, quantity=1, unit_price=0, vat_rate=0,
+            ).save(update_totals=False)
+        offer.refresh_totals()
+        offer = export_offers().get(id=offer.id)
+
+        tables = [flowable for flowable in offer_story(offer) if isinstance(flowable, Table)]
+        item_tables = [table for table in tables if table.repeatRows == 1]
+        # 85 kalem + TOPLAM satırı → 40 + 40 + 6, her parçada başlık
+        self.assertEqual([len(table._cellvalues) for table in item_tables], [41, 41, 7])
+        for table in item_tables:
+            self.assertEqual([cell.text for cell in table._cellvalues[0]], [f"<b>{text}</b>" for text in ITEMS_HEADER_LABELS])
+        first_rows = item_tables[0]._cellvalues
+        self.assertIsInstance(first_rows[1][1], Paragraph)  # sığmayan ürün adı sarılır
+        self.assertEqual(first_rows[2][1], "PAROL")
+        self.assertEqual(item_tables[-1]._cellvalues[-1][1], "TOPLAM")
+
+        output = io.BytesIO()
+        render_offer_pdf(offer, output)
+        self.assertTrue(output.getvalue().startswith(b"%PDF"))
+
+    def test_renders_do_not_share_paragraphs(self):
+        from reportlab.platypus import Paragraph, Table
+        from .export_data import export_offers
+        from .offer_pdf import offer_story
+
+        firm = User.objects.create_user(username="firma", password="x", role="firma", is_manager=True)
+        product = Product.objects.create(name="PAROL", price=Decimal("20.00"), vat_rate=10)
+        offer = Offer.objects.create(user=firm, status="sent")
+        OfferItem.objects.create(offer=offer, product=product, quantity=1, unit_price=0, vat_rate=0)
+        offer = export_offers().get(id=offer.id)
+
+        def paragraphs(story):
+            # reportlab wrap/split sırasında flowable'a yazar: render'lar aynı nesneyi görmemeli
+            found = []
+            for flowable in story:
+                if isinstance(flowable, Table):
+                    found += [cell for row in flowable._cellvalues for cell in row if isinstance(cell, Paragraph)]
+                elif isinstance(flowable, Paragraph):
+                    found.append(flowable)
+            return found
+
+        first, second = paragraphs(offer_story(offer)), paragraphs(offer_story(offer))
+        self.assertTrue(first)
+        self.assertFalse({id(p) for p in first} & {id(p) for p in second})
+        self.assertFalse({id(p.frags) for p in first} & {id(p.frags) for p in second})
+
+    def test_benchmark_command_leaves_no_data(self):
+        import io
+        from django.core.management import call_command
+
+        out = io.StringIO()
+        call_command("benchmark_offer_pdf", "--lines", "1", "5", "--repeat", "1", stdout=out)
+        rows = out.getvalue().splitlines()[2:]
+        self.assertEqual([int(row.split()[0]) for row in rows], [1, 5])
+        self.assertFalse(User.objects.filter(username="pdf_benchmark").exists())
+        self.assertFalse(Offer.objects.exists())
+
+
+class NotificationCounterTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="firma", password="x", role="firma", is_manager=True)
+        self.client.force_login(self.user)
+
+    def notify(self, **kwargs):
+        from .permissions_helpers import create_notification
+
+        return create_notification(user=self.user, title="Başlık", message="Mesaj", **kwargs)
+
+    def counter(self):
+        return User.objects.get(pk=self.user.pk).unread_notification_count
+
+    def test_counter_follows_create_read_and_delete(self):
+        offer = Offer.objects.create(user=self.user, status="sent")
+        first = self.notify()
+        self.notify()
+        self.notify(offer=offer)
+        self.assertEqual(self.counter(), 3)
+
+        # Aynı bildirimi iki kez okumak sayacı bir kez azaltır
+        for _ in range(2):
+            response = self.client.post(f"/products/notifications/{first.id}/mark-read/")
+            self.assertEqual(response.json()["unread_count"], 2)
+
+        # Teklifle birlikte silinen okunmamış bildirim sayaçtan düşer
+        offer.delete()
+        self.assertEqual(self.counter(), 1)
+
+        response = self.client.post("/products/notifications/mark-all-read/")
+        self.assertEqual(response.json()["unread_count"], 0)
+        first.delete()
+        self.assertEqual(self.counter(), 0)
+
+    def test_context_processor_without_queries_and_lazy_dropdown(self):
+        from django.test import RequestFactory
+        from .context_processors import notifications
+        from .notifications import recount_unread
+
+        for i in range(12):
+            self.notify()
+        User.objects.filter(pk=self.user.pk).update(unread_notification_count=0)
+        recount_unread()
+        self.assertEqual(self.counter(), 12)
+
+        request = RequestFactory().get("/")
+        request.user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(notifications(request), {"unread_count": 12})
+
+        data = self.client.get("/products/notifications/").json()
+        self.assertEqual(data["unread_count"], 12)
+        self.assertEqual(len(data["notifications"]), 10)
+        self.assertEqual(data["notifications"][0]["title"], "Başlık")
+
+
+class NotificationDispatchTests(TestCase):
+
+    def setUp(self):
+        def firma(username, **kwargs):
+            return User.objects.create_user(username=username, password="x", role="firma", is_approved=True, **kwargs)
+
+        self.owner = firma("sahip", is_manager=True)
+        self.deputy = firma("yardimci", is_manager=True, manager=self.owner)
+        self.staff = firma("personel", manager=self.owner)
+        # Başka firmanın yöneticisi bildirim almamalı
+        self.other = firma("baska", is_manager=True)
+
+    def counters(self):
+        return dict(User.objects.values_list("username", "unread_notification_count"))
+
+    def test_approval_request_is_scoped_to_firm_and_bulk_inserted(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .models import Notification
+        from .permissions_helpers import notify_manager_for_approval
+
+        offer = Offer.objects.create(user=self.staff, status="draft")
+        offer = Offer.objects.select_related("user").get(pk=offer.pk)
+        with CaptureQueriesContext(connection) as queries:
+            notify_manager_for_approval(offer)
+        inserts = [q for q in queries.captured_queries if q["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 1)
+
+        self.assertEqual(
+            set(Notification.objects.values_list("user__username", flat=True)),
+            {"sahip", "yardimci"},
+        )
+        self.assertEqual(
+            self.counters(),
+            {"sahip": 1, "yardimci": 1, "personel": 0, "baska": 0},
+        )
+
+        # Yöneticisi olmayan kullanıcı: kendi firmasındaki diğer yöneticiler
+        Notification.objects.all().delete()
+        notify_manager_for_approval(Offer.objects.create(user=self.owner, status="draft"))
+        self.assertEqual(list(Notification.objects.values_list("user__username", flat=True)), ["yardimci"])
+
+    def test_approval_request_walks_manager_chain_to_firm_root(self):
+        from .models import Notification
+        from .permissions_helpers import notify_manager_for_approval
+
+        # Üç seviye: sahip → yardimci → alt personel
+        junior = User.objects.create_user(
+            username="alt_personel", password="x", role="firma", is_approved=True, manager=self.deputy,
+        )
+        notify_manager_for_approval(Offer.objects.create(user=junior, status="draft"))
+        self.assertEqual(
+            set(Notification.objects.values_list("user__username", flat=True)),
+            {"sahip", "yardimci"},
+        )
+
+    def test_status_notifications_update_counter(self):
+        from .notifications import unread_count
+        from .permissions_helpers import notify_on_offer_status_change, notify_user_on_manager_approval
+
+        offer = Offer.objects.create(user=self.staff, status="sent")
+        notify_user_on_manager_approval(offer, approved=True)
+        notify_on_offer_status_change(offer, "sent", "approved")
+        notify_on_offer_status_change(offer, "sent", "draft")
+        self.assertEqual(unread_count(self.staff), 2)
+        self.assertEqual(self.staff.notifications.count(), 2)
+
+
+class NotificationStreamTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="akis", password="x", role="firma")
+        self.other = User.objects.create_user(username="diger", password="x", role="firma")
+
+    def send(self, user):
+        from .permissions_helpers import create_notification
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_notification(user=user, title="Yeni teklif", message="Mesaj")
+
+    def test_stream_is_not_opened_under_wsgi(self):
+        self.assertEqual(self.client.get("/products/notifications/stream/").status_code, 401)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get("/products/notifications/stream/").status_code, 204)
+
+    async def test_new_notification_is_pushed_to_open_stream(self):
+        import asyncio
+        from asgiref.sync import sync_to_async
+        from django.test import override_settings
+        from .notification_stream import notification_bus, notification_events
+
+        with override_settings(NOTIFICATION_STREAM_POLL_INTERVAL=0):
+            await sync_to_async(self.send)(self.user)  # bağlantıdan önceki bildirim gönderilmez
+            events = notification_events(self.user.pk)
+            self.assertTrue((await anext(events)).startswith("retry:"))
+
+            pending = asyncio.ensure_future(anext(events))
+            await sync_to_async(self.send)(self.other)
+            await sync_to_async(self.send)(self.user)
+            chunk = await asyncio.wait_for(pending, 5)
+            await events.aclose()
+
+        self.assertIn("event: notification", chunk)
+        self.assertIn('"title": "Yeni teklif"', chunk)
+        self.assertIn('"unread_count": 2', chunk)
+        self.assertEqual(notification_bus.subscriptions, {})
+
+    async def test_poller_wakes_streams_for_rows_from_other_workers(self):
+        import asyncio
+        from asgiref.sync import sync_to_async
+        from django.test import override_settings
+        from .models import Notification
+        from .notification_stream import NotificationBus, max_notification_id
+
+        with override_settings(NOTIFICATION_STREAM_POLL_INTERVAL=0):
+            bus = NotificationBus()
+            cursor = await sync_to_async(max_notification_id)()
+            mine = bus.subscribe(self.user.pk, cursor)
+            theirs = bus.subscribe(self.other.pk, cursor)
+
+            # Başka süreçte oluşmuş gibi: bu süreçte yayın yapılmadan yazılan satır
+            await sync_to_async(Notification.objects.create)(user=self.user, title="Başlık", message="Mesaj")
+            await bus.poll_once()
+            await asyncio.sleep(0)  # uyandırma event loop'un sıradaki turunda işlenir
+            self.assertTrue(mine.event.is_set())
+            self.assertFalse(theirs.event.is_set())
+            self.assertEqual(bus.last_id, await sync_to_async(max_notification_id)())
+
+
+class NotificationRetentionTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="yonetici", password="x", role="firma", is_manager=True)
+
+    def notify(self, title="Yönetici Onayı Gerekli", **kwargs):
+        from .permissions_helpers import create_notification
+
+        return create_notification(user=self.user, title=title, message="Mesaj", notification_type="warning", **kwargs)
+
+    def test_repeated_notifications_collapse_into_digest(self):
+        from .models import Notification, NotificationArchive
+        from .notification_retention import collapse_digests
+        from .notifications import recount_unread, unread_count
+
+        first = self.notify()
+        for _ in range(4):
+            self.notify()
+        latest = self.notify()
+        self.notify(title="Teklifiniz Onaylandı")
+        first.mark_as_read()  # okunmuş satır ayrı grupta kalır
+        self.assertEqual(unread_count(self.user), 6)
+
+        self.assertEqual(collapse_digests(), 4)
+        self.assertEqual(Notification.objects.count(), 3)
+        digest = Notification.objects.get(pk=latest.pk)
+        self.assertEqual((digest.digest_count, digest.message), (5, "Mesaj (+4 benzer bildirim)"))
+        self.assertEqual(unread_count(self.user), 2)
+        # Toplanan satırlar silinmeden arşive kopyalanır
+        self.assertEqual(NotificationArchive.objects.filter(user=self.user).count(), 4)
+
+        # Tekrar toplanınca ek mesaj birikmez
+        for _ in range(2):
+            self.notify()
+        collapse_digests(min_count=2)
+        digest = Notification.objects.filter(title="Yönetici Onayı Gerekli", is_read=False).get()
+        self.assertEqual((digest.digest_count, digest.message), (7, "Mesaj (+6 benzer bildirim)"))
+
+        # Sayaç tablodan yeniden hesaplanan değerle aynı
+        recount_unread()
+        self.assertEqual(unread_count(self.user), 2)
+
+    def test_approval_requests_for_different_offers_are_not_merged(self):
+        from .models import Notification
+        from .notification_retention import collapse_digests
+        from .notifications import unread_count
+
+        offers = [Offer.objects.create(user=self.user, status="draft") for _ in range(2)]
+        for offer in offers:
+            self.notify(offer=offer, link=f"/products/my-offers/{offer.id}/")
+            self.notify(offer=offer, link=f"/products/my-offers/{offer.id}/")
+
+        self.assertEqual(collapse_digests(min_count=2), 2)
+        remaining = Notification.objects.filter(user=self.user, is_read=False).order_by("offer_id")
+        self.assertEqual(
+            [(n.offer_id, n.link, n.digest_count) for n in remaining],
+            [(offer.id, f"/products/my-offers/{offer.id}/", 2) for offer in offers],
+        )
+        self.assertEqual(unread_count(self.user), 2)
+
+    def test_old_read_notifications_move_to_archive_in_batches(self):
+        import io
+        from datetime import timedelta
+        from django.core.management import call_command
+        from django.utils import timezone
+        from .models import Notification, NotificationArchive
+
+        old = [self.notify(title=f"Bildirim {i}") for i in range(5)]
+        fresh = self.notify(title="Yeni")
+        unread_old = self.notify(title="Okunmamış")
+        Notification.objects.filter(pk__in=[n.pk for n in old] + [unread_old.pk]).update(
+            created_at=timezone.now() - timedelta(days=40),
+        )
+        Notification.objects.filter(pk__in=[n.pk for n in old] + [fresh.pk]).update(is_read=True)
+        User.objects.filter(pk=self.user.pk).update(unread_notification_count=1)
+
+        call_command("archive_notifications", "--days", "30", "--batch-size", "2", stdout=io.StringIO())
+
+        self.assertEqual(set(Notification.objects.values_list("pk", flat=True)), {fresh.pk, unread_old.pk})
+        self.assertEqual(NotificationArchive.objects.count(), 5)
+        archived = NotificationArchive.objects.get(pk=old[0].pk)
+        self.assertEqual((archived.user_id, archived.title), (self.user.pk, "Bildirim 0"))
+        self.assertEqual(User.objects.get(pk=self.user.pk).unread_notification_count, 1)
+
+
+class ActivityLogWriterTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="logcu", password="x", role="firma")
+
+    def test_sync_mode_writes_immediately_with_forwarded_ip(self):
+        from django.test import RequestFactory
+        from .models import ActivityLog
+        from .permissions_helpers import log_activity
+
+        request = RequestFactory().get("/", HTTP_X_FORWARDED_FOR="10.1.2.3, 172.16.0.1")
+        log = log_activity(self.user, "offer_sent", "Gönderildi", request=request)
+        self.assertIsNotNone(log.pk)
+        self.assertEqual(ActivityLog.objects.get().ip_address, "10.1.2.3")
+
+    def test_async_writer_batches_after_commit(self):
+        from django.test import override_settings
+        from .activity_log import ActivityLogWriter
+        from .models import ActivityLog
+
+        batches = []
+        writer = ActivityLogWriter(write_batch=lambda logs: batches.append([log.description for log in logs]))
+
+        def log(i):
+            return ActivityLog(user=self.user, action="offer_sent", description=str(i))
+
+        with override_settings(ACTIVITY_LOG_ASYNC=True, ACTIVITY_LOG_BATCH_SIZE=3, ACTIVITY_LOG_FLUSH_MS=60000):
+            # Geri alınan transaction'ın logu kuyruğa girmez
+            with self.captureOnCommitCallbacks(execute=False):
+                writer.write(log("geri alındı"))
+            with self.captureOnCommitCallbacks(execute=True):
+                for i in range(7):
+                    writer.write(log(i))
+            writer.flush()
+            writer.shutdown()
+
+        self.assertEqual(batches, [["0", "1", "2"], ["3", "4", "5"], ["6"]])
+        self.assertIsNone(writer.thread)
+
+    def test_locked_database_is_retried_not_dropped(self):
+        from unittest import mock
+        from django.db import OperationalError
+        from django.test import override_settings
+        from . import activity_log
+        from .models import ActivityLog
+
+        locked = OperationalError("database is locked")
+        bulk_create = ActivityLog.objects.bulk_create
+        failures = iter([locked, locked])
+
+        def flaky_bulk_create(logs):
+            error = next(failures, None)
+            if error:
+                raise error
+            return bulk_create(logs)
+
+        # İstek içinde yazma: kilit birkaç denemede açılır
+        with mock.patch.object(activity_log, "LOCK_RETRY_DELAY", 0), \
+                mock.patch.object(ActivityLog.objects, "bulk_create", side_effect=flaky_bulk_create):
+            activity_log.write_logs([ActivityLog(user=self.user, action="offer_sent", description="kilit")])
+        self.assertTrue(ActivityLog.objects.filter(description="kilit").exists())
+
+        # Kilit açılmazsa hata yükselir; kayıt sessizce atılmaz
+        with mock.patch.object(activity_log, "LOCK_RETRY_DELAY", 0), \
+                mock.patch.object(ActivityLog.objects, "bulk_create", side_effect=locked):
+            with self.assertRaises(OperationalError):
+                activity_log.write_logs([ActivityLog(user=self.user, action="offer_sent", description="x")])
+
+        # Arka plan thread'i partiyi tutar ve sonraki turda yazar
+        batches = []
+        attempts = iter([locked])
+
+        def write_batch(logs):
+            error = next(attempts, None)
+            if error:
+                raise error
+            batches.append([log.description for log in logs])
+
+        writer = activity_log.ActivityLogWriter(write_batch=write_batch)
+        with override_settings(ACTIVITY_LOG_ASYNC=True, ACTIVITY_LOG_FLUSH_MS=10):
+            with self.captureOnCommitCallbacks(execute=True):
+                writer.write(ActivityLog(user=self.user, action="offer_sent", description="arka plan"))
+            writer.flush()
+            writer.shutdown()
+        self.assertEqual(batches, [["arka plan"]])
+
+
+class ActivityLogArchiveTests(TestCase):
+
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .models import ActivityLog
+
+        self.user = User.objects.create_user(username="denetim", password="x", role="firma")
+        self.other = User.objects.create_user(username="diger", password="x", role="firma")
+        self.offer = Offer.objects.create(user=self.user, status="sent")
+        now = timezone.now()
+
+        def log(user, days_ago, offer=None):
+            return ActivityLog.objects.create(
+                user=user, action="offer_sent", description=f"{days_ago} gün önce", offer=offer,
+                metadata={"tutar": "1.500,00"}, created_at=now - timedelta(days=days_ago),
+            )
+
+        self.recent = log(self.user, 1, self.offer)
+        self.older = log(self.user, 400, self.offer)
+        self.oldest = log(self.user, 470, self.offer)
+        self.others = [log(self.other, 470) for _ in range(3)]
+
+    def test_closed_months_move_to_compressed_archive_and_stay_searchable(self):
+        import io
+        import tempfile
+        from django.core.management import call_command
+        from django.test import override_settings
+        from django.utils import timezone
+        from .activity_archive import archive_path, read_month_file, search_activity_logs
+        from .models import ActivityLog, ActivityLogArchive
+
+        with override_settings(ACTIVITY_LOG_ARCHIVE_DIR=tempfile.mkdtemp()):
+            call_command("archive_activity_logs", "--hot-months", "12", "--batch-size", "2", stdout=io.StringIO())
+
+            self.assertEqual(list(ActivityLog.objects.values_list("pk", flat=True)), [self.recent.pk])
+            partitions = list(ActivityLogArchive.objects.order_by("month"))
+            self.assertEqual([p.row_count for p in partitions], [4, 1])
+            self.assertEqual(partitions[0].user_ids, sorted([self.user.pk, self.other.pk]))
+            rows = list(read_month_file(archive_path(partitions[0].month)))
+            self.assertEqual(rows[0]["metadata"], {"tutar": "1.500,00"})
+
+            by_offer = search_activity_logs(offer=self.offer)
+            self.assertEqual([log.pk for log in by_offer], [self.recent.pk, self.older.pk, self.oldest.pk])
+            self.assertTrue(by_offer[-1].archived)
+            self.assertEqual(by_offer[-1].created_at, self.oldest.created_at)
+
+            self.assertEqual(len(search_activity_logs(user=self.other)), 3)
+            self.assertEqual([log.pk for log in search_activity_logs(user=self.user, limit=2)],
+                             [self.recent.pk, self.older.pk])
+            day = timezone.localtime(self.older.created_at).date()
+            self.assertEqual([log.pk for log in search_activity_logs(date_from=day, date_to=day)], [self.older.pk])
+
+            # Tekrar çalıştırmak bir şey taşımaz
+            call_command("archive_activity_logs", stdout=io.StringIO())
+            self.assertEqual(ActivityLogArchive.objects.count(), 2)
@@ -0,0 +1,165 @@
+"""
+Teklif Toplam Hesapları
+
+Offer / OfferItem üzerindeki tüm tutarlar buradan hesaplanır.
+OfferTotals, önceden yüklenmiş item listesi üzerinden tek geçişte
+satır ve teklif toplamlarını çıkarır; model property'leri buna delege eder.
+
+Hesaplar tam sayı kuruş ile yapılır (bkz. money.py); *_kurus attribute'ları
+ham değerlerdir, aynı isimli Decimal alanlar template/export içindir.
+"""
+from .money import KurusField, div_half_up, percent_of, to_kurus, to_rate, PERCENT_SCALE
+
+
+class LineTotals:
+    """
+    Tek bir teklif satırının hesapları.
+
+    Args:
+        quantity: Adet
+        unit_price: KDV hariç birim fiyat
+        vat_rate: KDV oranı (%)
+        discount_type: none / percent / amount
+        discount_value: İskonto değeri
+    """
+
+    __slots__ = (
+        "quantity", "vat_rate_scaled", "unit_price_kurus",
+        "unit_discount_kurus", "discounted_unit_price_kurus",
+        "line_subtotal_kurus", "discount_kurus", "vat_kurus", "total_kurus",
+        "gross_line_subtotal_kurus", "gross_vat_kurus", "gross_total_kurus",
+        "vat_after_overall_discount_kurus",
+    )
+
+    unit_price = KurusField("unit_price_kurus")
+    unit_discount_amount = KurusField("unit_discount_kurus")
+    discounted_unit_price = KurusField("discounted_unit_price_kurus")
+    line_subtotal = KurusField("line_subtotal_kurus")
+    discount_amount = KurusField("discount_kurus")
+    vat_amount = KurusField("vat_kurus")
+    total_price = KurusField("total_kurus")
+    gross_line_subtotal = KurusField("gross_line_subtotal_kurus")
+    gross_vat_amount = KurusField("gross_vat_kurus")
+    gross_total_price = KurusField("gross_total_kurus")
+    vat_after_overall_discount = KurusField("vat_after_overall_discount_kurus")
+
+    def __init__(self, quantity, unit_price, vat_rate, discount_type, discount_value):
+        unit_price = to_kurus(unit_price)
+        rate = to_rate(vat_rate)
+        self.quantity = quantity
+        self.unit_price_kurus = unit_price
+        self.vat_rate_scaled = rate
+
+        # İskonto (birim başına)
+        if discount_type == "percent":
+            unit_discount = percent_of(unit_price, to_rate(discount_value))
+        elif discount_type == "amount":
+            # ₺ iskontu birim fiyata düşür, eksi olamaz
+            unit_discount = min(to_kurus(discount_value), unit_price)
+        else:
+            unit_discount = 0
+        self.unit_discount_kurus = unit_discount
+        self.discounted_unit_price_kurus = max(unit_price - unit_discount, 0)
+
+        # İskontolu (net)
+        line = self.discounted_unit_price_kurus * quantity
+        self.line_subtotal_kurus = line
+        self.discount_kurus = unit_discount * quantity
+        self.vat_kurus = percent_of(line, rate)
+        self.total_kurus = line + self.vat_kurus
+
+        # İskontosuz (gross)
+        gross_line = unit_price * quantity
+        self.gross_line_subtotal_kurus = gross_line
+        self.gross_vat_kurus = percent_of(gross_line, rate)
+        self.gross_total_kurus = gross_line + self.gross_vat_kurus
+
+        # Genel iskonto sonrası KDV OfferTotals tarafından doldurulur
+        self.vat_after_overall_discount_kurus = self.vat_kurus
+
+    @classmethod
+    def for_item(cls, item):
+        return cls(item.quantity, item.unit_price, item.vat_rate, item.discount_type, item.discount_value)
+
+
+class OfferTotals:
+    """
+    Bir teklifin tüm toplamları.
+
+    Item listesi bir kez dolaşılır; genel iskontonun satırlara orantılı
+    dağıtımı (KDV için) aynı satır sonuçları üzerinden yapılır.
+    """
+
+    items_subtotal_net = KurusField("items_subtotal_net_kurus")
+    items_subtotal_gross = KurusField("items_subtotal_gross_kurus")
+    items_net_after_item_discounts = KurusField("items_net_after_item_discounts_kurus")
+    items_vat_after_item_discounts = KurusField("items_vat_after_item_discounts_kurus")
+    items_gross_after_item_discounts = KurusField("items_gross_after_item_discounts_kurus")
+    total_item_discounts = KurusField("total_item_discounts_kurus")
+    overall_discount_amount = KurusField("overall_discount_kurus")
+    net_after_overall_discount = KurusField("net_after_overall_discount_kurus")
+    vat_after_overall_discount = KurusField("vat_after_overall_discount_kurus")
+    final_total = KurusField("final_total_kurus")
+    discount_total = KurusField("discount_total_kurus")
+
+    def __init__(self, lines, overall_discount_type="none", overall_discount_value=0):
+        self.lines = list(lines)
+        self.item_count = len(self.lines)
+
+        subtotal_net = subtotal_gross = net_after_items = vat_after_items = gross_after_items = 0
+        for line in self.lines:
+            subtotal_net += line.gross_line_subtotal_kurus
+            subtotal_gross += line.gross_total_kurus
+            net_after_items += line.line_subtotal_kurus
+            vat_after_items += line.vat_kurus
+            gross_after_items += line.total_kurus
+
+        self.items_subtotal_net_kurus = subtotal_net
+        self.items_subtotal_gross_kurus = subtotal_gross
+        self.items_net_after_item_discounts_kurus = net_after_items
+        self.items_vat_after_item_discounts_kurus = vat_after_items
+        self.items_gross_after_item_discounts_kurus = gross_after_items
+        self.total_item_discounts_kurus = subtotal_net - net_after_items
+
+        # Genel iskonto
+        if overall_discount_type == "percent":
+            overall = percent_of(net_after_items, to_rate(overall_discount_value))
+        elif overall_discount_type == "amount":
+            # Genel ₺ iskonto, net toplama capped
+            overall = min(to_kurus(overall_discount_value), net_after_items)
+        else:
+            overall = 0
+        self.overall_discount_kurus = overall
+        self.net_after_overall_discount_kurus = net_after_items - overall
+
+        # Genel iskonto sonrası KDV: her satırın oranı korunarak
+        #   (satır - genel iskonto × satır / net) × oran
+        # kesirli değer tek adımda ROUND_HALF_UP ile kuruşa yuvarlanır
+        total_vat = 0
+        if net_after_items > 0:
+            remaining = net_after_items - overall
+            denominator = net_after_items * PERCENT_SCALE
+            for line in self.lines:
+                line.vat_after_overall_discount_kurus = div_half_up(
+                    line.line_subtotal_kurus * remaining * line.vat_rate_scaled, denominator
+                )
+                total_vat += line.vat_after_overall_discount_kurus
+        self.vat_after_overall_discount_kurus = total_vat
+        self.final_total_kurus = self.net_after_overall_discount_kurus + total_vat
+        self.discount_total_kurus = self.total_item_discounts_kurus + overall
+
+    @classmethod
+    def for_offer(cls, offer, items=None):
+        """
+        Teklifin toplamlarını hesaplar. items verilmezse offer.items.all()
+        kullanılır (prefetch edilmişse ek sorgu yapılmaz). Hesaplanan satır
+        sonuçları item instance'larına da bağlanır.
+        """
+        if items is None:
+            items = offer.items.all()
+        lines = []
+        for item in items:
+            line = LineTotals.for_item(item)
+            item._line_totals = line
+            lines.append(line)
+        return cls(lines, offer.overall_discount_type, offer.overall_discount_value)
@@ -4,8 +4,11 @@ from . import views
 urlpatterns = [
     path("pharmacy/dashboard/", views.pharmacy_dashboard, name="pharmacy_dashboard"),
     path("", views.product_list, name="product_list"),
+    path("autocomplete/", views.product_autocomplete, name="product_autocomplete"),
     path("offer/", views.offer_view, name="offer"),
     path("add/<int:product_id>/", views.add_to_offer, name="add_to_offer"),
+    path("barcode/", views.barcode_lookup, name="barcode_lookup"),
+    path("barcode/scan/", views.scan_to_offer, name="scan_to_offer"),
     path("send/", views.send_offer_to_pharmacy, name="send_offer_to_pharmacy"),
     path("pharmacy/inbox/", views.pharmacy_inbox, name="pharmacy_inbox"),
     path("pharmacy/offers/<int:offer_id>/", views.pharmacy_offer_detail, name="pharmacy_offer_detail"),
@@ -45,6 +48,8 @@ urlpatterns = [
     path("offers/<int:offer_id>/manager-reject/", views.manager_reject_offer, name="manager_reject_offer"),
 
     # Bildirim Sistemi
+    path("notifications/", views.get_notifications, name="get_notifications"),
+    path("notifications/stream/", views.notification_stream, name="notification_stream"),
     path("notifications/<int:notification_id>/mark-read/", views.mark_notification_read, name="mark_notification_read"),
     path("notifications/mark-all-read/", views.mark_all_notifications_read, name="mark_all_notifications_read"),
     path('offers/<int:offer_id>/assign-addresses/', views.assign_delivery_addresses, name='assign_delivery_addresses'),
@@ -54,6 +59,8 @@ urlpatterns = [
 path('pharmacy/products/', views.pharmacy_product_management, name='pharmacy_product_management'),
 path('pharmacy/products/add/', views.pharmacy_add_product, name='pharmacy_add_product'),
 path('pharmacy/products/import-excel/', views.pharmacy_import_products_excel, name='pharmacy_import_products_excel'),
+path('pharmacy/products/import-excel/preview/', views.pharmacy_import_preview, name='pharmacy_import_preview'),
+path('pharmacy/products/import-excel/commit/', views.pharmacy_import_commit, name='pharmacy_import_commit'),
 path('pharmacy/products/<int:product_id>/delete/', views.pharmacy_delete_product, name='pharmacy_delete_product'),
 path('pharmacy/products/<int:product_id>/edit/', views.pharmacy_edit_product, name='pharmacy_edit_product'),
 path('pharmacy/products/<int:product_id>/update-price/', views.pharmacy_update_product_price, name='pharmacy_update_product_price'),
@@ -62,6 +69,15 @@ path('pharmacy/products/<int:product_id>/update-price/', views.pharmacy_update_p
 path('export/offers/', views.export_offers_excel, name='export_offers_excel'),
 path('export/products/', views.export_products_excel, name='export_products_excel'),
 path('export/staff/', views.export_staff_excel, name='export_staff_excel'),
+path('export/offers/pdf/', views.export_offers_pdf_batch, name='export_offers_pdf_batch'),
+path('export/jobs/<int:job_id>/', views.export_job_status, name='export_job_status'),
+path('export/jobs/<int:job_id>/download/', views.export_job_download, name='export_job_download'),
+
+# Ham veri (csv / tsv)
+path('export/offers/items/<str:fmt>/', views.export_offer_items_csv, name='export_offer_items_csv'),
+path('export/offers/<str:fmt>/', views.export_offers_csv, name='export_offers_csv'),
+path('export/products/<str:fmt>/', views.export_products_csv, name='export_products_csv'),
+path('export/staff/<str:fmt>/', views.export_staff_csv, name='export_staff_csv'),
 
 path('export/offer/<int:offer_id>/excel/', views.export_offer_excel, name='export_offer_excel'),
 path('export/offer/<int:offer_id>/pdf/', views.export_offer_pdf, name='export_offer_pdf'),
@@ -1,8 +1,11 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.utils import timezone
 from django.db.models import Q
+from django.db import transaction
+import json
 import openpyxl
 from decimal import Decimal
 from django.core.paginator import Paginator
@@ -10,16 +13,10 @@ from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 import io
-from django.http import HttpResponse
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, HRFlowable
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 
 
-from .models import Product, Offer, OfferItem, ActivityLog, Notification
+from .models import Product, Offer, OfferItem, ActivityLog, Notification, ExportJob
 from .permissions_helpers import (
     can_user_send_offer,
     can_user_approve_offer,
@@ -34,6 +31,29 @@ from .permissions_helpers import (
     notify_user_on_manager_approval,
     notify_on_offer_status_change,
 )
+from .autocomplete import DEFAULT_LIMIT, MAX_LIMIT, product_index
+from .barcodes import barcode_cache, has_valid_check_digit
+from . import csv_exports
+from .documents import document_cache
+from .export_data import export_offers, firm_export_offers, prefetch_offer_items
+from .batch_pdf import BATCH_STATUSES, batch_offers, parse_batch_params
+from .export_jobs import CONTENT_TYPES, FILENAME_PREFIXES, enqueue_export
+from .notification_stream import notification_events
+from .notifications import mark_all_read, mark_read, recent_notifications, unread_count
+from .offer_pdf import render_offer_pdf
+from .importer import (
+    PREVIEW_TABS,
+    ImportFormatError,
+    StalePreviewError,
+    build_preview,
+    commit_preview,
+    delete_preview,
+    import_products,
+    load_preview,
+    preview_categories,
+    save_preview,
+)
+from .search import search_products
 from decimal import Decimal
 from django.contrib import messages
 
@@ -188,10 +208,7 @@ def product_list(request):
     
     search_query = request.GET.get('search', '').strip()
     if search_query:
-        all_products = all_products.filter(
-            models.Q(name__icontains=search_query) | 
-            models.Q(barcode__icontains=search_query)
-        )
+        all_products = search_products(all_products, search_query)
     
     paginator = Paginator(all_products, 50)
     page_number = request.GET.get('page', 1)
@@ -207,7 +224,7 @@ def product_list(request):
         if draft_offer:
             cart_count = draft_offer.items.count()
             cart_items = draft_offer.items.all()[:5]
-            cart_total = draft_offer.gross_total_price()
+            cart_total = draft_offer.gross_total
     
     return render(request, "products/product_list.html", {
         "products": products,
@@ -218,12 +235,29 @@ def product_list(request):
         "cart_total": cart_total,
     })
 
+@login_required
+def product_autocomplete(request):
+    """Ürün otomatik tamamlama (JSON) - her tuş vuruşunda çağrılır"""
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(max(int(request.GET.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        limit = DEFAULT_LIMIT
+
+    return JsonResponse({
+        'results': product_index.search(query, limit),
+        'version': product_index.version,
+    })
+
+
 # =======================
 # TEKLİFİM
 # =======================
 @login_required
 def offer_view(request):
-    offer = Offer.objects.filter(user=request.user, status="draft").order_by("-created_at").first()
+    offer = Offer.objects.filter(user=request.user, status="draft").prefetch_related(
+        "items__product"
+    ).order_by("-created_at").first()
     if offer is None:
         offer = Offer.objects.create(user=request.user, status="draft")
     return render(request, "products/offer.html", {"offer": offer})
@@ -269,6 +303,86 @@ def add_to_offer(request, product_id):
     return redirect(request.META.get('HTTP_REFERER', 'product_list'))
 
 
+# =======================
+# BARKOD OKUYUCU
+# =======================
+@login_required
+def barcode_lookup(request):
+    """Barkod ile ürün bul (JSON) - önce birebir, sonra GTIN normalize"""
+    code = request.GET.get('code', '').strip()
+    product = barcode_cache.lookup(code)
+    return JsonResponse({
+        'found': product is not None,
+        'product': product,
+        'valid_check_digit': has_valid_check_digit(code),
+    }, status=200 if product else 404)
+
+
+@login_required
+@require_POST
+def scan_to_offer(request):
+    """
+    Okutulan barkodları taslak teklife toplu ekle (tek transaction).
+    Body (JSON): {"items": [{"barcode": "...", "quantity": 2}, ...]}
+    """
+    try:
+        payload = json.loads(request.body or b'{}')
+        scans = payload.get('items') or []
+    except (ValueError, AttributeError):
+        return JsonResponse({'error': 'Geçersiz istek gövdesi.'}, status=400)
+
+    # Aynı ürün birden fazla okutulduysa adetleri topla
+    quantities = {}
+    not_found = []
+    scans = [scan for scan in scans if isinstance(scan, dict)]
+    products = barcode_cache.lookup_many(str(scan.get('barcode', '')) for scan in scans)
+    for scan in scans:
+        code = str(scan.get('barcode', '')).strip()
+        try:
+            quantity = max(int(scan.get('quantity', 1)), 1)
+        except (TypeError, ValueError):
+            quantity = 1
+        product = products.get(code)
+        if product is None:
+            not_found.append(code)
+            continue
+        quantities[product['id']] = quantities.get(product['id'], 0) + quantity
+
+    if not quantities:
+        return JsonResponse({'added': [], 'not_found': not_found, 'offer_id': None})
+
+    with transaction.atomic():
+        offer = Offer.objects.filter(user=request.user, status="draft").order_by("-created_at").first()
+        if offer is None:
+            offer = Offer.objects.create(user=request.user, status="draft")
+
+        products = Product.objects.in_bulk(list(quantities))
+        existing = {item.product_id: item for item in offer.items.filter(product_id__in=list(quantities))}
+        added = []
+        for product_id, quantity in quantities.items():
+            product = products.get(product_id)
+            if product is None:
+                continue
+            item = existing.get(product_id)
+            if item is None:
+                item = OfferItem(offer=offer, product=product, quantity=quantity)
+            else:
+                item.product = product
+                item.quantity += quantity
+            item.save(update_totals=False)
+            added.append({'product_id': product_id, 'name': product.name, 'quantity': item.quantity})
+
+        offer.refresh_totals()
+
+    return JsonResponse({
+        'added': added,
+        'not_found': not_found,
+        'offer_id': offer.id,
+        'item_count': offer.item_count,
+        'gross_total': str(offer.gross_total),
+    })
+
+
 # =======================
 # TEKLİFİ ECZANEYE GÖNDER
 # =======================
@@ -294,7 +408,7 @@ def send_offer_to_pharmacy(request):
                 log_activity(
                     user=request.user,
                     action='offer_sent_for_approval',
-                    description=f"#{offer.id} nolu teklif ({offer.gross_total_price():,.2f} TL) yönetici onayına gönderildi.",
+                    description=f"#{offer.id} nolu teklif ({offer.gross_total:,.2f} TL) yönetici onayına gönderildi.",
                     offer=offer,
                     request=request
                 )
@@ -317,7 +431,7 @@ def send_offer_to_pharmacy(request):
         log_activity(
             user=request.user,
             action='offer_sent',
-            description=f"#{offer.id} nolu teklif eczaneye gönderildi. Tutar: {offer.gross_total_price():,.2f} TL",
+            description=f"#{offer.id} nolu teklif eczaneye gönderildi. Tutar: {offer.gross_total:,.2f} TL",
             offer=offer,
             request=request
         )
@@ -430,7 +544,7 @@ def pharmacy_inbox(request):
     
     offers = sent_offers.exclude(
         id__in=revised_original_ids
-    ).order_by("-sent_at")
+    ).with_totals().order_by("-sent_at")
 
     return render(
         request,
@@ -445,7 +559,9 @@ def pharmacy_inbox(request):
 @role_required("eczane")
 def pharmacy_offer_detail(request, offer_id):
     """Teklif detayı - Eczane tarafı"""
-    offer = get_object_or_404(Offer, id=offer_id)
+    offer = get_object_or_404(
+        Offer.objects.prefetch_related("items__product", "items__delivery_address"), id=offer_id
+    )
     
     # Firma adreslerini getir (onaylanan teklifler için teslimat adresi seçimi)
     firm_addresses = None
@@ -490,7 +606,7 @@ def pharmacy_approve_offer(request, offer_id):
         log_activity(
             user=request.user,
             action='offer_approved',
-            description=f"#{offer.id} nolu teklif onaylandı. Tutar: {offer.gross_total_price():,.2f} TL",
+            description=f"#{offer.id} nolu teklif onaylandı. Tutar: {offer.gross_total:,.2f} TL",
             offer=offer,
             target_user=offer.user,
             request=request
@@ -702,11 +818,12 @@ def pharmacy_update_discounts(request, offer_id):
             item.discount_type = dtype
             item.discount_value = dval
             item.note = note
-            item.save()
+            item.save(update_totals=False)
 
         # --- Genel toplam iskontu kaydet ---
         offer.overall_discount_type = overall_dtype
         offer.overall_discount_value = overall_dval
+        offer.recalculate_totals()
         offer.save()
 
         messages.success(request, "İskontolar kaydedildi.")
@@ -762,7 +879,7 @@ def my_offers(request):
     }
     
     return render(request, "products/my_offers_dashboard.html", {
-        "offers": offers,
+        "offers": offers.with_totals(),
         "pending_approvals": pending_approvals,
         "stats": stats,
         "is_manager": request.user.is_manager,
@@ -772,7 +889,9 @@ def my_offers(request):
 @role_required("firma")
 def my_offer_detail(request, offer_id):
     """Teklif detayı - yetki kontrolü ile"""
-    offer = get_object_or_404(Offer, id=offer_id)
+    offer = get_object_or_404(
+        Offer.objects.prefetch_related("items__product", "items__delivery_address"), id=offer_id
+    )
     
     # Görüntüleme yetkisi kontrolü
     if not can_user_view_offer(request.user, offer):
@@ -848,8 +967,9 @@ def revise_offer(request, offer_id):
             status='draft'
         )
         
-        for item in original_offer.items.all():
-            OfferItem.objects.create(
+        # Kalemler toplam hesaplanmadan eklenir, toplamlar sonda bir kez hesaplanır
+        for item in original_offer.items.select_related("product"):
+            OfferItem(
                 offer=new_offer,
                 product=item.product,
                 quantity=item.quantity,
@@ -858,7 +978,8 @@ def revise_offer(request, offer_id):
                 discount_type=item.discount_type,
                 discount_value=item.discount_value,
                 note=item.note
-            )
+            ).save(update_totals=False)
+        new_offer.refresh_totals()
         
         original_offer.status = 'revised'
         original_offer.save()
@@ -965,7 +1086,7 @@ def pharmacy_dashboard(request):
         'total': Offer.objects.exclude(status='draft').count(),
     }
     
-    recent_offers = latest_sent_offers.order_by('-sent_at')[:5]
+    recent_offers = latest_sent_offers.with_totals().order_by('-sent_at')[:5]
     
     return render(request, 'products/pharmacy_dashboard.html', {
         'new_offers_count': new_offers_count,
@@ -991,7 +1112,7 @@ def pharmacy_offers_by_status(request, status):
     }
     
     return render(request, 'products/pharmacy_offers_filtered.html', {
-        'offers': offers,
+        'offers': offers.with_totals(),
         'status': status,
         'status_name': status_names[status],
         'count': offers.count()
@@ -1022,7 +1143,7 @@ def my_offers_by_status(request, status):
     }
     
     return render(request, 'products/my_offers_filtered.html', {
-        'offers': offers,
+        'offers': offers.with_totals(),
         'status': status,
         'status_name': status_names[status],
         'count': offers.count()
@@ -1062,15 +1183,15 @@ def admin_dashboard(request):
     approved_offers = Offer.objects.filter(status='approved').count()
     rejected_offers = Offer.objects.filter(status='rejected').count()
     
-    # Yüksek tutarlı teklifler - KALDIRILDI (gross_total_price field yok)
-    high_value_offers = 0  # Şimdilik 0
+    # Yüksek tutarlı teklifler (saklanan gross_total üzerinden)
+    high_value_offers = Offer.objects.filter(gross_total__gte=Decimal('50000')).count()
     
     # Bekleyen onaylar (firma tarafı)
     pending_manager_approvals = Offer.objects.filter(manager_approval_pending=True).count()
     
     # Son aktiviteler
     recent_users = User.objects.order_by('-date_joined')[:10]
-    recent_offers = Offer.objects.order_by('-created_at')[:10]
+    recent_offers = Offer.objects.with_totals().order_by('-created_at')[:10]
     
     return render(request, 'admin/admin_dashboard.html', {
         'total_users': total_users,
@@ -1292,7 +1413,9 @@ def toggle_favorite_draft(request, offer_id):
 def favorite_drafts(request):
     """Favori taslaklar listesi"""
     from products.models import FavoriteDraft
-    favorites = FavoriteDraft.objects.filter(user=request.user).select_related('offer')
+    favorites = FavoriteDraft.objects.filter(user=request.user).prefetch_related(
+        models.Prefetch('offer', queryset=Offer.objects.with_totals())
+    )
     
     return render(request, 'products/favorite_drafts.html', {
         'favorites': favorites
@@ -1303,46 +1426,52 @@ def favorite_drafts(request):
 # =======================
 @login_required
 def get_notifications(request):
-    """Kullanıcının bildirimlerini getir"""
-    notifications = Notification.objects.filter(
-        user=request.user
-    ).order_by('-created_at')[:20]
-    
-    unread_count = notifications.filter(is_read=False).count()
-    
-    return {
-        'notifications': notifications,
-        'unread_count': unread_count
-    }
+    """Bildirim açılır menüsü - son bildirimler ve okunmamış sayısı (JSON, menü açılınca yüklenir)"""
+    return JsonResponse({
+        'notifications': recent_notifications(request.user),
+        'unread_count': unread_count(request.user),
+    })
+
+
+async def notification_stream(request):
+    """Bildirim akışı (SSE) - yeni bildirimler bağlantı açıkken anında gönderilir"""
+    from django.core.handlers.asgi import ASGIRequest
+
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+    # WSGI'da uzun bağlantı bir worker'ı kilitler: 204 ile tarayıcı yeniden denemez
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    cursor = int(last_event_id) if last_event_id.isdigit() else None
+
+    response = StreamingHttpResponse(
+        notification_events(user.pk, cursor), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx tamponlamasın
+    return response
 
 
 @login_required
 @require_POST
 def mark_notification_read(request, notification_id):
     """Bildirimi okundu olarak işaretle"""
-    notification = get_object_or_404(Notification, id=notification_id, user=request.user)
-    
-    if not notification.is_read:
-        notification.is_read = True
-        notification.read_at = timezone.now()
-        notification.save()
+    get_object_or_404(Notification, id=notification_id, user=request.user)
+    mark_read(request.user, notification_id)
     
-    return JsonResponse({'status': 'success'})
+    return JsonResponse({'status': 'success', 'unread_count': unread_count(request.user)})
 
 
 @login_required
 @require_POST
 def mark_all_notifications_read(request):
     """Tüm bildirimleri okundu olarak işaretle"""
-    Notification.objects.filter(
-        user=request.user,
-        is_read=False
-    ).update(
-        is_read=True,
-        read_at=timezone.now()
-    )
+    mark_all_read(request.user)
     
-    return JsonResponse({'status': 'success'})
+    return JsonResponse({'status': 'success', 'unread_count': unread_count(request.user)})
 
 """
 Bu kodları products/views.py dosyasındaki mevcut helper fonksiyonların ALTINA ekleyin
@@ -1376,7 +1505,7 @@ def can_user_approve_offer(user, offer):
     
     # 50K+ teklifler için özel yetki gerekli
     from decimal import Decimal
-    if hasattr(offer, 'gross_total_price') and offer.gross_total_price() >= Decimal('50000'):
+    if offer.gross_total >= Decimal('50000'):
         if not (hasattr(user, 'can_approve_high_value_pharmacy_offers') and user.can_approve_high_value_pharmacy_offers):
             return False, "50.000 TL üzeri teklifleri onaylama yetkiniz yok. Eczacınızla iletişime geçin."
     
@@ -1538,10 +1667,7 @@ def pharmacy_product_management(request):
     # Arama filtresi
     search_query = request.GET.get('search', '').strip()
     if search_query:
-        products_list = products_list.filter(
-            Q(name__icontains=search_query) | 
-            Q(barcode__icontains=search_query)
-        )
+        products_list = search_products(products_list, search_query)
     
     # Sayfalama
     paginator = Paginator(products_list, 50)
@@ -1616,49 +1742,113 @@ def pharmacy_import_products_excel(request):
     if request.method == 'POST' and request.FILES.get('excel_file'):
         excel_file = request.FILES['excel_file']
         
-        try:
-            # Excel dosyasını oku
-            wb = openpyxl.load_workbook(excel_file)
-            sheet = wb.active
-            
-            added_count = 0
-            error_count = 0
-            
-            # Satırları oku (başlık satırını atla)
-            for row in sheet.iter_rows(min_row=2, values_only=True):
-                if not row[0]:  # Ürün adı boşsa atla
-                    continue
-                
-                try:
-                    name = str(row[0]).strip().upper()
-                    barcode = str(row[1]).strip() if row[1] else ''
-                    price = Decimal(str(row[2]).replace(',', '.')) if row[2] else Decimal('0')
-                    vat_rate = int(float(str(row[3]).replace(',', '.'))) if row[3] else 10
-
-                    Product.objects.create(
-                        name=name,
-                        barcode=barcode,
-                        price=price,
-                        vat_rate=vat_rate
-                    )
-                    added_count += 1
-                except Exception as e:
-                    error_count += 1
-                    continue
-            
-            if added_count > 0:
-                messages.success(request, f"{added_count} ürün başarıyla eklendi.")
-            if error_count > 0:
-                messages.warning(request, f"{error_count} ürün eklenirken hata oluştu.")
-            
-            return redirect('pharmacy_product_management')
+        # Önizleme: hiçbir şey yazmadan farkı çıkar, onay sayfasına yönlendir
+        if request.POST.get('dry_run'):
+            try:
+                plan = build_preview(excel_file)
+            except ImportFormatError as e:
+                messages.error(request, str(e))
+                return render(request, 'products/pharmacy_import_excel.html')
             
-        except Exception as e:
-            messages.error(request, f"Excel dosyası işlenirken hata: {str(e)}")
+            delete_preview(request.session.get('import_preview_token'))
+            request.session['import_preview_token'] = save_preview(plan)
+            return redirect('pharmacy_import_preview')
+        
+        try:
+            report = import_products(excel_file)
+        except ImportFormatError as e:
+            messages.error(request, str(e))
+            return render(request, 'products/pharmacy_import_excel.html')
+        
+        if report.created or report.updated:
+            messages.success(request, f"İçe aktarma tamamlandı. {report.summary}")
+        else:
+            messages.info(request, f"Değişiklik yapılmadı. {report.summary}")
+        if report.errors:
+            messages.warning(request, f"{len(report.errors)} satır hatalı, aşağıdaki rapora bakın.")
+        
+        return render(request, 'products/pharmacy_import_excel.html', {
+            'report': report,
+        })
     
     return render(request, 'products/pharmacy_import_excel.html')
 
 
+@login_required
+def pharmacy_import_preview(request):
+    """Excel içe aktarma önizlemesi - yeni ürünler, fiyat/KDV değişiklikleri"""
+    
+    # Yetki kontrolü
+    if request.user.role != 'eczane':
+        messages.error(request, "Bu sayfaya sadece eczane kullanıcıları erişebilir.")
+        return redirect('redirect_after_login')
+    
+    if not request.user.is_manager and not request.user.can_manage_products:
+        messages.error(request, "Ürün ekleme yetkiniz yok.")
+        return redirect('pharmacy_dashboard')
+    
+    plan = load_preview(request.session.get('import_preview_token'))
+    if plan is None:
+        messages.error(request, "Önizleme bulunamadı, lütfen dosyayı tekrar yükleyin.")
+        return redirect('pharmacy_import_products_excel')
+    
+    categories = preview_categories(plan)
+    tab = request.GET.get('tab', 'new')
+    if tab not in categories:
+        tab = 'new'
+    
+    paginator = Paginator(categories[tab], 50)
+    rows = paginator.get_page(request.GET.get('page', 1))
+    
+    return render(request, 'products/pharmacy_import_preview.html', {
+        'tabs': [(key, label, len(categories[key])) for key, label in PREVIEW_TABS],
+        'tab': tab,
+        'rows': rows,
+        'create_count': len(plan['creates']),
+        'update_count': len(plan['updates']),
+        'unchanged_count': plan['unchanged'],
+        'elapsed': plan['elapsed'],
+    })
+
+
+@login_required
+@require_POST
+def pharmacy_import_commit(request):
+    """Önizlenen içe aktarmayı uygula (dosya yeniden okunmaz)"""
+    
+    # Yetki kontrolü
+    if request.user.role != 'eczane':
+        messages.error(request, "Bu sayfaya sadece eczane kullanıcıları erişebilir.")
+        return redirect('redirect_after_login')
+    
+    if not request.user.is_manager and not request.user.can_manage_products:
+        messages.error(request, "Ürün ekleme yetkiniz yok.")
+        return redirect('pharmacy_dashboard')
+    
+    token = request.session.pop('import_preview_token', None)
+    plan = load_preview(token)
+    if plan is None:
+        messages.error(request, "Önizleme bulunamadı, lütfen dosyayı tekrar yükleyin.")
+        return redirect('pharmacy_import_products_excel')
+    
+    if request.POST.get('cancel'):
+        delete_preview(token)
+        messages.info(request, "İçe aktarma iptal edildi.")
+        return redirect('pharmacy_import_products_excel')
+    
+    try:
+        report = commit_preview(plan)
+    except StalePreviewError as e:
+        messages.error(request, str(e))
+        return redirect('pharmacy_import_products_excel')
+    finally:
+        # Token oturumdan alındı: uygulama hata verse de dosya kalmasın
+        delete_preview(token)
+    
+    messages.success(request, f"İçe aktarma tamamlandı. {report.summary}")
+    return redirect('pharmacy_product_management')
+
+
 @login_required
 def pharmacy_delete_product(request, product_id):
     """Ürün silme - sadece admin"""
@@ -1753,6 +1943,16 @@ def pharmacy_edit_product(request, product_id):
 
 #Dışa Aktarma -------------------------------
 
+def _enqueue_export(request, kind, params=None):
+    """Export işini kuyruğa ekler (aynısı sıradaysa onu kullanır), iş durumu sayfasına yönlendirir"""
+    job, created = enqueue_export(request.user, kind, params)
+    if created:
+        messages.info(request, "Dışa aktarma hazırlanıyor. Dosya hazır olunca bildirim alacaksınız.")
+    else:
+        messages.info(request, "Bu dışa aktarma zaten hazırlanıyor.")
+    return redirect('export_job_status', job_id=job.id)
+
+
 @login_required
 def export_offers_excel(request):
     """Firma - Teklifleri Excel'e aktar"""
@@ -1765,185 +1965,154 @@ def export_offers_excel(request):
         messages.error(request, "Dışa aktarma yetkiniz yok.")
         return redirect('my_offers')
     
-    # Teklifleri getir
-    if request.user.is_manager:
-        firm_users = User.objects.filter(manager=request.user) | User.objects.filter(id=request.user.id)
-    else:
-        firm_users = User.objects.filter(id=request.user.id)
-    
-    offers = Offer.objects.filter(user__in=firm_users).exclude(status='draft').order_by('-created_at')
+    # Dosyayı worker üretir (run_export_worker), hazır olunca bildirim gelir
+    return _enqueue_export(request, 'offers')
+
+
+@login_required
+def export_products_excel(request):
+    """Ürün listesini Excel'e aktar"""
     
-    wb = Workbook()
+    if not (request.user.is_superuser or request.user.is_staff or 
+            request.user.role == 'eczane' or request.user.role == 'firma'):
+        messages.error(request, "Bu işlem için yetkiniz yok.")
+        return redirect('pharmacy_dashboard')
     
-    # ========================
-    # SAYFA 1: TEKLİF ÖZETİ
-    # ========================
-    ws1 = wb.active
-    ws1.title = "Teklif Özeti"
+    return _enqueue_export(request, 'products')
+
+
+@login_required
+def export_staff_excel(request):
+    """Personel listesini Excel'e aktar"""
     
-    # Başlık stilleri
-    header_font = Font(name='Arial', bold=True, color='FFFFFF', size=11)
-    header_fill = PatternFill('solid', start_color='2F6FED')
-    header_align = Alignment(horizontal='center', vertical='center', wrap_text=True)
-    center_align = Alignment(horizontal='center', vertical='center')
-    
-    # Firma bilgileri başlığı
-    ws1.merge_cells('A1:K1')
-    ws1['A1'] = f"TEKLİF RAPORU - {request.user.company_name or request.user.get_full_name()}"
-    ws1['A1'].font = Font(name='Arial', bold=True, size=14, color='FFFFFF')
-    ws1['A1'].fill = PatternFill('solid', start_color='1A3A6B')
-    ws1['A1'].alignment = Alignment(horizontal='center', vertical='center')
-    ws1.row_dimensions[1].height = 35
-    
-    ws1.merge_cells('A2:K2')
-    ws1['A2'] = f"Dışa Aktarma Tarihi: {timezone.now().strftime('%d.%m.%Y %H:%M')}"
-    ws1['A2'].font = Font(name='Arial', size=10, color='666666')
-    ws1['A2'].alignment = Alignment(horizontal='center')
-    ws1.row_dimensions[2].height = 20
-    
-    # Boş satır
-    ws1.row_dimensions[3].height = 10
+    if not request.user.is_manager:
+        messages.error(request, "Bu işlem için yetkiniz yok.")
+        return redirect('my_offers')
     
-    # Başlıklar
-    headers = ['Teklif No', 'Revizyon', 'Personel', 'Durum', 'Gönderilme Tarihi', 
-               'Onay/Red Tarihi', 'Ürün Sayısı', 'KDV Hariç Toplam', 
-               'KDV Toplamı', 'KDV Dahil Toplam', 'Red Nedeni']
+    return _enqueue_export(request, 'staff')
+
+
+@login_required
+def export_offers_pdf_batch(request):
+    """Toplu teklif PDF - filtreye uyan teklifler ZIP ya da yer imli tek PDF olarak (arka planda)"""
     
-    for col, header in enumerate(headers, 1):
-        cell = ws1.cell(row=4, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_align
-    ws1.row_dimensions[4].height = 30
+    # Kapsam tek teklif PDF yetkisiyle aynı (bkz. export_data.pdf_export_offers)
+    can_pick_firm = request.user.is_superuser or request.user.is_staff or request.user.role == 'eczane'
     
-    # Veri satırları
-    status_map = {'sent': 'Bekliyor', 'approved': 'Onaylandı', 'rejected': 'Reddedildi', 'revised': 'Revize Edildi'}
+    if request.method == 'POST':
+        params, error = parse_batch_params(request.POST)
+        if error:
+            messages.error(request, error)
+        elif not batch_offers(request.user, params).exists():
+            messages.warning(request, "Filtreye uyan teklif bulunamadı.")
+        else:
+            return _enqueue_export(request, 'offer_pdfs', params)
     
-    for row_idx, offer in enumerate(offers, 5):
-        row_fill = PatternFill('solid', start_color='F8F9FA') if row_idx % 2 == 0 else PatternFill('solid', start_color='FFFFFF')
-        
-        data = [
-            f"#{offer.original_offer.id if offer.original_offer else offer.id}",
-            f"Rev.{offer.revision_number}" if offer.revision_number > 1 else "-",
-            offer.user.get_full_name() or offer.user.username,
-            status_map.get(offer.status, offer.status),
-            offer.sent_at.strftime('%d.%m.%Y %H:%M') if offer.sent_at else '-',
-            (offer.approved_at or offer.rejected_at).strftime('%d.%m.%Y %H:%M') if (offer.approved_at or offer.rejected_at) else '-',
-            offer.items.count(),
-            float(offer.items_net_after_item_discounts()),
-            float(offer.items_vat_after_item_discounts()),
-            float(offer.final_total),
-            offer.reject_reason or '-',
-        ]
-        
-        for col, value in enumerate(data, 1):
-            cell = ws1.cell(row=row_idx, column=col, value=value)
-            cell.font = Font(name='Arial', size=10)
-            cell.fill = row_fill
-            cell.alignment = center_align
-            
-            # Durum renklendirme
-            if col == 4:
-                if value == 'Onaylandı':
-                    cell.font = Font(name='Arial', size=10, bold=True, color='155724')
-                elif value == 'Reddedildi':
-                    cell.font = Font(name='Arial', size=10, bold=True, color='721C24')
-                elif value == 'Bekliyor':
-                    cell.font = Font(name='Arial', size=10, bold=True, color='856404')
-            
-            # Para formatı
-            if col in [8, 9, 10]:
-                cell.number_format = '#,##0.00 ₺'
+    firms = User.objects.none()
+    if can_pick_firm:
+        firms = User.objects.filter(role='firma', manager__isnull=True).order_by('company_name', 'username')
     
-    # Toplam satırı
-    total_row = len(offers) + 5
-    ws1.cell(row=total_row, column=7, value=f'=SUM(G5:G{total_row-1})').font = Font(name='Arial', bold=True)
-    ws1.cell(row=total_row, column=8, value=f'=SUM(H5:H{total_row-1})').number_format = '#,##0.00 ₺'
-    ws1.cell(row=total_row, column=9, value=f'=SUM(I5:I{total_row-1})').number_format = '#,##0.00 ₺'
-    ws1.cell(row=total_row, column=10, value=f'=SUM(J5:J{total_row-1})').number_format = '#,##0.00 ₺'
-    for col in range(1, 12):
-        cell = ws1.cell(row=total_row, column=col)
-        cell.fill = PatternFill('solid', start_color='2F6FED')
-        cell.font = Font(name='Arial', bold=True, color='FFFFFF')
-        cell.alignment = center_align
-    ws1.cell(row=total_row, column=1, value='TOPLAM').font = Font(name='Arial', bold=True, color='FFFFFF')
+    return render(request, 'products/batch_pdf.html', {
+        'statuses': [(value, label) for value, label in Offer.STATUS_CHOICES if value in BATCH_STATUSES],
+        'firms': firms,
+        'can_pick_firm': can_pick_firm,
+        'form_data': request.POST,
+    })
+
+
+@login_required
+def export_job_status(request, job_id):
+    """Export işi durumu; ?format=json ile sayfadaki polling için JSON döner"""
+    
+    job = get_object_or_404(ExportJob, id=job_id, user=request.user)
+    
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'id': job.id,
+            'status': job.status,
+            'status_display': job.get_status_display(),
+            'download_url': reverse('export_job_download', args=[job.id]) if job.is_downloadable else None,
+            'error': job.error,
+            'progress': job.progress,
+            'total': job.total,
+        })
+    
+    return render(request, 'products/export_job.html', {
+        'job': job,
+        'recent_jobs': ExportJob.objects.filter(user=request.user).exclude(id=job.id)[:10],
+    })
+
+
+@login_required
+def export_job_download(request, job_id):
+    """Hazır export dosyasını indir (sadece işi isteyen kullanıcı, süresi dolmadan)"""
+    
+    job = get_object_or_404(ExportJob, id=job_id, user=request.user)
+    
+    if not job.is_downloadable:
+        messages.error(request, "Dosya hazır değil veya süresi doldu, lütfen tekrar dışa aktarın.")
+        return redirect('export_job_status', job_id=job.id)
+    
+    extension = job.file.name.rsplit('.', 1)[-1]
+    filename = f'{FILENAME_PREFIXES[job.kind]}_{timezone.localtime(job.finished_at).strftime("%Y%m%d_%H%M")}.{extension}'
+    return FileResponse(
+        job.file.open('rb'),
+        as_attachment=True,
+        filename=filename,
+        content_type=CONTENT_TYPES.get(extension, 'application/octet-stream'),
+    )
+
+
+@login_required
+def export_offers_csv(request, fmt):
+    """Firma - Teklifleri ham CSV/TSV olarak akıt (teklif başına bir satır)"""
     
-    # Sütun genişlikleri
-    col_widths = [12, 10, 20, 12, 18, 18, 12, 18, 15, 18, 30]
-    for i, width in enumerate(col_widths, 1):
-        ws1.column_dimensions[get_column_letter(i)].width = width
+    if fmt not in csv_exports.FORMATS:
+        raise Http404
     
-    # ========================
-    # SAYFA 2: ÜRÜN DETAYLARI
-    # ========================
-    ws2 = wb.create_sheet("Ürün Detayları")
+    if request.user.role != 'firma':
+        messages.error(request, "Bu işlem için yetkiniz yok.")
+        return redirect('my_offers')
     
-    headers2 = ['Teklif No', 'Personel', 'Durum', 'Tarih', 'Ürün Adı', 'Barkod',
-                'Adet', 'Birim Fiyat (KDV Hariç)', 'KDV %', 'İskonto Tipi', 
-                'İskonto Değeri', 'İskonto Tutarı', 'KDV Hariç Toplam', 
-                'KDV Tutarı', 'KDV Dahil Toplam']
+    if not request.user.can_export_data and not request.user.is_manager:
+        messages.error(request, "Dışa aktarma yetkiniz yok.")
+        return redirect('my_offers')
     
-    ws2.merge_cells(f'A1:{get_column_letter(len(headers2))}1')
-    ws2['A1'] = f"ÜRÜN DETAY RAPORU - {request.user.company_name or request.user.get_full_name()}"
-    ws2['A1'].font = Font(name='Arial', bold=True, size=14, color='FFFFFF')
-    ws2['A1'].fill = PatternFill('solid', start_color='1A3A6B')
-    ws2['A1'].alignment = Alignment(horizontal='center', vertical='center')
-    ws2.row_dimensions[1].height = 35
+    offers = firm_export_offers(request.user)
+    return csv_exports.delimited_response(
+        fmt, f'teklifler_{timezone.now().strftime("%Y%m%d_%H%M")}',
+        csv_exports.OFFER_HEADERS, csv_exports.offer_rows(offers),
+    )
+
+
+@login_required
+def export_offer_items_csv(request, fmt):
+    """Firma - Teklif kalemlerini ham CSV/TSV olarak akıt (kalem başına bir satır)"""
     
-    for col, header in enumerate(headers2, 1):
-        cell = ws2.cell(row=2, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_align
-    ws2.row_dimensions[2].height = 30
+    if fmt not in csv_exports.FORMATS:
+        raise Http404
     
-    row_idx = 3
-    for offer in offers:
-        for item in offer.items.all():
-            row_fill = PatternFill('solid', start_color='F8F9FA') if row_idx % 2 == 0 else PatternFill('solid', start_color='FFFFFF')
-            
-            data = [
-                f"#{offer.original_offer.id if offer.original_offer else offer.id}",
-                offer.user.get_full_name() or offer.user.username,
-                status_map.get(offer.status, offer.status),
-                offer.sent_at.strftime('%d.%m.%Y') if offer.sent_at else '-',
-                item.product.name,
-                item.product.barcode or '-',
-                item.quantity,
-                float(item.unit_price),
-                item.vat_rate,
-                {'none': 'Yok', 'percent': '%', 'amount': '₺'}.get(item.discount_type, '-'),
-                float(item.discount_value),
-                float(item.discount_amount),
-                float(item.line_subtotal),
-                float(item.vat_amount),
-                float(item.total_price),
-            ]
-            
-            for col, value in enumerate(data, 1):
-                cell = ws2.cell(row=row_idx, column=col, value=value)
-                cell.font = Font(name='Arial', size=10)
-                cell.fill = row_fill
-                cell.alignment = center_align
-                if col in [8, 12, 13, 14, 15]:
-                    cell.number_format = '#,##0.00 ₺'
-            
-            row_idx += 1
+    if request.user.role != 'firma':
+        messages.error(request, "Bu işlem için yetkiniz yok.")
+        return redirect('my_offers')
     
-    col_widths2 = [12, 20, 12, 12, 30, 15, 8, 20, 8, 12, 12, 15, 18, 12, 18]
-    for i, width in enumerate(col_widths2, 1):
-        ws2.column_dimensions[get_column_letter(i)].width = width
+    if not request.user.can_export_data and not request.user.is_manager:
+        messages.error(request, "Dışa aktarma yetkiniz yok.")
+        return redirect('my_offers')
     
-    # Response
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = f'attachment; filename="teklifler_{timezone.now().strftime("%Y%m%d_%H%M")}.xlsx"'
-    wb.save(response)
-    return response
+    offers = firm_export_offers(request.user)
+    return csv_exports.delimited_response(
+        fmt, f'teklif_kalemleri_{timezone.now().strftime("%Y%m%d_%H%M")}',
+        csv_exports.OFFER_ITEM_HEADERS, csv_exports.offer_item_rows(offers),
+    )
 
 
 @login_required
-def export_products_excel(request):
-    """Ürün listesini Excel'e aktar"""
+def export_products_csv(request, fmt):
+    """Ürün listesini ham CSV/TSV olarak akıt"""
+    
+    if fmt not in csv_exports.FORMATS:
+        raise Http404
     
     if not (request.user.is_superuser or request.user.is_staff or 
             request.user.role == 'eczane' or request.user.role == 'firma'):
@@ -1951,155 +2120,37 @@ def export_products_excel(request):
         return redirect('pharmacy_dashboard')
     
     products = Product.objects.all().order_by('name')
-    
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Ürün Listesi"
-    
-    header_font = Font(name='Arial', bold=True, color='FFFFFF', size=11)
-    header_fill = PatternFill('solid', start_color='2F6FED')
-    header_align = Alignment(horizontal='center', vertical='center')
-    center_align = Alignment(horizontal='center', vertical='center')
-    
-    ws.merge_cells('A1:G1')
-    ws['A1'] = "ÜRÜN LİSTESİ"
-    ws['A1'].font = Font(name='Arial', bold=True, size=14, color='FFFFFF')
-    ws['A1'].fill = PatternFill('solid', start_color='1A3A6B')
-    ws['A1'].alignment = Alignment(horizontal='center', vertical='center')
-    ws.row_dimensions[1].height = 35
-    
-    ws.merge_cells('A2:G2')
-    ws['A2'] = f"Dışa Aktarma Tarihi: {timezone.now().strftime('%d.%m.%Y %H:%M')} | Toplam: {products.count()} ürün"
-    ws['A2'].font = Font(name='Arial', size=10, color='666666')
-    ws['A2'].alignment = Alignment(horizontal='center')
-    
-    headers = ['Sıra', 'Ürün Adı', 'Barkod', 'Birim Fiyat (KDV Dahil)', 'KDV %', 
-               'Fiyat Güncelleme Tarihi', 'Eklenme Tarihi']
-    
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=3, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_align
-    ws.row_dimensions[3].height = 30
-    
-    for row_idx, product in enumerate(products, 4):
-        row_fill = PatternFill('solid', start_color='F8F9FA') if row_idx % 2 == 0 else PatternFill('solid', start_color='FFFFFF')
-        
-        data = [
-            row_idx - 3,
-            product.name,
-            product.barcode or '-',
-            float(product.price),
-            product.vat_rate,
-            product.price_updated_at.strftime('%d.%m.%Y %H:%M') if product.price_updated_at else '-',
-            product.created_at.strftime('%d.%m.%Y %H:%M') if product.created_at else '-',
-        ]
-        
-        for col, value in enumerate(data, 1):
-            cell = ws.cell(row=row_idx, column=col, value=value)
-            cell.font = Font(name='Arial', size=10)
-            cell.fill = row_fill
-            cell.alignment = center_align
-            if col == 4:
-                cell.number_format = '#,##0.00 ₺'
-    
-    col_widths = [6, 35, 15, 22, 8, 22, 22]
-    for i, width in enumerate(col_widths, 1):
-        ws.column_dimensions[get_column_letter(i)].width = width
-    
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = f'attachment; filename="urunler_{timezone.now().strftime("%Y%m%d_%H%M")}.xlsx"'
-    wb.save(response)
-    return response
+    return csv_exports.delimited_response(
+        fmt, f'urunler_{timezone.now().strftime("%Y%m%d_%H%M")}',
+        csv_exports.PRODUCT_HEADERS, csv_exports.product_rows(products),
+    )
 
 
 @login_required
-def export_staff_excel(request):
-    """Personel listesini Excel'e aktar"""
+def export_staff_csv(request, fmt):
+    """Personel listesini ham CSV/TSV olarak akıt"""
+    
+    if fmt not in csv_exports.FORMATS:
+        raise Http404
     
     if not request.user.is_manager:
         messages.error(request, "Bu işlem için yetkiniz yok.")
         return redirect('my_offers')
     
     staff = User.objects.filter(manager=request.user).order_by('-date_joined')
-    
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Personel Listesi"
-    
-    header_font = Font(name='Arial', bold=True, color='FFFFFF', size=11)
-    header_fill = PatternFill('solid', start_color='2F6FED')
-    header_align = Alignment(horizontal='center', vertical='center')
-    center_align = Alignment(horizontal='center', vertical='center')
-    
-    ws.merge_cells('A1:H1')
-    ws['A1'] = f"PERSONEL LİSTESİ - {request.user.get_full_name() or request.user.username}"
-    ws['A1'].font = Font(name='Arial', bold=True, size=14, color='FFFFFF')
-    ws['A1'].fill = PatternFill('solid', start_color='1A3A6B')
-    ws['A1'].alignment = Alignment(horizontal='center', vertical='center')
-    ws.row_dimensions[1].height = 35
-    
-    ws.merge_cells('A2:H2')
-    ws['A2'] = f"Dışa Aktarma Tarihi: {timezone.now().strftime('%d.%m.%Y %H:%M')} | Toplam: {staff.count()} personel"
-    ws['A2'].font = Font(name='Arial', size=10, color='666666')
-    ws['A2'].alignment = Alignment(horizontal='center')
-    
-    headers = ['Sıra', 'Ad Soyad', 'Kullanıcı Adı', 'Email', 'Durum', 'Kayıt Tarihi', 'Son Giriş', 'Toplam Teklif']
-    
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=3, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_align
-    ws.row_dimensions[3].height = 30
-    
-    for row_idx, s in enumerate(staff, 4):
-        row_fill = PatternFill('solid', start_color='F8F9FA') if row_idx % 2 == 0 else PatternFill('solid', start_color='FFFFFF')
-        
-        data = [
-            row_idx - 3,
-            s.get_full_name() or s.username,
-            s.username,
-            s.email,
-            'Aktif' if s.is_active_user else 'Pasif',
-            s.date_joined.strftime('%d.%m.%Y') if s.date_joined else '-',
-            s.last_login.strftime('%d.%m.%Y %H:%M') if s.last_login else 'Hiç giriş yapmadı',
-            Offer.objects.filter(user=s).count(),
-        ]
-        
-        for col, value in enumerate(data, 1):
-            cell = ws.cell(row=row_idx, column=col, value=value)
-            cell.font = Font(name='Arial', size=10)
-            cell.fill = row_fill
-            cell.alignment = center_align
-            if col == 5:
-                cell.font = Font(name='Arial', size=10, bold=True, 
-                               color='155724' if value == 'Aktif' else '721C24')
-    
-    col_widths = [6, 25, 18, 28, 10, 15, 20, 14]
-    for i, width in enumerate(col_widths, 1):
-        ws.column_dimensions[get_column_letter(i)].width = width
-    
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = f'attachment; filename="personeller_{timezone.now().strftime("%Y%m%d_%H%M")}.xlsx"'
-    wb.save(response)
-    return response
+    return csv_exports.delimited_response(
+        fmt, f'personeller_{timezone.now().strftime("%Y%m%d_%H%M")}',
+        csv_exports.STAFF_HEADERS, csv_exports.staff_rows(staff),
+    )
 
 #PDF İçin------------------------
 
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, HRFlowable
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 
 @login_required
 def export_offer_excel(request, offer_id):
     """Tek teklif Excel'e aktar"""
     
-    offer = get_object_or_404(Offer, id=offer_id)
+    offer = get_object_or_404(export_offers(with_items=False), id=offer_id)
     
     # Yetki kontrolü
     can_export = (
@@ -2113,6 +2164,19 @@ def export_offer_excel(request, offer_id):
         messages.error(request, "Bu teklifi dışa aktarma yetkiniz yok.")
         return redirect('my_offers')
     
+    # Aynı versiyon daha önce üretildiyse diskten okunur (documents.py)
+    document = document_cache.open(offer, 'xlsx', lambda output: _render_offer_excel(prefetch_offer_items([offer])[0], output))
+    return FileResponse(
+        document,
+        as_attachment=True,
+        filename=f'teklif_{offer.id}_{timezone.now().strftime("%Y%m%d")}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+
+
+def _render_offer_excel(offer, output):
+    """Tek teklif Excel dokümanını output'a yazar (offer: export_offers ile yüklenmiş)"""
+    
     wb = Workbook()
     
     # ========================
@@ -2286,7 +2350,8 @@ def export_offer_excel(request, offer_id):
         cell.alignment = center_align
     ws2.row_dimensions[2].height = 35
     
-    for idx, item in enumerate(offer.items.all(), 1):
+    items = offer.items.all()
+    for idx, item in enumerate(items, 1):
         row_fill = PatternFill('solid', start_color='F8F9FA') if idx % 2 == 0 else PatternFill('solid', start_color='FFFFFF')
         
         delivery_addr = '-'
@@ -2321,7 +2386,7 @@ def export_offer_excel(request, offer_id):
         ws2.row_dimensions[idx+2].height = 20
     
     # Toplam satırı
-    total_row_idx = offer.items.count() + 3
+    total_row_idx = len(items) + 3
     totals = [
         ('', '', '', '', '', '', '', '', 'TOPLAM:', 
          float(offer.items_net_after_item_discounts()),
@@ -2396,17 +2461,14 @@ def export_offer_excel(request, offer_id):
     ws3.column_dimensions['A'].width = 40
     ws3.column_dimensions['B'].width = 20
     
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = f'attachment; filename="teklif_{offer.id}_{timezone.now().strftime("%Y%m%d")}.xlsx"'
-    wb.save(response)
-    return response
+    wb.save(output)
 
 
 @login_required
 def export_offer_pdf(request, offer_id):
     """Tek teklif PDF'e aktar"""
     
-    offer = get_object_or_404(Offer, id=offer_id)
+    offer = get_object_or_404(export_offers(with_items=False), id=offer_id)
     
     can_export = (
         request.user.is_superuser or request.user.is_staff or
@@ -2419,278 +2481,10 @@ def export_offer_pdf(request, offer_id):
         messages.error(request, "Bu teklifi dışa aktarma yetkiniz yok.")
         return redirect('my_offers')
     
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="teklif_{offer.id}_{timezone.now().strftime("%Y%m%d")}.pdf"'
-    
-    doc = SimpleDocTemplate(response, pagesize=A4, 
-                           rightMargin=1.5*cm, leftMargin=1.5*cm,
-                           topMargin=1.5*cm, bottomMargin=1.5*cm)
-    
-    styles = getSampleStyleSheet()
-    story = []
-    
-    # Özel stiller
-    title_style = ParagraphStyle('title', parent=styles['Normal'],
-                                fontSize=18, fontName='Helvetica-Bold',
-                                textColor=colors.HexColor('#1A3A6B'),
-                                alignment=TA_CENTER, spaceAfter=8)
-    
-    h1_style = ParagraphStyle('h1', parent=styles['Normal'],
-                             fontSize=12, fontName='Helvetica-Bold',
-                             textColor=colors.white,
-                             backColor=colors.HexColor('#2F6FED'),
-                             alignment=TA_CENTER, spaceBefore=10, spaceAfter=4,
-                             leftPadding=6, rightPadding=6, topPadding=4, bottomPadding=4)
-    
-    h2_style = ParagraphStyle('h2', parent=styles['Normal'],
-                             fontSize=11, fontName='Helvetica-Bold',
-                             textColor=colors.white,
-                             backColor=colors.HexColor('#28A745'),
-                             alignment=TA_CENTER, spaceBefore=8, spaceAfter=4,
-                             leftPadding=6, rightPadding=6, topPadding=4, bottomPadding=4)
-    
-    label_style = ParagraphStyle('label', parent=styles['Normal'],
-                                fontSize=9, fontName='Helvetica-Bold',
-                                textColor=colors.HexColor('#333333'))
-    
-    value_style = ParagraphStyle('value', parent=styles['Normal'],
-                                fontSize=9, fontName='Helvetica',
-                                textColor=colors.HexColor('#555555'))
-    
-    normal_style = ParagraphStyle('normal', parent=styles['Normal'],
-                                 fontSize=9, fontName='Helvetica')
-    
-    # Başlık
-    offer_no = f"#{offer.original_offer.id if offer.original_offer else offer.id}"
-    if offer.revision_number > 1:
-        offer_no += f" (Rev.{offer.revision_number})"
-    
-    story.append(Paragraph(f"TEKLIF DETAY RAPORU", title_style))
-    
-    status_map = {'sent': 'Bekliyor', 'approved': 'Onaylandi', 'rejected': 'Reddedildi', 'revised': 'Revize Edildi'}
-    status_colors_pdf = {'sent': '#856404', 'approved': '#155724', 'rejected': '#721C24', 'revised': '#004085'}
-    
-    status_color = status_colors_pdf.get(offer.status, '#333333')
-    story.append(Paragraph(
-        f'<font color="{status_color}"><b>Teklif No: {offer_no} | Durum: {status_map.get(offer.status, offer.status)}</b></font>',
-        ParagraphStyle('status', parent=styles['Normal'], fontSize=11, alignment=TA_CENTER, spaceAfter=10)
-    ))
-    
-    story.append(HRFlowable(width="100%", thickness=2, color=colors.HexColor('#2F6FED')))
-    story.append(Spacer(1, 0.3*cm))
-    
-    # Firma Bilgileri
-    story.append(Paragraph("FIRMA BILGILERI", h1_style))
-    
-    firma_table_data = [
-        [Paragraph('<b>Firma Adi</b>', label_style), Paragraph(offer.user.company_name or '-', value_style),
-         Paragraph('<b>Yetkili</b>', label_style), Paragraph(offer.user.company_responsible_person or '-', value_style)],
-        [Paragraph('<b>Vergi No</b>', label_style), Paragraph(offer.user.company_tax_number or '-', value_style),
-         Paragraph('<b>Vergi Dairesi</b>', label_style), Paragraph(offer.user.company_tax_office or '-', value_style)],
-        [Paragraph('<b>Telefon</b>', label_style), Paragraph(offer.user.company_phone or '-', value_style),
-         Paragraph('<b>Mobil</b>', label_style), Paragraph(offer.user.company_mobile or '-', value_style)],
-        [Paragraph('<b>Email</b>', label_style), Paragraph(offer.user.email or '-', value_style),
-         Paragraph('<b>Adres</b>', label_style), Paragraph(offer.user.company_address or '-', value_style)],
-        [Paragraph('<b>Hazirlayan</b>', label_style), Paragraph(offer.user.get_full_name() or offer.user.username, value_style),
-         Paragraph('<b>Kullanici Adi</b>', label_style), Paragraph(offer.user.username, value_style)],
-    ]
-    
-    firma_table = Table(firma_table_data, colWidths=[3.5*cm, 6*cm, 3.5*cm, 5.5*cm])
-    firma_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#EEF1FF')),
-        ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#EEF1FF')),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#DDDDDD')),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ('LEFTPADDING', (0, 0), (-1, -1), 6),
-    ]))
-    story.append(firma_table)
-    story.append(Spacer(1, 0.3*cm))
-    
-    # Eczane Bilgileri
-    story.append(Paragraph("ECZANE BILGILERI", h2_style))
-    
-    eczane_user = None
-    if offer.approved_by:
-        eczane_user = offer.approved_by.manager if not offer.approved_by.is_manager else offer.approved_by
-    elif offer.rejected_by:
-        eczane_user = offer.rejected_by.manager if not offer.rejected_by.is_manager else offer.rejected_by
-    
-    eczane_table_data = [
-        [Paragraph('<b>Eczane Adi</b>', label_style), Paragraph(eczane_user.pharmacy_name if eczane_user else '-', value_style),
-         Paragraph('<b>Eczaci</b>', label_style), Paragraph(eczane_user.pharmacist_name if eczane_user else '-', value_style)],
-        [Paragraph('<b>Vergi No</b>', label_style), Paragraph(eczane_user.pharmacy_tax_number if eczane_user else '-', value_style),
-         Paragraph('<b>Ruhsat No</b>', label_style), Paragraph(eczane_user.pharmacy_license_number if eczane_user else '-', value_style)],
-        [Paragraph('<b>Telefon</b>', label_style), Paragraph(eczane_user.pharmacy_phone if eczane_user else '-', value_style),
-         Paragraph('<b>Email</b>', label_style), Paragraph(eczane_user.pharmacy_email if eczane_user else '-', value_style)],
-        [Paragraph('<b>Adres</b>', label_style), Paragraph(eczane_user.pharmacy_address if eczane_user else '-', value_style),
-         Paragraph('<b>Onaylayan</b>', label_style), Paragraph(offer.approved_by.get_full_name() if offer.approved_by else '-', value_style)],
-        [Paragraph('<b>Onay Tarihi</b>', label_style), Paragraph(offer.approved_at.strftime('%d.%m.%Y %H:%M') if offer.approved_at else '-', value_style),
-         Paragraph('<b>Termin Tarihi</b>', label_style), Paragraph(offer.delivery_deadline.strftime('%d.%m.%Y') if offer.delivery_deadline else '-', value_style)],
-    ]
-    
-    eczane_table = Table(eczane_table_data, colWidths=[3.5*cm, 6*cm, 3.5*cm, 5.5*cm])
-    eczane_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#EAFFF2')),
-        ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#EAFFF2')),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#DDDDDD')),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ('LEFTPADDING', (0, 0), (-1, -1), 6),
-    ]))
-    story.append(eczane_table)
-    story.append(Spacer(1, 0.3*cm))
-    
-    # Fatura Bilgileri
-    if offer.invoice_number or offer.invoice_date or offer.delivery_deadline:
-        story.append(Paragraph("FATURA BILGILERI", ParagraphStyle('h3', parent=styles['Normal'],
-                              fontSize=11, fontName='Helvetica-Bold', textColor=colors.white,
-                              backColor=colors.HexColor('#764BA2'), alignment=TA_CENTER,
-                              spaceBefore=8, spaceAfter=4, leftPadding=6, topPadding=4, bottomPadding=4)))
-        
-        fatura_data = [
-            [Paragraph('<b>Fatura No</b>', label_style), Paragraph(offer.invoice_number or '-', value_style),
-             Paragraph('<b>Fatura Tarihi</b>', label_style), Paragraph(offer.invoice_date.strftime('%d.%m.%Y') if offer.invoice_date else '-', value_style)],
-            [Paragraph('<b>Termin Tarihi</b>', label_style), Paragraph(offer.delivery_deadline.strftime('%d.%m.%Y') if offer.delivery_deadline else '-', value_style),
-             Paragraph('<b>Gonderi Tarihi</b>', label_style), Paragraph(offer.sent_at.strftime('%d.%m.%Y %H:%M') if offer.sent_at else '-', value_style)],
-        ]
-        
-        fatura_table = Table(fatura_data, colWidths=[3.5*cm, 6*cm, 3.5*cm, 5.5*cm])
-        fatura_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#F3EEFF')),
-            ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#F3EEFF')),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#DDDDDD')),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 0), (-1, -1), 4),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-            ('LEFTPADDING', (0, 0), (-1, -1), 6),
-        ]))
-        story.append(fatura_table)
-        story.append(Spacer(1, 0.3*cm))
-    
-    # Ürün Detayları
-    story.append(Paragraph("URUN DETAYLARI", h1_style))
-    
-    urun_headers = [
-        Paragraph('<b>Sira</b>', label_style),
-        Paragraph('<b>Urun Adi</b>', label_style),
-        Paragraph('<b>Adet</b>', label_style),
-        Paragraph('<b>Birim\nFiyat</b>', label_style),
-        Paragraph('<b>KDV\n%</b>', label_style),
-        Paragraph('<b>Iskonto</b>', label_style),
-        Paragraph('<b>KDV\nHaric</b>', label_style),
-        Paragraph('<b>KDV</b>', label_style),
-        Paragraph('<b>Toplam</b>', label_style),
-        Paragraph('<b>Teslimat\nAdresi</b>', label_style),
-    ]
-    
-    urun_data = [urun_headers]
-    
-    for idx, item in enumerate(offer.items.all(), 1):
-        delivery_addr = '-'
-        if hasattr(item, 'delivery_address') and item.delivery_address:
-            delivery_addr = f"{item.delivery_address.title}"
-        
-        discount_str = '-'
-        if item.discount_type != 'none':
-            discount_str = f"{item.discount_value}{'%' if item.discount_type == 'percent' else 'TL'} (-{float(item.discount_amount):.2f})"
-        
-        row_data = [
-            Paragraph(str(idx), normal_style),
-            Paragraph(item.product.name, normal_style),
-            Paragraph(str(item.quantity), normal_style),
-            Paragraph(f"{float(item.unit_price):.2f}", normal_style),
-            Paragraph(f"%{item.vat_rate}", normal_style),
-            Paragraph(discount_str, normal_style),
-            Paragraph(f"{float(item.line_subtotal):.2f}", normal_style),
-            Paragraph(f"{float(item.vat_amount):.2f}", normal_style),
-            Paragraph(f"{float(item.total_price):.2f}", normal_style),
-            Paragraph(delivery_addr, normal_style),
-        ]
-        urun_data.append(row_data)
-    
-    # Toplam satırı
-    urun_data.append([
-        Paragraph('', normal_style),
-        Paragraph('<b>TOPLAM</b>', label_style),
-        Paragraph('', normal_style),
-        Paragraph('', normal_style),
-        Paragraph('', normal_style),
-        Paragraph('', normal_style),
-        Paragraph(f'<b>{float(offer.items_net_after_item_discounts()):.2f}</b>', label_style),
-        Paragraph(f'<b>{float(offer.items_vat_after_item_discounts()):.2f}</b>', label_style),
-        Paragraph(f'<b>{float(offer.final_total):.2f}</b>', label_style),
-        Paragraph('', normal_style),
-    ])
-    
-    urun_table = Table(urun_data, colWidths=[1*cm, 5*cm, 1.2*cm, 1.8*cm, 1.2*cm, 2.5*cm, 2*cm, 1.8*cm, 2*cm, 2.5*cm])
-    urun_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2F6FED')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#EEF1FF')),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.HexColor('#F8F9FA')]),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#DDDDDD')),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-    ]))
-    story.append(urun_table)
-    story.append(Spacer(1, 0.5*cm))
-    
-    # Toplam Özeti
-    story.append(Paragraph("TOPLAM OZETI", h1_style))
-    
-    toplam_data = [
-        ['KDV Haric Toplam (Iskonto Oncesi)', f"{float(offer.items_subtotal_net()):.2f} TL"],
-        ['Urun Iskonto Toplami', f"-{float(offer.total_item_discounts):.2f} TL"],
-        ['KDV Haric Toplam (Iskonto Sonrasi)', f"{float(offer.items_net_after_item_discounts()):.2f} TL"],
-    ]
-    
-    if offer.overall_discount_type != 'none':
-        toplam_data.append([f'Genel Iskonto', f"-{float(offer.overall_discount_amount):.2f} TL"])
-        toplam_data.append(['Genel Iskonto Sonrasi KDV Haric', f"{float(offer.net_after_overall_discount):.2f} TL"])
-    
-    kdv = offer.vat_after_overall_discount if offer.overall_discount_type != 'none' else offer.items_vat_after_item_discounts()
-    toplam_data.append(['KDV Toplami', f"{float(kdv):.2f} TL"])
-    toplam_data.append(['SON TOPLAM (KDV DAHIL)', f"{float(offer.final_total):.2f} TL"])
-    
-    toplam_table_data = []
-    for label, value in toplam_data:
-        is_total = label.startswith('SON TOPLAM')
-        is_discount = 'Iskonto' in label and 'Sonrasi' not in label
-        toplam_table_data.append([Paragraph(f'<b>{label}</b>' if is_total else label, 
-                                           ParagraphStyle('tl', parent=styles['Normal'], fontSize=10,
-                                                         textColor=colors.HexColor('#DC3545') if is_discount else colors.HexColor('#333333'))),
-                                  Paragraph(f'<b>{value}</b>' if is_total else value,
-                                           ParagraphStyle('tv', parent=styles['Normal'], fontSize=10, alignment=TA_RIGHT,
-                                                         textColor=colors.HexColor('#DC3545') if is_discount else colors.HexColor('#333333')))])
-    
-    toplam_table = Table(toplam_table_data, colWidths=[13*cm, 5.5*cm])
-    toplam_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#2F6FED')),
-        ('TEXTCOLOR', (0, -1), (-1, -1), colors.white),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#DDDDDD')),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('LEFTPADDING', (0, 0), (-1, -1), 8),
-    ]))
-    story.append(toplam_table)
-    
-    # Red nedeni varsa
-    if offer.reject_reason:
-        story.append(Spacer(1, 0.5*cm))
-        story.append(Paragraph("RED NEDENI", ParagraphStyle('red', parent=styles['Normal'],
-                              fontSize=11, fontName='Helvetica-Bold', textColor=colors.white,
-                              backColor=colors.HexColor('#DC3545'), alignment=TA_CENTER,
-                              spaceBefore=8, spaceAfter=4, leftPadding=6, topPadding=4, bottomPadding=4)))
-        story.append(Paragraph(offer.reject_reason, ParagraphStyle('rednote', parent=styles['Normal'],
-                              fontSize=10, textColor=colors.HexColor('#721C24'),
-                              backColor=colors.HexColor('#FFF2F2'), leftPadding=8, topPadding=6, bottomPadding=6)))
-    
-    doc.build(story)
-    return response
\ No newline at end of file
+    document = document_cache.open(offer, 'pdf', lambda output: render_offer_pdf(prefetch_offer_items([offer])[0], output))
+    return FileResponse(
+        document,
+        as_attachment=True,
+        filename=f'teklif_{offer.id}_{timezone.now().strftime("%Y%m%d")}.pdf',
+        content_type='application/pdf',
+    )
@@ -3,6 +3,9 @@ ASGI config for teklif_sistemi project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Bildirim akışı (/products/notifications/stream/, SSE) sadece ASGI altında
+açılır; ör. ``uvicorn teklif_sistemi.asgi:application``.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
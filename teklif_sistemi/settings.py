@@ -72,6 +72,8 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "teklif_sistemi.wsgi.application"
 
+TEST_RUNNER = "teklif_sistemi.test_runner.TestRunner"
+
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
@@ -130,4 +132,37 @@ DEFAULT_FROM_EMAIL = "noreply@teklif.local"
 
 # Media Files (Ürün Görselleri)
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
\ No newline at end of file
+MEDIA_ROOT = BASE_DIR / 'media'
+# Excel içe aktarma önizlemeleri (media/import_previews): onaylanmayan önizleme bu kadar saat sonra silinir
+IMPORT_PREVIEW_MAX_AGE_HOURS = 24
+# Arka plan export işleri (python manage.py run_export_worker)
+EXPORT_JOB_TTL_HOURS = 24       # hazır dosyanın saklanma süresi
+EXPORT_JOB_TIMEOUT_MINUTES = 30 # worker'ı bu süre heartbeat atmayan "hazırlanıyor" iş yeniden kuyruğa alınır
+EXPORT_JOB_HEARTBEAT_SECONDS = 30 # çalışan worker bu aralıkla işin heartbeat_at alanını günceller
+OFFER_PDF_BATCH_PROCESSES = None  # toplu PDF süreç havuzu boyutu (None: min(4, CPU sayısı))
+
+# Tek teklif PDF / Excel disk cache'i (products/documents.py)
+OFFER_DOCUMENT_CACHE_DIR = BASE_DIR / 'cache' / 'offer_documents'
+OFFER_DOCUMENT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Teklif PDF yazı tipi: (normal, kalın) TTF yolları; None ise DejaVu Sans, yoksa reportlab'in Vera'sı
+OFFER_PDF_FONT = None
+
+# Bildirim akışı (SSE, ASGI altında): diğer worker'larda oluşan bildirimler için
+# süreç başına MAX(id) yoklama aralığı (saniye); tek süreçte 0 / None ile kapatılabilir
+NOTIFICATION_STREAM_POLL_INTERVAL = 5
+
+# Bildirim arşivi (python manage.py archive_notifications): bu kadar günden eski okunmuş bildirimler taşınır
+NOTIFICATION_ARCHIVE_DAYS = 30
+
+# Aktivite logu arka planda toplu yazılır (products/activity_log.py); test runner'ı
+# (teklif_sistemi/test_runner.py) testlerde kapatır, kayıtlar anında yazılır
+ACTIVITY_LOG_ASYNC = True
+ACTIVITY_LOG_FLUSH_MS = 500     # en fazla bu kadar bekletilir
+ACTIVITY_LOG_BATCH_SIZE = 100   # bu kadar kayıt birikince beklemeden yazılır
+ACTIVITY_LOG_QUEUE_SIZE = 10000 # kuyruk doluysa kayıt istek içinde yazılır
+
+# Aktivite logu arşivi (python manage.py archive_activity_logs): tabloda son N ay kalır,
+# eski aylar bu dizine aylık gzip'li JSONL olarak taşınır
+ACTIVITY_LOG_HOT_MONTHS = 12
+ACTIVITY_LOG_ARCHIVE_DIR = BASE_DIR / 'archive' / 'activity_logs'
@@ -0,0 +1,23 @@
+"""
+Test Runner
+
+TestCase her testi commit edilmeyen bir transaction içinde çalıştırır;
+on_commit callback'leri çalışmaz. Aktivite logu arka plan yazıcısı kayıtları
+commit'te kuyruğa aldığı için testlerde kapatılır (ACTIVITY_LOG_ASYNC = False):
+log_activity kaydı anında yazar. Arka plan yazıcısını deneyen testler
+override_settings ile açar.
+"""
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._activity_log_async = settings.ACTIVITY_LOG_ASYNC
+        settings.ACTIVITY_LOG_ASYNC = False
+
+    def teardown_test_environment(self, **kwargs):
+        settings.ACTIVITY_LOG_ASYNC = self._activity_log_async
+        super().teardown_test_environment(**kwargs)